@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Database layer of trainer.py against a real (local) Postgres.
+
+Creates the pipeline tables (plus the training_samples NOTIFY triggers) in a
+throwaway schema, runs the trainer's DB helpers through its connection pool and
+its SampleListener, and drops the schema afterwards. Needs
+psycopg2 only — no torch, no model.
+
+Run:
+  TRAINER_TEST_DATABASE_URL="postgresql://localhost/postgres" \\
+      python3 scripts/jetson/test_trainer_db.py
+
+Skipped when TRAINER_TEST_DATABASE_URL is unset.
+"""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+TEST_DB_URL = os.environ.get("TRAINER_TEST_DATABASE_URL")
+try:
+    import psycopg2
+
+    import trainer
+except ImportError:  # psycopg2 missing: nothing to test against
+    trainer = None
+
+SCHEMA = f"trainer_test_{os.getpid()}"
+NOTIFY_MIGRATION = Path(__file__).resolve().parents[2] / "src/lib/migrations/2026-07-11_training_samples_notify.sql"
+
+# The columns trainer.py touches, as in src/lib/migrations (baseline).
+DDL = """
+CREATE TYPE training_sample_status AS ENUM ('raw', 'rated', 'queued', 'trained', 'rejected');
+CREATE TYPE training_run_status AS ENUM ('pending', 'running', 'completed', 'failed');
+CREATE TABLE training_runs (
+  id SERIAL PRIMARY KEY, base_model VARCHAR(200) NOT NULL, lora_rank INTEGER,
+  learning_rate NUMERIC, epochs INTEGER, sample_count INTEGER,
+  status training_run_status NOT NULL DEFAULT 'pending', train_loss NUMERIC,
+  duration_seconds INTEGER, adapter_path TEXT, device_id VARCHAR(50),
+  started_at TIMESTAMPTZ, completed_at TIMESTAMPTZ, error_log TEXT
+);
+CREATE TABLE training_samples (
+  id SERIAL PRIMARY KEY, instruction TEXT NOT NULL, input_context TEXT,
+  output TEXT NOT NULL, source VARCHAR(50) NOT NULL,
+  status training_sample_status NOT NULL DEFAULT 'raw', rating INTEGER,
+  auto_score NUMERIC, tests_pass BOOLEAN,
+  training_run_id INTEGER REFERENCES training_runs(id),
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE model_versions (
+  id SERIAL PRIMARY KEY, run_id INTEGER REFERENCES training_runs(id),
+  version VARCHAR(50) NOT NULL, base_model VARCHAR(200) NOT NULL,
+  adapter_path TEXT NOT NULL, eval_score NUMERIC
+);
+"""
+
+
+@unittest.skipUnless(trainer is not None and TEST_DB_URL, "set TRAINER_TEST_DATABASE_URL (and install psycopg2)")
+class TrainerDbTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        admin = psycopg2.connect(TEST_DB_URL)
+        admin.autocommit = True
+        admin.set_client_encoding("UTF8")  # the migration comments are UTF-8
+        with admin.cursor() as cur:
+            cur.execute(f"CREATE SCHEMA {SCHEMA}")
+            cur.execute(f"SET search_path TO {SCHEMA}")
+            cur.execute(DDL)
+            cur.execute(NOTIFY_MIGRATION.read_text(encoding="utf-8"))
+        admin.close()
+        trainer.init_pool(TEST_DB_URL, maxconn=2, options=f"-c search_path={SCHEMA}")
+
+    @classmethod
+    def tearDownClass(cls):
+        trainer.close_pool()
+        admin = psycopg2.connect(TEST_DB_URL)
+        admin.autocommit = True
+        with admin.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        admin.close()
+
+    def setUp(self):
+        with trainer.transaction() as cur:
+            cur.execute("TRUNCATE model_versions, training_samples, training_runs RESTART IDENTITY CASCADE")
+            rows = [
+                # (rating, tests_pass, status) — eligible: rated >= threshold, or unrated + tests pass
+                (5, None, "rated"), (trainer.RATING_THRESHOLD, None, "rated"), (None, True, "raw"),
+                (trainer.RATING_THRESHOLD - 1, True, "rated"), (None, False, "raw"), (5, None, "trained"),
+            ]
+            for i, (rating, tests_pass, status) in enumerate(rows):
+                cur.execute(
+                    "INSERT INTO training_samples (instruction, output, source, rating, tests_pass, status) "
+                    "VALUES (%s, 'out', 'test', %s, %s, %s)",
+                    (f"task {i}", rating, tests_pass, status),
+                )
+
+    def _statuses(self):
+        with trainer.transaction() as cur:
+            cur.execute("SELECT id, status::text AS status, training_run_id FROM training_samples ORDER BY id")
+            return [(r["status"], r["training_run_id"]) for r in cur.fetchall()]
+
+    def test_stream_yields_eligible_rows_in_batches(self):
+        rows = list(trainer.stream_unprocessed_samples(batch=1))
+        self.assertEqual([r["id"] for r in rows], [1, 2, 3])
+        self.assertEqual(trainer.fetch_unprocessed_samples(), rows)
+
+    def test_start_and_finish_run(self):
+        run_id = trainer.start_run([1, 2, 3])
+        self.assertEqual(self._statuses()[:3], [("queued", run_id)] * 3)
+        version = trainer.finish_run(run_id, 0.5, "/tmp/adapter", 12)
+        self.assertEqual(version, "v1")
+        self.assertEqual(self._statuses()[:3], [("trained", run_id)] * 3)
+        with trainer.transaction() as cur:
+            cur.execute("SELECT status::text AS status, sample_count FROM training_runs WHERE id = %s", (run_id,))
+            self.assertEqual(dict(cur.fetchone()), {"status": "completed", "sample_count": 3})
+
+    def test_start_run_is_atomic(self):
+        real = trainer.mark_samples_queued
+
+        def boom(*args, **kwargs):
+            raise RuntimeError("lost connection mid-way")
+
+        trainer.mark_samples_queued = boom
+        try:
+            with self.assertRaises(RuntimeError):
+                trainer.start_run([1, 2, 3])
+        finally:
+            trainer.mark_samples_queued = real
+        with trainer.transaction() as cur:
+            cur.execute("SELECT COUNT(*) AS cnt FROM training_runs")
+            self.assertEqual(cur.fetchone()["cnt"], 0)  # no orphan 'running' run
+
+    def test_fail_run_releases_samples(self):
+        run_id = trainer.start_run([1, 3])
+        trainer.fail_run(run_id, "OOM")
+        self.assertEqual(self._statuses()[:3], [("rated", None)] * 3)
+
+    def test_connections_are_reused(self):
+        for _ in range(20):
+            trainer.fetch_unprocessed_samples()
+        self.assertLessEqual(len(trainer._pool._pool) + len(trainer._pool._used), 2)
+        self.assertEqual(len(trainer._pool._used), 0)
+
+    def test_dropped_idle_connection_is_replaced(self):
+        # what a hosted Postgres does to the idle pooled connection during training
+        with trainer.connection() as conn:
+            pid = conn.get_backend_pid()
+        admin = psycopg2.connect(TEST_DB_URL)
+        admin.autocommit = True
+        with admin.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(%s)", (pid,))
+        admin.close()
+        run_id = trainer.start_run([1])
+        self.assertEqual(trainer.finish_run(run_id, 0.5, "/tmp/adapter", 12), "v1")
+
+    def test_count_eligible_samples(self):
+        self.assertEqual(trainer.count_eligible_samples(), 3)
+        self.assertEqual(trainer.count_eligible_samples(limit=2), 2)
+
+    def _listener(self):
+        listener = trainer.SampleListener(TEST_DB_URL, debounce=0.2, options=f"-c search_path={SCHEMA}")
+        self.addCleanup(listener.close)
+        self.assertTrue(listener.connect())
+        self.assertTrue(listener.connect())  # already listening: no second session
+        return listener
+
+    def test_listener_wakes_on_insert_and_rating(self):
+        listener = self._listener()
+        with trainer.transaction() as cur:
+            cur.execute("INSERT INTO training_samples (instruction, output, source) VALUES ('new', 'out', 'test')")
+        self.assertTrue(listener.wait(5))
+        with trainer.transaction() as cur:
+            cur.execute("UPDATE training_samples SET rating = 5 WHERE id = 5")
+        self.assertTrue(listener.wait(5))
+
+    def test_notify_between_connect_and_wait_is_kept(self):
+        listener = self._listener()
+        self.assertLess(trainer.count_eligible_samples(), trainer.MIN_SAMPLES)
+        with trainer.transaction() as cur:  # lands before the trainer starts waiting
+            cur.execute("UPDATE training_samples SET tests_pass = true WHERE id = 5")
+        self.assertTrue(listener.wait(5))
+
+    def test_listener_ignores_other_columns_and_rollbacks(self):
+        listener = self._listener()
+        with trainer.transaction() as cur:
+            cur.execute("UPDATE training_samples SET auto_score = 0.9, rating = rating WHERE id = 1")
+        with self.assertRaises(RuntimeError):
+            with trainer.transaction() as cur:
+                cur.execute("UPDATE training_samples SET rating = 1 WHERE id = 2")
+                raise RuntimeError("rolled back")
+        self.assertFalse(listener.wait(0.5))
+
+    def test_listener_falls_back_to_sleeping(self):
+        listener = trainer.SampleListener("postgresql://nobody@127.0.0.1:1/none", retry=0.05)
+        t0 = time.monotonic()
+        self.assertFalse(listener.wait(30))  # sleeps the short retry, not the poll interval
+        self.assertLess(time.monotonic() - t0, 5)
+        self.assertIsNone(listener.conn)
+
+    def _terminate(self, conn):
+        admin = psycopg2.connect(TEST_DB_URL)
+        admin.autocommit = True
+        with admin.cursor() as cur:
+            cur.execute("SELECT pg_terminate_backend(%s)", (conn.get_backend_pid(),))
+        admin.close()
+        time.sleep(0.2)  # let the FATAL reach the client socket
+
+    def test_dropped_listen_returns_at_once_and_relistens(self):
+        listener = self._listener()
+        self._terminate(listener.conn)
+        t0 = time.monotonic()
+        self.assertFalse(listener.wait(30))
+        self.assertLess(time.monotonic() - t0, 5)  # so the caller re-counts
+        self.assertTrue(listener.connect())
+        with trainer.transaction() as cur:
+            cur.execute("UPDATE training_samples SET rating = 5 WHERE id = 5")
+        self.assertTrue(listener.wait(5))
+
+    def test_connect_notices_a_dropped_listen(self):
+        listener = self._listener()
+        old = listener.conn
+        self._terminate(old)
+        self.assertTrue(listener.connect())  # e.g. after a long training run
+        self.assertIsNot(listener.conn, old)
+        with trainer.transaction() as cur:
+            cur.execute("UPDATE training_samples SET rating = 5 WHERE id = 5")
+        self.assertTrue(listener.wait(5))
+
+    def test_notify_read_by_connect_still_wakes_wait(self):
+        listener = self._listener()
+        with trainer.transaction() as cur:
+            cur.execute("UPDATE training_samples SET rating = 5 WHERE id = 5")
+        time.sleep(0.2)
+        self.assertTrue(listener.connect())  # its ping reads the NOTIFY
+        self.assertTrue(listener.wait(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@
 """
 Jetson CUDA Training Worker
 
-Polls Postgres for new training samples, builds SFT datasets, runs QLoRA
+Waits on Postgres for new training samples, builds SFT datasets, runs QLoRA
 fine-tuning on the Jetson Orin Nano, and exports LoRA adapters.
 
 Hardware target: Jetson Orin Nano (8GB unified memory)
@@ -15,6 +15,22 @@ Setup:
 Run:
   DATABASE_URL="postgresql://..." python3 scripts/jetson/trainer.py
 
+Database access goes through a small connection pool (PIPELINE_DB_POOL_SIZE).
+Steps that belong together share one transaction: creating a run and queueing
+its samples, or completing a run, marking its samples and registering the model
+version. Eligible samples are streamed through a server-side cursor. The DB
+helpers import without torch; scripts/jetson/test_trainer_db.py exercises them
+against a local Postgres.
+
+Instead of re-running the eligibility query every few minutes, the worker
+LISTENs on `training_samples`, which triggers from
+src/lib/migrations/2026-07-11_training_samples_notify.sql NOTIFY on sample
+inserts and rating/status changes. When woken it checks a bounded COUNT and
+only pulls samples once MIN_SAMPLES are eligible. PIPELINE_POLL_INTERVAL is
+now just the fallback re-check for missed notifications. LISTEN needs a
+direct (session) connection: set PIPELINE_LISTEN_URL if DATABASE_URL goes
+through a transaction pooler.
+
 Or as a systemd service:
   sudo systemctl start jetson-trainer
 """
@@ -25,26 +41,33 @@ import time
 import json
 import logging
 import hashlib
+import select
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
-import torch
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 
 # ─── Configuration ────────────────────────────────────────────
 
 DB_URL = os.environ.get("DATABASE_URL")
-if not DB_URL:
-    print("ERROR: DATABASE_URL environment variable is required", file=sys.stderr)
-    sys.exit(1)
+DB_POOL_SIZE = int(os.environ.get("PIPELINE_DB_POOL_SIZE", "2"))
+FETCH_BATCH = int(os.environ.get("PIPELINE_FETCH_BATCH", "500"))
 
 BASE_MODEL = os.environ.get("PIPELINE_BASE_MODEL", "Qwen/Qwen2.5-Coder-3B")
 ADAPTER_DIR = Path(os.environ.get("PIPELINE_ADAPTER_DIR", "/home/jetson/models/adapters"))
 EXPORT_DIR = Path(os.environ.get("PIPELINE_EXPORT_DIR", "/home/jetson/models/exports"))
 MIN_SAMPLES = int(os.environ.get("PIPELINE_MIN_SAMPLES", "20"))
-POLL_INTERVAL = int(os.environ.get("PIPELINE_POLL_INTERVAL", "300"))
+POLL_INTERVAL = int(os.environ.get("PIPELINE_POLL_INTERVAL", "1800"))  # fallback re-check when no NOTIFY arrives
+RETRY_DELAY = int(os.environ.get("PIPELINE_RETRY_DELAY", "300"))  # after a failed cycle
+NOTIFY_CHANNEL = "training_samples"  # fixed by the trigger in 2026-07-11_training_samples_notify.sql
+NOTIFY_DEBOUNCE = float(os.environ.get("PIPELINE_NOTIFY_DEBOUNCE", "10"))
+LISTEN_RETRY = float(os.environ.get("PIPELINE_LISTEN_RETRY", "60"))  # re-LISTEN backoff, not POLL_INTERVAL
+# LISTEN needs a session-mode connection: point this at the direct (non-pooler) URL
+LISTEN_URL = os.environ.get("PIPELINE_LISTEN_URL") or DB_URL
 RATING_THRESHOLD = int(os.environ.get("PIPELINE_RATING_THRESHOLD", "2"))
 DEVICE_ID = os.environ.get("JETSON_DEVICE_ID", "jetson-orin-nano")
 MAX_SEQ_LENGTH = int(os.environ.get("PIPELINE_MAX_SEQ_LENGTH", "2048"))
@@ -71,59 +94,167 @@ log = logging.getLogger(__name__)
 
 # ─── Database Helpers ─────────────────────────────────────────
 
-def get_conn():
-    """Create a new database connection."""
-    return psycopg2.connect(DB_URL, cursor_factory=RealDictCursor)
+_pool: Optional[ThreadedConnectionPool] = None
+
+
+def init_pool(dsn: Optional[str] = None, minconn: int = 1, maxconn: int = DB_POOL_SIZE, **kwargs):
+    """(Re)create the connection pool. Extra kwargs go to psycopg2.connect
+    (e.g. options="-c search_path=..." for a test schema)."""
+    global _pool
+    close_pool()
+    _pool = ThreadedConnectionPool(
+        minconn, maxconn, dsn or DB_URL, cursor_factory=RealDictCursor, **kwargs
+    )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+def _checkout():
+    """
+    A live connection from the pool. Idle ones can be dropped server-side while
+    a multi-hour training run holds none of them (hosted Postgres closes idle
+    SSL sessions), so each is pinged first; dead ones are discarded and the
+    next idle one — or a fresh connection — is tried instead.
+    """
+    for _ in range(_pool.maxconn):
+        conn = _pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            log.warning(f"Discarding dead pooled connection: {e}")
+            _pool.putconn(conn, close=True)
+    return _pool.getconn()  # all idle ones were stale: this one is new
+
+
+@contextmanager
+def connection() -> Iterator["psycopg2.extensions.connection"]:
+    """
+    Borrow a pooled connection for one transaction: commit on success, roll
+    back on error, then hand it back. Checkout pings it first (see _checkout);
+    a connection that dies mid-transaction is closed instead of returned, so
+    the pool reconnects.
+    """
+    if _pool is None:
+        init_pool()
+    conn = _checkout()
+    broken = False
+    try:
+        with conn:  # psycopg2: commit / rollback, does not close
+            yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        _pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+@contextmanager
+def transaction():
+    """A cursor on a pooled connection; everything on it commits together."""
+    with connection() as conn, conn.cursor() as cur:
+        yield cur
+
+
+@contextmanager
+def _cursor(cur=None):
+    """Run on the caller's transaction when given one, else in a transaction of our own."""
+    if cur is not None:
+        yield cur
+    else:
+        with transaction() as own:
+            yield own
+
+
+ELIGIBLE_WHERE = """
+    WHERE status IN ('rated', 'raw')
+      AND (
+        (rating IS NOT NULL AND rating >= %s)
+        OR (rating IS NULL AND tests_pass = true)
+      )
+"""
+
+ELIGIBLE_SQL = """
+    SELECT id, instruction, input_context, output, source,
+           rating, auto_score, tests_pass
+    FROM training_samples
+""" + ELIGIBLE_WHERE + """
+    ORDER BY
+        rating DESC NULLS LAST,
+        created_at ASC
+"""
+
+
+def stream_unprocessed_samples(batch: int = FETCH_BATCH) -> Iterator[dict]:
+    """
+    Yield samples eligible for training (see fetch_unprocessed_samples) through
+    a server-side cursor, `batch` rows per round trip, instead of materializing
+    the whole result on the client first. main() feeds this straight into
+    build_dataset, so only the conversation texts are held, not the rows.
+    """
+    with connection() as conn:
+        with conn.cursor(name="trainer_eligible_samples", cursor_factory=RealDictCursor) as cur:
+            cur.itersize = batch
+            cur.execute(ELIGIBLE_SQL, (RATING_THRESHOLD,))
+            yield from cur
 
 
 def fetch_unprocessed_samples():
     """
-    Pull all samples eligible for training:
+    Pull all samples eligible for training, as a list:
       - Status is 'rated' or 'raw'
       - Rating meets threshold OR tests passed (auto-qualified)
     """
-    with get_conn() as conn, conn.cursor() as cur:
-        cur.execute("""
-            SELECT id, instruction, input_context, output, source,
-                   rating, auto_score, tests_pass
-            FROM training_samples
-            WHERE status IN ('rated', 'raw')
-              AND (
-                (rating IS NOT NULL AND rating >= %s)
-                OR (rating IS NULL AND tests_pass = true)
-              )
-            ORDER BY
-                rating DESC NULLS LAST,
-                created_at ASC
-        """, (RATING_THRESHOLD,))
-        return cur.fetchall()
-
-
-def mark_samples_queued(sample_ids: list[int], run_id: int):
+    return list(stream_unprocessed_samples())
+
+
+def count_eligible_samples(limit: Optional[int] = None, cur=None) -> int:
+    """
+    Number of samples fetch_unprocessed_samples would return, without pulling
+    them. With `limit` the count stops there — enough to know whether
+    MIN_SAMPLES is reached.
+    """
+    sql = "SELECT 1 FROM training_samples" + ELIGIBLE_WHERE
+    params: tuple = (RATING_THRESHOLD,)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params += (limit,)
+    with _cursor(cur) as cur:
+        cur.execute(f"SELECT COUNT(*) AS cnt FROM ({sql}) s", params)
+        return cur.fetchone()["cnt"]
+
+
+def mark_samples_queued(sample_ids: list[int], run_id: int, cur=None):
     """Mark samples as queued for a specific training run."""
-    with get_conn() as conn, conn.cursor() as cur:
+    with _cursor(cur) as cur:
         cur.execute("""
             UPDATE training_samples
             SET status = 'queued', training_run_id = %s
             WHERE id = ANY(%s)
         """, (run_id, sample_ids))
-        conn.commit()
 
 
-def mark_samples_trained(run_id: int):
+def mark_samples_trained(run_id: int, cur=None):
     """Mark all samples in a run as trained."""
-    with get_conn() as conn, conn.cursor() as cur:
+    with _cursor(cur) as cur:
         cur.execute("""
             UPDATE training_samples
             SET status = 'trained'
             WHERE training_run_id = %s AND status = 'queued'
         """, (run_id,))
-        conn.commit()
 
 
-def create_run(sample_count: int) -> int:
+def create_run(sample_count: int, cur=None) -> int:
     """Create a new training_runs record and return its ID."""
-    with get_conn() as conn, conn.cursor() as cur:
+    with _cursor(cur) as cur:
         cur.execute("""
             INSERT INTO training_runs
                 (base_model, sample_count, status, device_id,
@@ -131,13 +262,21 @@ def create_run(sample_count: int) -> int:
             VALUES (%s, %s, 'running', %s, %s, %s, %s, NOW())
             RETURNING id
         """, (BASE_MODEL, sample_count, DEVICE_ID, LORA_RANK, LEARNING_RATE, EPOCHS))
-        conn.commit()
         return cur.fetchone()["id"]
 
 
-def complete_run(run_id: int, train_loss: float, adapter_path: str, duration: int):
+def start_run(sample_ids: list[int]) -> int:
+    """Create the run and queue its samples in ONE transaction — a crash in
+    between can no longer leave a 'running' run with no samples."""
+    with transaction() as cur:
+        run_id = create_run(len(sample_ids), cur)
+        mark_samples_queued(sample_ids, run_id, cur)
+        return run_id
+
+
+def complete_run(run_id: int, train_loss: float, adapter_path: str, duration: int, cur=None):
     """Mark a training run as completed."""
-    with get_conn() as conn, conn.cursor() as cur:
+    with _cursor(cur) as cur:
         cur.execute("""
             UPDATE training_runs
             SET status = 'completed',
@@ -147,12 +286,11 @@ def complete_run(run_id: int, train_loss: float, adapter_path: str, duration: in
                 completed_at = NOW()
             WHERE id = %s
         """, (train_loss, adapter_path, duration, run_id))
-        conn.commit()
 
 
 def fail_run(run_id: int, error: str):
-    """Mark a training run as failed with error details."""
-    with get_conn() as conn, conn.cursor() as cur:
+    """Mark a training run as failed and release its samples, in one transaction."""
+    with transaction() as cur:
         cur.execute("""
             UPDATE training_runs
             SET status = 'failed',
@@ -160,19 +298,17 @@ def fail_run(run_id: int, error: str):
                 completed_at = NOW()
             WHERE id = %s
         """, (str(error)[:4000], run_id))
-        conn.commit()
         # Release queued samples back to rated
         cur.execute("""
             UPDATE training_samples
             SET status = 'rated', training_run_id = NULL
             WHERE training_run_id = %s AND status = 'queued'
         """, (run_id,))
-        conn.commit()
 
 
-def register_model_version(run_id: int, adapter_path: str, train_loss: float) -> str:
+def register_model_version(run_id: int, adapter_path: str, train_loss: float, cur=None) -> str:
     """Register a new model version. Returns the version string."""
-    with get_conn() as conn, conn.cursor() as cur:
+    with _cursor(cur) as cur:
         # Get next version number
         cur.execute("SELECT COUNT(*) as cnt FROM model_versions")
         count = cur.fetchone()["cnt"]
@@ -183,15 +319,124 @@ def register_model_version(run_id: int, adapter_path: str, train_loss: float) ->
                 (run_id, version, base_model, adapter_path, eval_score)
             VALUES (%s, %s, %s, %s, %s)
         """, (run_id, version, BASE_MODEL, adapter_path, train_loss))
-        conn.commit()
         return version
 
 
+def finish_run(run_id: int, train_loss: float, adapter_path: str, duration: int) -> str:
+    """Complete the run, mark its samples trained and register the model version
+    in ONE transaction. Returns the version string."""
+    with transaction() as cur:
+        complete_run(run_id, train_loss, adapter_path, duration, cur)
+        mark_samples_trained(run_id, cur)
+        return register_model_version(run_id, adapter_path, train_loss, cur)
+
+
+# ─── Sample Notifications ─────────────────────────────────────
+
+class SampleListener:
+    """
+    LISTENs for the NOTIFYs raised by src/lib/migrations/
+    2026-07-11_training_samples_notify.sql when a sample is inserted or its
+    rating / tests_pass / status changes, so the main loop sleeps until there
+    is something new instead of re-querying on a timer.
+
+    Uses its own autocommit connection (a pooled one would lose the LISTEN on
+    its next rollback). Call connect() BEFORE checking the samples: a NOTIFY is
+    only delivered to sessions already listening, so one raised between the
+    check and the LISTEN would be lost until the fallback poll. A dropped
+    connection (noticed by connect() or mid-wait) is closed and wait() returns
+    at once, so the caller reconnects and re-counts; when it cannot be reopened,
+    wait() sleeps at most `retry` seconds (not the whole timeout) before the
+    next connect() tries again.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, channel: str = NOTIFY_CHANNEL,
+                 debounce: float = NOTIFY_DEBOUNCE, retry: float = LISTEN_RETRY, **kwargs):
+        self.dsn = dsn or LISTEN_URL
+        self.channel = channel
+        self.debounce = debounce
+        self.retry = retry
+        self.kwargs = kwargs
+        self.conn = None
+
+    def connect(self) -> bool:
+        """Open the connection and LISTEN, unless already listening. True when listening.
+        An open connection is pinged with SELECT 1 first, as pooled ones are on
+        checkout: a server-side drop (e.g. during a long training run) leaves
+        `closed` unset until the next round trip."""
+        if self.conn is not None and not self.conn.closed:
+            try:
+                with self.conn.cursor() as cur:  # also reads pending NOTIFYs; _poll sees them
+                    cur.execute("SELECT 1")
+                return True
+            except (psycopg2.Error, OSError) as e:
+                log.warning(f"LISTEN connection lost ({e}); reconnecting")
+                self.close()
+        try:
+            self.conn = psycopg2.connect(self.dsn, **self.kwargs)
+            self.conn.autocommit = True
+            with self.conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self.channel}"')
+            log.info(f"Listening for NOTIFY on '{self.channel}'")
+            return True
+        except psycopg2.Error as e:
+            log.warning(f"LISTEN unavailable ({e}); falling back to polling")
+            self.close()
+            return False
+
+    def _poll(self, timeout: float) -> bool:
+        """Block up to `timeout` seconds; True if any notification arrived."""
+        if self.conn.notifies:  # already read by connect()'s ping
+            self.conn.notifies.clear()
+            return True
+        if select.select([self.conn], [], [], max(0.0, timeout)) == ([], [], []):
+            return False
+        self.conn.poll()
+        got = bool(self.conn.notifies)
+        self.conn.notifies.clear()
+        return got
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Sleep until samples change or `timeout` seconds pass. Returns True when
+        woken by a notification. A burst of them (a batch of ratings) is
+        coalesced: after the first, keep draining until `debounce` seconds go
+        by quietly, so the caller re-checks once.
+        """
+        before = self.conn
+        if not self.connect():
+            time.sleep(min(timeout, self.retry))
+            return False
+        if before is not None and self.conn is not before:
+            return False  # it had dropped: NOTIFYs may be lost, so the caller re-counts
+        deadline = time.monotonic() + timeout
+        try:
+            if not self._poll(timeout):
+                return False
+            while time.monotonic() < deadline and self._poll(min(self.debounce, deadline - time.monotonic())):
+                pass
+            return True
+        except (psycopg2.Error, OSError) as e:
+            log.warning(f"LISTEN connection lost ({e}); will reconnect")
+            self.close()  # return now: the caller reconnects and re-counts
+            return False
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except psycopg2.Error:
+                pass
+            self.conn = None
+
+
 # ─── Dataset Builder ──────────────────────────────────────────
 
-def build_dataset(samples: list[dict]):
+def build_dataset(samples: Iterable[dict], ids: Optional[list[int]] = None):
     """
-    Convert database rows to a HuggingFace Dataset in ChatML format.
+    Convert database rows (any iterable, e.g. stream_unprocessed_samples) to a
+    HuggingFace Dataset in ChatML format. Each row's id is appended to `ids`
+    when given, so the caller can queue exactly the rows that were used.
 
     ChatML template (used by Qwen models):
       <|im_start|>system\n...<|im_end|>
@@ -202,6 +447,8 @@ def build_dataset(samples: list[dict]):
 
     conversations = []
     for s in samples:
+        if ids is not None:
+            ids.append(s["id"])
         ctx = s.get("input_context") or ""
         instruction = s["instruction"]
         if ctx:
@@ -234,6 +481,7 @@ def run_training(dataset, run_id: int) -> tuple[float, str, int]:
         BitsAndBytesConfig,
         TrainingArguments,
     )
+    import torch
     from peft import LoraConfig, get_peft_model, prepare_model_for_kbit_training
     from trl import SFTTrainer
 
@@ -364,6 +612,12 @@ def export_adapter(adapter_path: str, run_id: int):
 # ─── Main Loop ────────────────────────────────────────────────
 
 def main():
+    if not DB_URL:
+        print("ERROR: DATABASE_URL environment variable is required", file=sys.stderr)
+        sys.exit(1)
+
+    import torch
+
     ADAPTER_DIR.mkdir(parents=True, exist_ok=True)
     EXPORT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -374,7 +628,7 @@ def main():
     log.info(f"Adapter dir:     {ADAPTER_DIR}")
     log.info(f"Min samples:     {MIN_SAMPLES}")
     log.info(f"Rating threshold: {RATING_THRESHOLD}")
-    log.info(f"Poll interval:   {POLL_INTERVAL}s")
+    log.info(f"Poll interval:   {POLL_INTERVAL}s (fallback; woken by NOTIFY {NOTIFY_CHANNEL})")
     log.info(f"LoRA rank:       {LORA_RANK}")
     log.info(f"Max seq length:  {MAX_SEQ_LENGTH}")
 
@@ -386,7 +640,8 @@ def main():
 
     # Verify DB connection
     try:
-        with get_conn() as conn, conn.cursor() as cur:
+        init_pool()
+        with transaction() as cur:
             cur.execute("SELECT COUNT(*) as cnt FROM training_samples")
             total = cur.fetchone()["cnt"]
             log.info(f"DB connected. {total} total training samples in database.")
@@ -394,38 +649,38 @@ def main():
         log.error(f"Cannot connect to database: {e}")
         sys.exit(1)
 
-    # Main polling loop
+    # Main loop: a cheap bounded COUNT decides whether there is enough to train
+    # on; if not, sleep until a NOTIFY (or the fallback poll interval).
+    listener = SampleListener()
     while True:
         run_id: Optional[int] = None
         try:
-            samples = fetch_unprocessed_samples()
-            log.info(f"Found {len(samples)} eligible samples (threshold: {MIN_SAMPLES})")
-
-            if len(samples) < MIN_SAMPLES:
-                log.info(f"Waiting for more data ({len(samples)}/{MIN_SAMPLES})...")
-                time.sleep(POLL_INTERVAL)
+            listener.connect()  # LISTEN before counting, or a NOTIFY in between is missed
+            eligible = count_eligible_samples(limit=MIN_SAMPLES)
+            if eligible < MIN_SAMPLES:
+                log.info(f"Waiting for more data ({eligible}/{MIN_SAMPLES})...")
+                listener.wait(POLL_INTERVAL)
                 continue
 
-            # Create training run record
-            run_id = create_run(len(samples))
-            sample_ids = [s["id"] for s in samples]
-            mark_samples_queued(sample_ids, run_id)
+            # Build dataset straight off the server-side cursor
+            sample_ids: list[int] = []
+            dataset = build_dataset(stream_unprocessed_samples(), sample_ids)
+            log.info(f"Found {len(sample_ids)} eligible samples (threshold: {MIN_SAMPLES})")
+            if len(sample_ids) < MIN_SAMPLES:  # claimed elsewhere since the count
+                listener.wait(POLL_INTERVAL)
+                continue
 
-            log.info(f"Run {run_id}: training on {len(samples)} samples")
+            # Create training run record + queue its samples (one transaction)
+            run_id = start_run(sample_ids)
 
-            # Build dataset
-            dataset = build_dataset(samples)
+            log.info(f"Run {run_id}: training on {len(sample_ids)} samples")
             log.info(f"Dataset built: {len(dataset)} conversations")
 
             # Train
             train_loss, adapter_path, duration = run_training(dataset, run_id)
 
-            # Update DB
-            complete_run(run_id, train_loss, adapter_path, duration)
-            mark_samples_trained(run_id)
-
-            # Register model version
-            version = register_model_version(run_id, adapter_path, train_loss)
+            # Complete run, mark samples trained, register version (one transaction)
+            version = finish_run(run_id, train_loss, adapter_path, duration)
             log.info(f"Registered model version {version}")
 
             # Export to Mac
@@ -435,6 +690,8 @@ def main():
 
         except KeyboardInterrupt:
             log.info("Interrupted — shutting down")
+            listener.close()
+            close_pool()
             break
         except Exception as e:
             log.error(f"Training cycle failed: {e}", exc_info=True)
@@ -443,8 +700,7 @@ def main():
                     fail_run(run_id, str(e))
                 except Exception:
                     pass
-
-        time.sleep(POLL_INTERVAL)
+            time.sleep(RETRY_DELAY)
 
 
 if __name__ == "__main__":
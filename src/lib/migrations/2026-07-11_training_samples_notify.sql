@@ -0,0 +1,51 @@
+-- ============================================================================
+-- 2026-07-11: NOTIFY training_samples on insert / rating change
+-- ============================================================================
+-- The Jetson trainer (scripts/jetson/trainer.py) used to re-run its full
+-- eligibility SELECT over training_samples every 5 minutes, whether or not
+-- anything had changed, and noticed new samples up to 5 minutes late. It now
+-- LISTENs on `training_samples` and only re-checks (a bounded COUNT) when
+-- woken; a slow poll remains as the fallback for missed notifications.
+--
+-- The channel name is fixed: trainer.py's NOTIFY_CHANNEL listens on exactly
+-- 'training_samples', so rename both together. The payload is just TG_OP.
+-- Postgres folds identical notifications raised in one transaction into one,
+-- so a bulk insert of 500 samples wakes the trainer once, not 500 times. The
+-- UPDATE trigger is guarded like the search-outbox ones (2026-07-03d): `UPDATE
+-- OF` the columns eligibility depends on, AND a
+-- `WHEN (... IS DISTINCT FROM ...)` so writes to other columns and no-op
+-- re-saves stay silent. The trainer's own queued/trained status writes do
+-- wake it once per transaction, which costs one bounded COUNT.
+--
+-- SAFETY: Additive only — one function, two AFTER triggers, no table changes.
+-- pg_notify is transactional: rolled-back writes notify nobody.
+--
+-- ROLLBACK:
+--   DROP TRIGGER IF EXISTS trg_notify_training_samples_ins ON training_samples;
+--   DROP TRIGGER IF EXISTS trg_notify_training_samples_upd ON training_samples;
+--   DROP FUNCTION IF EXISTS fn_notify_training_samples();
+-- VERIFY:
+--   LISTEN training_samples;  -- then insert or rate a sample in another session
+--   \dS training_samples      — both triggers listed
+
+CREATE OR REPLACE FUNCTION fn_notify_training_samples()
+RETURNS TRIGGER LANGUAGE plpgsql AS $$
+BEGIN
+  PERFORM pg_notify('training_samples', TG_OP);
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_notify_training_samples_ins ON training_samples;
+CREATE TRIGGER trg_notify_training_samples_ins
+  AFTER INSERT ON training_samples
+  FOR EACH ROW EXECUTE FUNCTION fn_notify_training_samples();
+
+DROP TRIGGER IF EXISTS trg_notify_training_samples_upd ON training_samples;
+CREATE TRIGGER trg_notify_training_samples_upd
+  AFTER UPDATE OF rating, tests_pass, status ON training_samples
+  FOR EACH ROW
+  WHEN (OLD.rating     IS DISTINCT FROM NEW.rating
+     OR OLD.tests_pass IS DISTINCT FROM NEW.tests_pass
+     OR OLD.status     IS DISTINCT FROM NEW.status)
+  EXECUTE FUNCTION fn_notify_training_samples();
@@ -11,10 +11,22 @@ every photo on its own RTX 5070 Ti box instead of uploading to Google:
 It reuses what the box already loads: EasyOCR (the LabelIdentifier reader) for text
 and the DINOv2 index (the Engine) for product labels — no new model. `build_analysis`
 is kept pure (text + candidates in, dict out) so it unit-tests without torch/EasyOCR.
+
+The photo is decoded to RGB ONCE, then OCR and the DINOv2 identify run concurrently
+on the same pixels: both models release the GIL inside torch, so end-to-end latency
+is roughly max(ocr, embed) instead of their sum. `analyze_timed` also returns
+per-stage milliseconds so the overlap is visible (/analyze sends them as a
+Server-Timing header; the JSON body stays the cloud shape). Identify sees the frame
+as decoded, exactly like enrollment and Engine._prep (no EXIF transpose, no
+downscale), so sharing the decode can't move a ranking; the OCR path makes its own
+upright, <=2000px copy of its crop in LabelIdentifier.prepare.
 """
 from __future__ import annotations
 
+import contextvars
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Mirror src/lib/photos/analyze-types.ts DAMAGE_KEYWORDS so "damaged" means the same
 # thing on the local path as on the cloud path.
@@ -70,24 +82,52 @@ def build_analysis(raw_text: str, candidate_labels: list[str]) -> dict:
     }
 
 
+def decode_once(image):
+    """RGB PIL image, fully decoded so both model threads share the pixels instead of
+    each decoding / converting its own. Kept in the frame as decoded (EXIF tags and
+    all): that is what enrollment embeds and what detector boxes refer to."""
+    from PIL import Image
+
+    if not isinstance(image, Image.Image):
+        return image  # already prepared (or a test double)
+    im = image.convert("RGB") if image.mode != "RGB" else image
+    im.load()
+    return im
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
 class PhotoAnalyzer:
     """Wires the box's OCR reader + DINOv2 engine into build_analysis.
 
     `engine` is the shared Engine (DINOv2 index); `label_identifier` is the shared
     LabelIdentifier (EasyOCR). Both are already loaded by the server — we just reuse
-    them. `top_labels` keeps only confident SKU candidates as labels.
+    them. `top_labels` keeps only confident SKU candidates as labels. OCR runs on a
+    small shared pool while identify runs on the calling thread. With the detector on,
+    the product box is found once and both models read the same crop.
     """
 
-    def __init__(self, engine, label_identifier, *, min_score: float = 0.4, top_labels: int = 5) -> None:
+    def __init__(
+        self, engine, label_identifier, *, min_score: float = 0.4, top_labels: int = 5, workers: int = 2
+    ) -> None:
         self._engine = engine
         self._labeler = label_identifier
         self._min_score = min_score
         self._top_labels = top_labels
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="analyze-ocr")
+
+    def _locate(self, image):
+        try:
+            return self._engine.locate(image)
+        except Exception:  # noqa: BLE001 — no box just means full-frame reads
+            return None
 
-    def _candidate_labels(self, image) -> list[str]:
+    def _candidate_labels(self, image, box=None, shard=None) -> list[str]:
         # Engine.identify -> [{sku, score}]; keep the confident ones as labels.
         try:
-            ranked = self._engine.identify(image)
+            ranked = self._engine.identify(image, box=box, shard=shard)
         except Exception:  # noqa: BLE001 — an empty/unbuilt index must not fail analysis
             return []
         out: list[str] = []
@@ -96,10 +136,40 @@ class PhotoAnalyzer:
                 out.append(str(c["sku"]))
         return out
 
-    def analyze(self, image) -> dict:
-        raw_text = ""
+    def _ocr(self, image, box=None) -> tuple[str, float]:
+        t0 = time.perf_counter()
         try:
-            raw_text = self._labeler.read_text(image)
+            raw_text = self._labeler.read_text(image, box=box)
         except Exception:  # noqa: BLE001 — OCR failure degrades to label-only metadata
             raw_text = ""
-        return build_analysis(raw_text, self._candidate_labels(image))
+        return raw_text, _ms(t0)
+
+    def analyze_timed(self, image, shard=None) -> tuple[dict, dict]:
+        """-> (build_analysis metadata, {decode_ms, detect_ms, ocr_ms, embed_ms,
+        total_ms, overlap_ms}). overlap_ms is how much of the two model stages ran at
+        once. `shard` is the tenant catalog labels come from (None = global)."""
+        t0 = time.perf_counter()
+        image = decode_once(image)
+        decode_ms = _ms(t0)
+        td = time.perf_counter()
+        box = self._locate(image)
+        detect_ms = _ms(td)
+        # in a copy of this context so the OCR's model_spans land in this request's profile
+        ocr = self._pool.submit(contextvars.copy_context().run, self._ocr, image, box)
+        t1 = time.perf_counter()
+        labels = self._candidate_labels(image, box, shard)
+        embed_ms = _ms(t1)
+        raw_text, ocr_ms = ocr.result()
+        models_ms = _ms(t1)
+        timing = {
+            "decode_ms": decode_ms,
+            "detect_ms": detect_ms,
+            "ocr_ms": ocr_ms,
+            "embed_ms": embed_ms,
+            "total_ms": _ms(t0),
+            "overlap_ms": round(max(0.0, ocr_ms + embed_ms - models_ms), 1),
+        }
+        return build_analysis(raw_text, labels), timing
+
+    def analyze(self, image, shard=None) -> dict:
+        return self.analyze_timed(image, shard)[0]
@@ -0,0 +1,245 @@
+"""Parallel, batched, resumable folder enroll (Engine.enroll_dir, scripts/enroll_folder.py).
+
+Enrolling a reference tree one photo at a time leaves the GPU idle while a JPEG
+decodes, and saved only at the very end — a crash at image 9,000 lost all of it.
+Here:
+
+    root/<sku>/*.jpg -> [decode workers: open + RGB]  -> prefetch bounded by count
+                                                         and by decoded bytes, in order
+                     -> batches of --batch -> Engine.enroll_batch (one detector pass,
+                        one embedder pass) -> index
+                     -> every --checkpoint photos: save the index, then the manifest
+
+  * With a `state_dir`, the manifest (manifest.json) lists every photo already in the
+    index, by path relative to root plus size + mtime; a rerun skips those, so an
+    interrupted enroll resumes at its last checkpoint. It is deleted once the run
+    completes, so enrolling the same folder again later starts over (as before).
+  * Unreadable photos and failed batches don't stop the run: each is recorded with
+    its stage and error in errors.json (kept after the run) instead of a bare print.
+  * A progress line shows photos done / total and photos per second.
+
+Without a state_dir (e.g. /reindex, which starts from an empty index anyway) it is
+the same pipeline with a single save at the end.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from .config import settings
+
+IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def list_photos(root: Path) -> list[tuple[str, Path]]:
+    """(sku, path) for root/<sku>/<image>, sorted; a root holding images directly is
+    one SKU folder named after itself."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    sku_dirs = [d for d in sorted(root.iterdir()) if d.is_dir()] or [root]
+    return [
+        (d.name, p) for d in sku_dirs for p in sorted(d.iterdir())
+        if p.is_file() and p.suffix.lower() in IMG_EXT
+    ]
+
+
+def _stamp(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_size}-{int(st.st_mtime)}"
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data, indent=1))
+    os.replace(tmp, path)
+
+
+def _rgb_bytes(path: Path) -> int:
+    """Decoded RGB size of a photo, from its header alone (0 if unreadable)."""
+    try:
+        with Image.open(path) as im:
+            w, h = im.size
+    except Exception:  # noqa: BLE001 — the decode worker reports it
+        return 0
+    return w * h * 3
+
+
+def _decode(path: Path) -> Image.Image:
+    with Image.open(path) as im:
+        return im.convert("RGB")
+
+
+class BulkEnroll:
+    """One enroll run into `shard` of `engine`.
+
+    `workers` decode threads run up to `prefetch` photos ahead of the embedder, and
+    no further than `prefetch_mb` of decoded pixels (phone photos are ~36 MB each
+    as RGB; a batch is always let through). Photos are kept at full resolution, as
+    /enroll and identify see them, so the vectors don't depend on the pipeline;
+    `batch` photos go through the models at once (default DETECTOR_BATCH, min 8);
+    with `state_dir` the index is saved and the manifest written every `checkpoint`
+    photos.
+    """
+
+    def __init__(
+        self,
+        engine,
+        shard,
+        *,
+        workers: int = 4,
+        batch: int | None = None,
+        prefetch: int = 64,
+        prefetch_mb: float = 512,
+        checkpoint: int = 500,
+        state_dir: Path | None = None,
+        log=sys.stdout,
+    ) -> None:
+        self.engine = engine
+        self.shard = shard
+        self.workers = max(1, workers)
+        self.batch = max(1, batch or max(8, settings.detector_batch))
+        self.prefetch = max(self.batch, prefetch)
+        self.prefetch_bytes = int(prefetch_mb * 2**20)
+        self.checkpoint = max(1, checkpoint)
+        self.state_dir = None if state_dir is None else Path(state_dir)
+        self.log = log
+        self.stats = {"photos": 0, "added": 0, "duplicates": 0, "resumed": 0, "errors": 0, "seconds": 0.0}
+        self.errors: list[dict] = []
+
+    # ---- state -------------------------------------------------------------
+    def _manifest_file(self) -> Path | None:
+        return None if self.state_dir is None else self.state_dir / "manifest.json"
+
+    def _load_manifest(self, root: Path) -> dict:
+        f = self._manifest_file()
+        if f is None or not f.exists():
+            return {}
+        data = json.loads(f.read_text())
+        if data.get("root") != str(root) or data.get("shard") != self.shard.key:
+            return {}
+        if data.get("vectors") != self.shard.index.size:
+            print(f"  ! index has {self.shard.index.size} vectors, the manifest expected "
+                  f"{data.get('vectors')} — resuming anyway", file=self.log)
+        return data
+
+    def _checkpoint(self, root: Path, done: dict[str, str], added: dict[str, int]) -> None:
+        self.engine.save(self.shard)
+        if self.state_dir is None:
+            return
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        _write_json(self._manifest_file(), {
+            "root": str(root), "shard": self.shard.key, "vectors": self.shard.index.size,
+            "added": added, "done": done, "errors": self.errors, "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        self._write_errors(root)
+
+    def _write_errors(self, root: Path) -> None:
+        if self.state_dir is None:
+            return
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        _write_json(self.state_dir / "errors.json", {"root": str(root), "errors": self.errors})
+
+    def _error(self, sku: str, path: Path, stage: str, exc: Exception) -> None:
+        self.stats["errors"] += 1
+        self.errors.append({"sku": sku, "path": str(path), "stage": stage,
+                            "error": f"{type(exc).__name__}: {exc}"})
+
+    # ---- run ---------------------------------------------------------------
+    def _embed(self, chunk: list[tuple[str, Path, Image.Image]]) -> list[int | None]:
+        """Rows added per photo; None where the photo failed."""
+        items = [(sku, im) for sku, _, im in chunk]
+        try:
+            return self.engine.enroll_batch(items, self.shard)
+        except Exception:  # noqa: BLE001 — retry one by one so one bad photo costs only itself
+            out: list[int | None] = []
+            for (sku, path, im) in chunk:
+                try:
+                    out.extend(self.engine.enroll_batch([(sku, im)], self.shard))
+                except Exception as exc:  # noqa: BLE001
+                    self._error(sku, path, "embed", exc)
+                    out.append(None)
+            return out
+
+    def run(self, root: Path) -> dict[str, int]:
+        """Enroll every photo under `root` not already done. -> {sku: rows added}
+        (including rows added before a resume)."""
+        root = Path(root).resolve()
+        manifest = self._load_manifest(root)
+        done: dict[str, str] = dict(manifest.get("done", {}))
+        added: dict[str, int] = dict(manifest.get("added", {}))
+        self.errors = list(manifest.get("errors", []))  # failed photos count as done
+        photos = list_photos(root)
+        todo = [(sku, p) for sku, p in photos if done.get(str(p.relative_to(root))) != _stamp(p)]
+        self.stats["resumed"] = len(photos) - len(todo)
+        self.stats["errors"] = len(self.errors)
+        if self.stats["resumed"]:
+            print(f"  resuming: {self.stats['resumed']} photo(s) already enrolled", file=self.log)
+
+        t0 = time.perf_counter()
+        since_checkpoint = 0
+        pending: deque = deque()
+        queued = 0  # decoded bytes held by `pending`
+        queue = iter(todo)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="enroll-decode") as pool:
+            while True:
+                while len(pending) < self.prefetch and (queued < self.prefetch_bytes or len(pending) < self.batch):
+                    nxt = next(queue, None)
+                    if nxt is None:
+                        break
+                    cost = _rgb_bytes(nxt[1])
+                    pending.append((*nxt, cost, pool.submit(_decode, nxt[1])))
+                    queued += cost
+                if not pending:
+                    break
+                chunk = []
+                finished = []
+                while pending and len(chunk) < self.batch:
+                    sku, path, cost, fut = pending.popleft()
+                    queued -= cost
+                    finished.append(path)
+                    try:
+                        chunk.append((sku, path, fut.result()))
+                    except Exception as exc:  # noqa: BLE001 — unreadable file: report, keep going
+                        self._error(sku, path, "decode", exc)
+                for (sku, _, _), n in zip(chunk, self._embed(chunk)):
+                    if n is None:
+                        continue
+                    if n:
+                        added[sku] = added.get(sku, 0) + n
+                        self.stats["added"] += n
+                    else:
+                        self.stats["duplicates"] += 1
+                for path in finished:
+                    done[str(path.relative_to(root))] = _stamp(path)
+                self.stats["photos"] += len(finished)
+                since_checkpoint += len(finished)
+                self.stats["seconds"] = time.perf_counter() - t0
+                self._progress(len(todo))
+                if since_checkpoint >= self.checkpoint and self.state_dir is not None:
+                    self._checkpoint(root, done, added)
+                    since_checkpoint = 0
+        self.engine.save(self.shard)
+        self._write_errors(root)
+        f = self._manifest_file()
+        if f is not None and f.exists():
+            f.unlink()
+        self.stats["seconds"] = time.perf_counter() - t0
+        self._progress(len(todo), final=True)
+        return added
+
+    def _progress(self, total: int, final: bool = False) -> None:
+        s = self.stats
+        rate = s["photos"] / s["seconds"] if s["seconds"] else 0.0
+        print(
+            f"  {s['photos']}/{total} photos  {rate:.1f} img/s  +{s['added']} vectors  "
+            f"{s['duplicates']} near-duplicate  {s['errors']} error(s)",
+            end="\n" if final else "\r", file=self.log, flush=True,
+        )
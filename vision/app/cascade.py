@@ -0,0 +1,177 @@
+"""Confidence-gated identify: DINOv2 first, label OCR only when the ranking is close.
+
+Receiving used to call /identify (embedding, tens of ms) and /identify-label (EasyOCR,
+several times that) as two round trips for every photo. Most photos are settled by
+the embedding alone — the top SKU clearly beats the runner-up. Only when the top-1 /
+top-2 score margin is under CASCADE_MARGIN (or the index has nothing to say) do we
+pay for OCR:
+
+    embed -> search -> margin >= threshold ?  -> "embed" path, done
+                                     no      ?  -> OCR the label (store-cached), score
+                                                   the text against enrolled product
+                                                   names (ocr_match) -> fuse -> "ocr" path
+
+The lexicon model read (label_ocr.classify) is reported alongside as `ocr.model`
+for the operator; it names a model code, not an enrolled SKU, so it doesn't feed
+`fuse`.
+
+`fuse` and `CascadeStats` are pure so they unit-test without torch/EasyOCR.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# A full model-code hit (ocr_match.STRONG = 10 points) adds 0.5 to a cosine score:
+# enough to overturn any near-tie the cascade sends to OCR, never a clear loser on
+# product-line words alone (4 points -> +0.2).
+OCR_POINT = 0.05
+
+
+def margin(candidates: list[dict]) -> float:
+    """Top-1 minus top-2 score; a lone candidate's margin is its own score, no
+    candidates at all is 0 (ambiguous by definition)."""
+    if not candidates:
+        return 0.0
+    top = float(candidates[0]["score"])
+    second = float(candidates[1]["score"]) if len(candidates) > 1 else 0.0
+    return round(top - second, 4)
+
+
+def fuse(candidates: list[dict], ocr_scores: dict[str, int], top_k: int) -> list[dict]:
+    """Embedding candidates + OCR points -> [{sku, score, ocr_score, fused}] desc by
+    fused. An OCR-confident SKU the embedding missed enters with score 0."""
+    rows = {c["sku"]: {"sku": c["sku"], "score": float(c["score"]), "ocr_score": 0} for c in candidates}
+    for sku, pts in ocr_scores.items():
+        rows.setdefault(sku, {"sku": sku, "score": 0.0, "ocr_score": 0})["ocr_score"] = int(pts)
+    for r in rows.values():
+        r["fused"] = round(r["score"] + OCR_POINT * r["ocr_score"], 4)
+    ranked = sorted(rows.values(), key=lambda r: (r["fused"], r["score"]), reverse=True)
+    return ranked[:top_k]
+
+
+class CascadeStats:
+    """Thread-safe counters + rolling latency windows per path ("embed" / "ocr")."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self._ms: dict[str, deque] = {}
+        self._counts: dict[str, int] = {}
+        self._window = window
+
+    def record(self, path: str, ms: float) -> None:
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+            self._ms.setdefault(path, deque(maxlen=self._window)).append(ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            total = sum(self._counts.values())
+            paths = {}
+            for path, n in sorted(self._counts.items()):
+                ms = np.asarray(self._ms[path], dtype="float64")
+                paths[path] = {
+                    "requests": n,
+                    "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                    "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                }
+            skipped = self._counts.get("embed", 0)
+        return {
+            "requests": total,
+            "ocr_skipped_rate": round(skipped / total, 4) if total else None,
+            "paths": paths,
+        }
+
+
+class IdentifyCascade:
+    """Embedding search, then label OCR + fusion only for ambiguous rankings.
+
+    `engine` is the shared Engine; `label_identifier` is a zero-arg callable returning
+    the shared LabelIdentifier, so EasyOCR still loads on first need, not at startup.
+    `names` maps SKU -> product name for ocr_match scoring.
+    """
+
+    def __init__(self, engine, label_identifier, names: dict[str, str], *, threshold: float, top_k: int = 5) -> None:
+        self._engine = engine
+        self._labeler = label_identifier
+        self._names = names
+        self.threshold = threshold
+        self.top_k = top_k
+        self.stats = CascadeStats()
+        # shard key -> ((id(index), index.version), OcrMatcher)
+        self._matchers: dict[str | None, tuple[tuple[int, int], object]] = {}
+        self._lock = threading.Lock()
+
+    def _ocr_matcher(self, shard=None):
+        """OcrMatcher over the shard's enrolled SKUs; rebuilt when the index changes
+        (checked by its version, not by re-listing its SKUs on every request)."""
+        from .ocr_match import OcrMatcher
+
+        index = self._engine.index if shard is None else shard.index
+        key = None if shard is None else shard.key
+        stamp = (id(index), index.version)
+        with self._lock:
+            cached = self._matchers.get(key)
+            if cached is None or cached[0] != stamp:
+                cached = self._matchers[key] = (stamp, OcrMatcher(index.skus, self._names))
+            return cached[1]
+
+    def identify(
+        self,
+        image,
+        *,
+        content_hash: str | None = None,
+        threshold: float | None = None,
+        skus: list[str] | None = None,
+        shard=None,
+    ) -> dict:
+        """-> {candidates, path, margin, threshold, box, ocr, embed_ms, ocr_ms, total_ms}.
+        `ocr` is None on the embed path, else {model, raw_text, matched_sku, cached}.
+        `box` is the detector's product box (None with the detector off); the
+        embedding and the OCR both read that one crop. `skus` is an allow-list for both
+        the embedding search (Engine.identify) and the OCR scores, so no SKU outside it
+        can win; `shard` is the tenant catalog (None = global)."""
+        from .label_ocr import classify, region_key
+
+        threshold = self.threshold if threshold is None else threshold
+        t0 = time.perf_counter()
+        box = self._engine.locate(image)
+        candidates = self._engine.identify(image, box=box, skus=skus, shard=shard)
+        embed_ms = (time.perf_counter() - t0) * 1000
+        gap = margin(candidates)
+        result = {
+            "candidates": candidates[: self.top_k],
+            "path": "embed",
+            "margin": gap,
+            "threshold": threshold,
+            "box": box,
+            "ocr": None,
+            "embed_ms": round(embed_ms, 1),
+            "ocr_ms": None,
+        }
+        if candidates and gap >= threshold:
+            result["total_ms"] = round(embed_ms, 1)
+            self.stats.record("embed", result["total_ms"])
+            return result
+
+        t1 = time.perf_counter()
+        li = self._labeler()
+        cached = li.lookup(region_key(content_hash, box)) is not None
+        text = li.read_text(image, content_hash=content_hash, box=box)
+        model, _ = classify(text, strict=True)
+        matcher = self._ocr_matcher(shard)
+        matched_sku, _, _ = matcher.predict(text, only=skus)
+        ranked = fuse(candidates, dict(matcher.score(text, only=skus)), self.top_k)
+        ocr_ms = (time.perf_counter() - t1) * 1000
+        result.update(
+            candidates=ranked,
+            path="ocr",
+            ocr={"model": model, "raw_text": text[:400], "matched_sku": matched_sku, "cached": cached},
+            ocr_ms=round(ocr_ms, 1),
+            total_ms=round((time.perf_counter() - t0) * 1000, 1),
+        )
+        self.stats.record("ocr", result["total_ms"])
+        return result
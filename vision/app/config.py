@@ -19,8 +19,63 @@ class Settings(BaseSettings):
     top_k: int = 5
     score_agg: str = "max"  # "max" | "mean"
 
+    # Low-res first pass: embed at this size (multiple of 14) against a matching index;
+    # escalate to full resolution only when the top-1/top-2 margin is under
+    # lowres_margin. 0 = off.
+    lowres_size: int = 0
+    lowres_margin: float = 0.08
+
+    # Per-tenant shards (X-Tenant / X-Brand headers): data/tenants/<tenant>[/<brand>]/,
+    # loaded on first use; at most this many stay resident (LRU).
+    tenant_dir: str = "data/tenants"
+    max_resident_shards: int = 8
+
+    # Keep an fp16 copy of the index on the GPU; scan + per-SKU top-k on device.
+    gpu_index: bool = False
+    gpu_index_headroom_mb: int = 1024  # VRAM left free for the models; else CPU search
+
     use_detector: bool = False
     detector_model: str = "yolo11n.pt"
+    detector_imgsz: int = 640  # YOLO input size; the frame is letterboxed to this
+    detector_half: bool = True  # fp16 inference on GPU (ignored on CPU)
+    detector_batch: int = 8  # images per detector pass when enrolling a folder
+
+    # /identify-label: recognize text regions largest-first, stop at a strict match.
+    ocr_progressive: bool = False
+    # Turn upside-down / sideways labels upright before recognition (one OCR pass).
+    ocr_auto_orient: bool = True
+    # Label-OCR lexicon entries (JSON, ordered specific-first).
+    lexicon_path: str = "app/lexicon.json"
+    # Persistent OCR results keyed by image content hash + OCR settings (SQLite).
+    ocr_cache: bool = True
+    ocr_store_path: str = "data/ocr_store.sqlite"
+    # Enroll skips a photo whose embedding is at least this cosine-similar to one the
+    # SKU already has (a burst of near-identical shots). 0 = keep everything.
+    enroll_dedup: float = 0.0
+    # /enroll warns when the SKU's best photo-to-photo cosine with another SKU reaches
+    # this (app/similarity.py) — a look-alike the label OCR will have to separate. 0 = off.
+    enroll_collision: float = 0.0
+    # Write the similarity matrix to disk at most this often (seconds); a restart
+    # recomputes whatever changed since the last write. 0 = after every change.
+    similarity_save_s: float = 60.0
+    # Slow-request profiling (app/profiling.py): profile this fraction of requests
+    # and keep the ones slower than PROFILE_SLOW_MS. 0 = off (X-Profile: 1 still works).
+    profile_slow_ms: int = 0
+    profile_sample_rate: float = 0.02
+    profile_interval_ms: float = 5.0
+    profile_dir: str = "data/profiles"
+    profile_keep: int = 50
+    # /identify-cascade: run label OCR only when top-1 minus top-2 score is below this.
+    cascade_margin: float = 0.05
+    # Allow-list identify (?skus= / ?session=): below this top score, search everything.
+    allowlist_min_score: float = 0.5
+    # Receiving sessions (POST /sessions) expire after this many idle seconds.
+    session_ttl: int = 4 * 3600
+    # /identify-live: inference threads shared by all sockets, the dHash distance (of
+    # 64 bits) under which a frame counts as unchanged, and the score EMA weight.
+    live_workers: int = 1
+    live_diff_bits: int = 4
+    live_alpha: float = 0.5
 
     reference_dir: str = "data/reference"
     index_path: str = "data/index/index.npz"
@@ -36,6 +91,39 @@ class Settings(BaseSettings):
     def index_file(self) -> Path:
         return (ROOT / self.index_path).resolve()
 
+    @property
+    def lowres_index_file(self) -> Path:
+        """index.npz -> index.r112.npz: built alongside the full-res index."""
+        f = self.index_file
+        return f.with_name(f"{f.stem}.r{self.lowres_size}{f.suffix}")
+
+    @property
+    def similarity_file(self) -> Path:
+        """index.npz -> index.similarity.npz: the SKU x SKU matrix (similarity.py)."""
+        f = self.index_file
+        return f.with_name(f"{f.stem}.similarity{f.suffix}")
+
+    @property
+    def tenants_path(self) -> Path:
+        return (ROOT / self.tenant_dir).resolve()
+
+    @property
+    def profile_path(self) -> Path:
+        return (ROOT / self.profile_dir).resolve()
+
+    @property
+    def data_path(self) -> Path:
+        """vision/data — dataset manifest (SKU -> product name) lives here."""
+        return (ROOT / "data").resolve()
+
+    @property
+    def lexicon_file(self) -> Path:
+        return (ROOT / self.lexicon_path).resolve()
+
+    @property
+    def ocr_store_file(self) -> Path:
+        return (ROOT / self.ocr_store_path).resolve()
+
     @property
     def origins(self) -> list[str]:
         return [o.strip() for o in self.allowed_origins.split(",") if o.strip()]
@@ -8,12 +8,52 @@ fine-tuned/open-vocab detector can be swapped in later.
 
 Disabled by default (USE_DETECTOR=0); v1 embeds the full frame and relies on the
 operator framing the product.
+
+Detection is its own pipeline stage: it runs once per frame (at DETECTOR_IMGSZ, half
+precision on GPU) and the box is handed to every consumer — the embedding crop, the
+label-OCR crop, and the response so the bench UI can draw it. Enrollment detects in
+batches. Boxes are (x1, y1, x2, y2) ints in the frame as decoded (before any EXIF
+transpose); crops pad them by 6%.
 """
 from __future__ import annotations
 
 from PIL import Image
 
 from .config import settings
+from .profiling import model_span
+
+Box = tuple[int, int, int, int]  # (x1, y1, x2, y2)
+
+_PAD = 0.06  # so we don't clip edges of the product
+
+
+def largest_box(xyxy) -> Box | None:
+    """Largest-area box from an (N, 4+) array of x1, y1, x2, y2 rows, or None."""
+    best = None
+    best_area = 0.0
+    for row in xyxy:
+        x1, y1, x2, y2 = (float(v) for v in row[:4])
+        area = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+        if area > best_area:
+            best_area = area
+            best = (int(x1), int(y1), int(x2), int(y2))
+    return best
+
+
+def padded(box: Box, size: tuple[int, int], pad: float = _PAD) -> Box:
+    """Grow `box` by `pad` of its width/height on each side, clamped to (w, h)."""
+    x1, y1, x2, y2 = box
+    w, h = size
+    px = int((x2 - x1) * pad)
+    py = int((y2 - y1) * pad)
+    return max(0, x1 - px), max(0, y1 - py), min(w, x2 + px), min(h, y2 + py)
+
+
+def crop(image: Image.Image, box: Box | None) -> Image.Image:
+    """Padded crop to `box`; the image unchanged when there is no box."""
+    if box is None:
+        return image
+    return image.crop(padded(box, image.size))
 
 
 class Detector:
@@ -21,30 +61,28 @@ class Detector:
         from ultralytics import YOLO  # imported lazily so it's optional
 
         self.model = YOLO(settings.detector_model)
+        self.imgsz = settings.detector_imgsz
+        self.half = settings.detector_half  # ultralytics ignores it on CPU
+
+    def detect_batch(self, images: list[Image.Image]) -> list[Box]:
+        """Largest box per image, one batched forward pass. An image with no
+        detection gets its full frame, so callers always have a box to report."""
+        rgbs = [im.convert("RGB") for im in images]
+        if not rgbs:
+            return []
+        with model_span("detect"):
+            results = self.model.predict(rgbs, imgsz=self.imgsz, half=self.half, verbose=False)
+        out: list[Box] = []
+        for rgb, r in zip(rgbs, results):
+            boxes = getattr(r, "boxes", None)
+            box = largest_box(boxes.xyxy.cpu().numpy()) if boxes is not None else None
+            out.append(box or (0, 0, *rgb.size))
+        return out
+
+    def detect(self, image: Image.Image) -> Box:
+        return self.detect_batch([image])[0]
 
     def crop_largest(self, image: Image.Image) -> Image.Image:
         """Return the largest detected box, or the original image if none."""
         rgb = image.convert("RGB")
-        results = self.model.predict(rgb, verbose=False)
-        best = None
-        best_area = 0.0
-        for r in results:
-            boxes = getattr(r, "boxes", None)
-            if boxes is None:
-                continue
-            for xyxy in boxes.xyxy.cpu().numpy():
-                x1, y1, x2, y2 = xyxy[:4]
-                area = max(0.0, x2 - x1) * max(0.0, y2 - y1)
-                if area > best_area:
-                    best_area = area
-                    best = (int(x1), int(y1), int(x2), int(y2))
-        if best is None:
-            return rgb
-        # Pad the box ~6% so we don't clip edges of the product.
-        x1, y1, x2, y2 = best
-        w, h = rgb.size
-        px = int((x2 - x1) * 0.06)
-        py = int((y2 - y1) * 0.06)
-        return rgb.crop(
-            (max(0, x1 - px), max(0, y1 - py), min(w, x2 + px), min(h, y2 + py))
-        )
+        return crop(rgb, self.detect(rgb))
@@ -13,6 +13,7 @@ from PIL import Image
 from transformers import AutoImageProcessor, AutoModel
 
 from .config import settings
+from .profiling import model_span
 
 
 def _resolve_device(pref: str) -> str:
@@ -47,14 +48,52 @@ class Embedder:
         return int(self.model.config.hidden_size)
 
     @torch.no_grad()
-    def embed(self, image: Image.Image) -> np.ndarray:
-        """One PIL image -> (dim,) float32 unit vector."""
-        inputs = self.processor(images=image.convert("RGB"), return_tensors="pt").to(self.device)
-        out = self.model(**inputs)
+    def embed(self, image: Image.Image, size: int | None = None) -> np.ndarray:
+        """One PIL image -> (dim,) float32 unit vector.
+
+        `size` overrides the processor's resize + center crop (e.g. 112 instead of
+        224: a quarter of the patch tokens). DINOv2 interpolates its position
+        embeddings, so any multiple of the 14px patch works; vectors are only
+        comparable with vectors embedded at the same size.
+        """
+        return self.embed_tensor(image, size).cpu().numpy()
+
+    @torch.no_grad()
+    def embed_batch(self, images: list[Image.Image], size: int | None = None) -> np.ndarray:
+        """N PIL images -> (N, dim) float32 unit vectors in ONE forward pass."""
+        if not images:
+            return np.zeros((0, self.dim), dtype="float32")
+        inputs = self.processor(
+            images=[im.convert("RGB") for im in images], return_tensors="pt", **self._size_kwargs(size)
+        ).to(self.device)
+        with model_span("embed_batch"):
+            out = self.model(**inputs)
+        feats = getattr(out, "pooler_output", None)
+        if feats is None:
+            feats = out.last_hidden_state.mean(dim=1)
+        feats = feats.float()
+        norms = torch.linalg.vector_norm(feats, dim=1, keepdim=True).clamp_min(1e-12)
+        return (feats / norms).cpu().numpy()
+
+    @staticmethod
+    def _size_kwargs(size: int | None) -> dict:
+        if not size:
+            return {}
+        return {"size": {"shortest_edge": size}, "crop_size": {"height": size, "width": size}}
+
+    @torch.no_grad()
+    def embed_tensor(self, image: Image.Image, size: int | None = None) -> torch.Tensor:
+        """Like embed(), but the (dim,) float32 unit vector stays on `self.device` —
+        for searching a device-resident index (gpu_index.DeviceIndex)."""
+        inputs = self.processor(
+            images=image.convert("RGB"), return_tensors="pt", **self._size_kwargs(size)
+        ).to(self.device)
+        with model_span("embed"):
+            out = self.model(**inputs)
         # pooler_output when present, else mean over patch tokens.
         feats = getattr(out, "pooler_output", None)
         if feats is None:
             feats = out.last_hidden_state.mean(dim=1)
-        vec = feats[0].float().cpu().numpy()
-        norm = np.linalg.norm(vec)
-        return (vec / norm).astype("float32") if norm > 0 else vec.astype("float32")
+        vec = feats[0].float()
+        norm = torch.linalg.vector_norm(vec)
+        return vec / norm if norm > 0 else vec
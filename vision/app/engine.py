@@ -1,86 +1,339 @@
 """Ties embedder + (optional) detector + index into the identify/enroll engine.
 
 Single shared instance, created at server startup (and reused by the CLI scripts).
+
+With LOWRES_SIZE set, enrollment also fills a second index embedded at that size and
+identify tries it first: most frames have one clearly dominant SKU, and a 112px pass
+is a quarter of the patch tokens. Only a low-margin result re-embeds at full size.
+
+With GPU_INDEX on (and a CUDA embedder), each index also gets an fp16 device mirror
+(gpu_index.py): the query embedding never leaves the GPU and only the top-k come back.
+The mirrors resync after enroll and fall back to the NumPy search when VRAM is tight.
+
+With ENROLL_DEDUP set, enroll skips photos that are near-duplicates of one the SKU
+already has; `condense` caps an existing index at K diverse photos per SKU.
+
+`similarity(shard)` is the SKU x SKU look-alike matrix (similarity.py), brought up to
+date incrementally on read; with ENROLL_COLLISION set, /enroll reports look-alikes.
+
+With USE_DETECTOR on, `locate` is the detection stage: callers run it once per frame
+and pass the box to identify (and to the OCR crop); enrollment detects in batches.
+
+Each catalog is a `Shard` (index + low-res index + mirrors). The global one comes from
+INDEX_PATH; per-tenant shards load on first use via `shard(tenant, brand)` and are
+LRU-bounded (shards.py). identify / enroll / reindex take `shard=` (None = global).
 """
 from __future__ import annotations
 
+import threading
+import time
+from contextlib import nullcontext
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 
 from .config import settings
-from .embedder import Embedder
+from .cascade import margin
+from .detector import Box, crop
 from .index import EmbeddingIndex
-
-_IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+from .shards import Shard, ShardManager, shard_key
+from .similarity import SkuSimilarity
 
 
 class Engine:
     def __init__(self) -> None:
+        from .embedder import Embedder  # torch; imported here so the server module loads without it
+
         self.embedder = Embedder()
-        self.index = EmbeddingIndex.load(settings.index_file, self.embedder.dim)
+        dim = self.embedder.dim
+        index = EmbeddingIndex.load(settings.index_file, dim)
+        lowres = EmbeddingIndex.load(settings.lowres_index_file, dim) if settings.lowres_size else None
+        self.default = self._attach(Shard("default", index, lowres, lowres_size=settings.lowres_size))
+        self.shards = ShardManager(self._load_shard, max_resident=settings.max_resident_shards)
+        self._sim_lock = threading.Lock()
         self.detector = None
         if settings.use_detector:
             from .detector import Detector
 
             self.detector = Detector()
 
-    def _prep(self, image: Image.Image) -> Image.Image:
-        if self.detector is not None:
-            return self.detector.crop_largest(image)
-        return image.convert("RGB")
+    # ---- shards ------------------------------------------------------------
+    @property
+    def index(self) -> EmbeddingIndex:
+        """The global index (requests without a tenant)."""
+        return self.default.index
+
+    @property
+    def lowres(self) -> EmbeddingIndex | None:
+        return self.default.lowres
+
+    def _attach(self, shard: Shard) -> Shard:
+        if shard.lowres is not None and shard.lowres.size != shard.index.size:
+            print(
+                f"  ! [{shard.key}] low-res index ({shard.lowres.size}) out of sync with index "
+                f"({shard.index.size}); full-res only until /reindex"
+            )
+        if settings.gpu_index and self.embedder.device == "cuda":
+            from .gpu_index import DeviceIndex
+
+            for name, idx in (("full", shard.index), ("low", shard.lowres)):
+                if idx is not None:
+                    shard.mirrors[name] = DeviceIndex(
+                        idx, self.embedder.device, headroom_mb=settings.gpu_index_headroom_mb
+                    )
+        return shard
+
+    def _load_shard(self, key: str) -> Shard:
+        root = settings.tenants_path / key
+        shard = Shard(key, EmbeddingIndex(self.embedder.dim), root=root, lowres_size=settings.lowres_size)
+        shard.index = EmbeddingIndex.load_dir(shard.index_dir, self.embedder.dim)
+        if settings.lowres_size:
+            shard.lowres = EmbeddingIndex.load_dir(shard.lowres_dir, self.embedder.dim)
+        return self._attach(shard)
+
+    def shard(self, tenant: str | None = None, brand: str | None = None) -> Shard:
+        """The shard for a tenant (+ brand), loading it if needed; the global one
+        for no tenant. Raises ValueError on an unsafe name. Long-lived holders use
+        `use_shard`, which also keeps it from being evicted."""
+        key = shard_key(tenant, brand)
+        return self.default if key is None else self.shards.get(key)
+
+    def use_shard(self, tenant: str | None = None, brand: str | None = None):
+        """Context manager over `shard(tenant, brand)` that keeps a tenant shard
+        resident until it exits. Raises ValueError (on the call) for an unsafe name."""
+        key = shard_key(tenant, brand)
+        return nullcontext(self.default) if key is None else self.shards.use(key)
+
+    def locate(self, image: Image.Image) -> Box | None:
+        """Detection stage: the product box in `image`, or None with the detector off."""
+        return self.detector.detect(image) if self.detector is not None else None
+
+    def _prep(self, image: Image.Image, box: Box | None = None) -> Image.Image:
+        rgb = image.convert("RGB")
+        if self.detector is None:
+            return rgb
+        return crop(rgb, box if box is not None else self.detector.detect(rgb))
+
+    def _prep_batch(self, images: list[Image.Image]) -> list[Image.Image]:
+        """_prep for many images with ONE detector pass (per-image detection if the
+        batched pass fails)."""
+        boxes: list[Box | None] = [None] * len(images)
+        if self.detector is not None and images:
+            try:
+                boxes = self.detector.detect_batch(images)
+            except Exception as exc:  # noqa: BLE001
+                print(f"  ! batch detect failed ({exc}); detecting one by one")
+        return [self._prep(im, box) for im, box in zip(images, boxes)]
+
+    def embed_images(self, images: list[Image.Image], size: int | None = None) -> np.ndarray:
+        """(N, dim) vectors through identify's preprocessing (detector crop when on):
+        one batched detector pass and one embedder forward pass — for offline evals."""
+        return self.embedder.embed_batch(self._prep_batch(images), size)
 
     # ---- identify ----------------------------------------------------------
-    def identify(self, image: Image.Image) -> list[dict]:
-        vec = self.embedder.embed(self._prep(image))
-        return self.index.search(vec, settings.top_k, settings.score_agg)
+    def identify(
+        self,
+        image: Image.Image,
+        box: Box | None = None,
+        skus: list[str] | None = None,
+        shard: Shard | None = None,
+    ) -> list[dict]:
+        return self.identify_ranked(image, box=box, skus=skus, shard=shard)[0]
+
+    def identify_ranked(
+        self,
+        image: Image.Image,
+        *,
+        lowres: bool = True,
+        box: Box | None = None,
+        skus: list[str] | None = None,
+        shard: Shard | None = None,
+    ) -> tuple[list[dict], dict]:
+        """-> (candidates, {resolution: "low"|"full", scope: "all"|"allowlist"|"fallback"}).
+
+        `box` is a detection from `locate` on this image; without one the detector
+        (when enabled) runs here. `skus` is an allow-list (e.g. a receiving session's
+        expected SKUs): only their vectors are scanned, and if none of them reaches
+        ALLOWLIST_MIN_SCORE the whole catalog is searched instead ("fallback").
+        `shard` picks the catalog (default: the global one)."""
+        shard = shard or self.default
+        t0 = time.perf_counter()
+        prepped = self._prep(image, box)
+        candidates, info = None, None
+        if lowres and shard.lowres_ready():
+            candidates, scope = self._search(shard, prepped, "low", skus)
+            if margin(candidates) >= settings.lowres_margin:
+                info = {"resolution": "low", "scope": scope}
+        if info is None:
+            candidates, scope = self._search(shard, prepped, "full", skus)
+            info = {"resolution": "full", "scope": scope}
+        shard.stats.record((time.perf_counter() - t0) * 1000)
+        return candidates, info
+
+    def _search(
+        self, shard: Shard, prepped: Image.Image, which: str, skus: list[str] | None
+    ) -> tuple[list[dict], str]:
+        """Embed at `which` resolution and search that index — on its device mirror
+        when one is ready, else in NumPy — applying the allow-list fallback."""
+        index, size = (shard.lowres, settings.lowres_size) if which == "low" else (shard.index, None)
+        mirror = shard.mirrors.get(which)
+        if mirror is not None and mirror.sync():
+            q = self.embedder.embed_tensor(prepped, size)
+
+            def search(allowed=None):
+                return mirror.search(q, settings.top_k, settings.score_agg, skus=allowed)
+        else:
+            vec = self.embedder.embed(prepped, size)
+
+            def search(allowed=None):
+                return index.search(vec, settings.top_k, settings.score_agg, skus=allowed)
+
+        if skus is None:
+            return search(), "all"
+        hits = search(skus)
+        if hits and hits[0]["score"] >= settings.allowlist_min_score:
+            return hits, "allowlist"
+        return search(), "fallback"
 
     # ---- enroll ------------------------------------------------------------
-    def enroll_image(self, sku: str, image: Image.Image) -> int:
-        vec = self.embedder.embed(self._prep(image))
-        n = self.index.add(sku, vec)
-        self.index.save(settings.index_file)
+    def _add(self, shard: Shard, sku: str, prepped: Image.Image) -> int:
+        # Embed both before touching either index so a failure can't desync them.
+        vec = self.embedder.embed(prepped)
+        if settings.enroll_dedup and shard.index.near_duplicate(sku, vec, settings.enroll_dedup):
+            return 0
+        low = self.embedder.embed(prepped, settings.lowres_size) if shard.lowres is not None else None
+        n = shard.index.add(sku, vec)
+        if low is not None:
+            shard.lowres.add(sku, low)
         return n
 
-    def enroll_dir(self, root: Path) -> dict:
-        """Enroll every image under root/<sku>/*.jpg. Returns {sku: count}."""
-        root = Path(root)
-        added: dict[str, int] = {}
-        # If root itself is a single SKU folder (has images directly), enroll just it.
-        sku_dirs = [d for d in sorted(root.iterdir()) if d.is_dir()] if root.is_dir() else []
-        if not sku_dirs and root.is_dir():
-            sku_dirs = [root]
-        for sku_dir in sku_dirs:
-            sku = sku_dir.name
-            count = 0
-            for img_path in sorted(sku_dir.iterdir()):
-                if img_path.suffix.lower() not in _IMG_EXT:
-                    continue
-                try:
-                    with Image.open(img_path) as im:
-                        vec = self.embedder.embed(self._prep(im))
-                    self.index.add(sku, vec)
-                    count += 1
-                except Exception as exc:  # noqa: BLE001 — skip unreadable files, keep going
-                    print(f"  ! skip {img_path.name}: {exc}")
-            if count:
-                added[sku] = count
-                print(f"  + {sku}: {count} image(s)")
-        self.index.save(settings.index_file)
+    def save(self, shard: Shard | None = None) -> None:
+        """Write the shard's index (and low-res index) to disk. Enroll paths that
+        batch their adds (BulkEnroll) call this at their checkpoints."""
+        shard = shard or self.default
+        if shard.root is None:  # the global index keeps its .npz files
+            shard.index.save(settings.index_file)
+            if shard.lowres is not None:
+                shard.lowres.save(settings.lowres_index_file)
+            return
+        shard.index.save_dir(shard.index_dir)
+        if shard.lowres is not None:
+            shard.lowres.save_dir(shard.lowres_dir)
+
+    def enroll_image(self, sku: str, image: Image.Image, shard: Shard | None = None) -> int:
+        shard = shard or self.default
+        n = self._add(shard, sku, self._prep(image))
+        if n:
+            self.save(shard)
+        return n
+
+    def enroll_batch(self, items: list[tuple[str, Image.Image]], shard: Shard | None = None) -> list[int]:
+        """Add decoded (sku, photo) pairs with one detector pass and one embedder pass
+        (plus one at LOWRES_SIZE). Doesn't save. -> rows added per photo; 0 is a
+        near-duplicate (ENROLL_DEDUP) of the index or of an earlier photo in `items`.
+        All-or-nothing: everything that can raise runs before the first add, so a
+        caller can retry a failed batch photo by photo without double-adding."""
+        shard = shard or self.default
+        if not items:
+            return []
+        prepped = self._prep_batch([im for _, im in items])
+        vecs = self.embedder.embed_batch(prepped)
+        lows = self.embedder.embed_batch(prepped, settings.lowres_size) if shard.lowres is not None else None
+        kept: dict[str, list[int]] = {}
+        added = []
+        for i, (sku, _) in enumerate(items):
+            mine = kept.setdefault(sku, [])
+            dup = bool(settings.enroll_dedup) and (
+                shard.index.near_duplicate(sku, vecs[i], settings.enroll_dedup)
+                or (bool(mine) and float((vecs[mine] @ vecs[i]).max()) >= settings.enroll_dedup)
+            )
+            if not dup:
+                mine.append(i)
+            added.append(0 if dup else 1)
+        for idx, v in ((shard.index, vecs), (shard.lowres, lows)):
+            if idx is not None and v.shape[1] != idx.dim:
+                raise ValueError(f"expected dim {idx.dim}, got {v.shape[1]}")
+        for sku, rows in kept.items():  # one add() per SKU per batch, not per photo
+            if rows:
+                shard.index.add(sku, vecs[rows])
+                if lows is not None:
+                    shard.lowres.add(sku, lows[rows])
         return added
 
-    def reindex(self) -> dict:
-        self.index.reset()
-        return self.enroll_dir(settings.reference_path)
+    def enroll_dir(self, root: Path, shard: Shard | None = None, **options) -> dict:
+        """Enroll every image under root/<sku>/*.jpg (or root/*.jpg for a single SKU
+        folder) through the parallel bulk pipeline (bulk_enroll.py; `options` go to
+        BulkEnroll). Returns {sku: count}."""
+        from .bulk_enroll import BulkEnroll
+
+        return BulkEnroll(self, shard or self.default, **options).run(root)
+
+    def condense(self, k: int, shard: Shard | None = None) -> dict:
+        """Keep at most k diverse vectors per SKU (farthest-point) and save.
+        -> {before, after}. The low-res index keeps the same rows."""
+        shard = shard or self.default
+        before = shard.index.size
+        rows = shard.index.representatives(k)
+        if shard.lowres is not None:
+            if shard.lowres_ready():
+                shard.lowres.keep(rows)
+            else:
+                shard.lowres.reset()  # already out of sync; rebuilt by the next /reindex
+        shard.index.keep(rows)
+        self.save(shard)
+        return {"before": before, "after": shard.index.size}
+
+    def reindex(self, shard: Shard | None = None) -> dict:
+        """Rebuild a catalog from its reference photos (REFERENCE_DIR for the global
+        one, data/tenants/<key>/reference for a tenant shard)."""
+        shard = shard or self.default
+        shard.index.reset()
+        if shard.lowres is not None:
+            shard.lowres.reset()
+        ref = settings.reference_path if shard.reference_dir is None else shard.reference_dir
+        if not ref.is_dir():
+            self.save(shard)
+            return {}
+        return self.enroll_dir(ref, shard)
+
+    # ---- look-alikes ---------------------------------------------------------
+    def similarity(self, shard: Shard | None = None) -> SkuSimilarity:
+        """The shard's SKU x SKU matrix, recomputed for SKUs whose photos changed
+        since it was last saved (everything on the first call without a file)."""
+        shard = shard or self.default
+        path = shard.similarity_file or settings.similarity_file
+        with self._sim_lock:
+            sim = shard.similarity
+            if sim is None:
+                sim = shard.similarity = SkuSimilarity.load(path)
+            sim.update(shard.index)
+            # Throttled: the file is the whole N x N matrix, and anything not yet
+            # written is recomputed from the fingerprints after a restart anyway.
+            if sim.dirty and time.monotonic() - sim.saved_at >= settings.similarity_save_s:
+                sim.save(path)
+            return sim
+
+    def collisions(self, sku: str, shard: Shard | None = None) -> list[dict]:
+        """Other SKUs at or above ENROLL_COLLISION similarity to `sku` ([] when off)."""
+        if not settings.enroll_collision:
+            return []
+        return self.similarity(shard).neighbors(sku, k=10, min_score=settings.enroll_collision)
 
-    def status(self) -> dict:
+    def status(self, shard: Shard | None = None) -> dict:
+        shard = shard or self.default
         return {
             "embed_model": settings.embed_model,
             "device": self.embedder.device,
             "dim": self.embedder.dim,
             "detector": bool(self.detector),
-            "vectors": self.index.size,
-            "skus": self.index.sku_count,
+            "shard": shard.key,
+            "vectors": shard.index.size,
+            "skus": shard.index.sku_count,
+            "lowres": {"size": settings.lowres_size, "ready": shard.lowres_ready()}
+            if shard.lowres is not None else None,
+            "gpu_index": {name: m.sync() for name, m in shard.mirrors.items()} or None,
+            "tenants": self.shards.snapshot(),
         }
 
 
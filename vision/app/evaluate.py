@@ -0,0 +1,154 @@
+"""Vectorized identify evaluation over stored embeddings. NumPy only.
+
+Re-embedding the eval set for every "max or mean? top_k 3 or 5? condense to 8?"
+question wastes a GPU pass on work that doesn't change: the query vectors. These
+helpers score a whole (Q, dim) query matrix against an EmbeddingIndex at once and
+compute the same numbers eval_index.py prints — top-k accuracy, per-SKU accuracy,
+confusions — plus score-threshold sweeps and leave-one-out over the index itself.
+scripts/eval_sweep.py drives them from a cached embedding of data/eval.
+
+Scores match EmbeddingIndex.search (same per-SKU aggregation), so a sweep here
+predicts what the service would answer.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from .index import EmbeddingIndex
+
+
+def _reduce(sims: np.ndarray, offsets: np.ndarray, counts: np.ndarray, agg: str) -> np.ndarray:
+    if agg == "mean":
+        return np.add.reduceat(sims, offsets, axis=1) / counts
+    return np.maximum.reduceat(sims, offsets, axis=1)
+
+
+def sku_scores(
+    index: EmbeddingIndex, queries: np.ndarray, agg: str = "max", chunk: int = 1024
+) -> tuple[np.ndarray, list[str]]:
+    """(Q, SKUs) per-SKU scores for every query, and the SKU per column."""
+    vectors, names, seg = index.segments()
+    counts = np.bincount(seg, minlength=len(names))
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    q = np.atleast_2d(queries).astype("float32")
+    out = np.empty((q.shape[0], len(names)), dtype="float32")
+    for i in range(0, q.shape[0], chunk):
+        out[i:i + chunk] = _reduce(q[i:i + chunk] @ vectors.T, offsets, counts, agg)
+    return out, names
+
+
+def leave_one_out(
+    index: EmbeddingIndex, agg: str = "max", chunk: int = 512
+) -> tuple[np.ndarray, list[str], np.ndarray]:
+    """Each reference vector as a query against the index minus itself.
+
+    -> (scores (N, SKUs), SKU names, true column per row). A SKU's only photo has no
+    other photo left to match it, so its own column is -inf for that row (and with
+    "mean", a row's own SKU is averaged over the remaining photos)."""
+    vectors, names, seg = index.segments()
+    counts = np.bincount(seg, minlength=len(names))
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    n = vectors.shape[0]
+    out = np.empty((n, len(names)), dtype="float32")
+    for i in range(0, n, chunk):
+        rows = np.arange(i, min(n, i + chunk))
+        sims = vectors[rows] @ vectors.T
+        own = seg[rows]
+        r = np.arange(len(rows))
+        if agg == "mean":
+            sums = np.add.reduceat(sims, offsets, axis=1)
+            sums[r, own] -= sims[r, rows]
+            denom = np.broadcast_to(counts, sums.shape).astype("float32")
+            denom[r, own] -= 1
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores = np.where(denom > 0, sums / denom, -np.inf)
+        else:
+            sims[r, rows] = -np.inf
+            scores = np.maximum.reduceat(sims, offsets, axis=1)
+        out[rows] = scores
+    return out, names, seg.copy()
+
+
+def truth_columns(names: list[str], labels: list[str]) -> np.ndarray:
+    """Column of each query's true SKU in `names`; -1 for SKUs not in the index."""
+    col = {s: i for i, s in enumerate(names)}
+    return np.array([col.get(s, -1) for s in labels], dtype="int64")
+
+
+def topk_accuracy(scores: np.ndarray, truth: np.ndarray, ks=(1, 3, 5)) -> dict[int, float]:
+    """Fraction of rows whose true column is among the k best (ties: stable order,
+    as in EmbeddingIndex.search)."""
+    if not scores.shape[0]:
+        return {k: 0.0 for k in ks}
+    order = np.argsort(-scores, axis=1, kind="stable")[:, : max(ks)]
+    hit_at = np.where(order == truth[:, None], np.arange(order.shape[1])[None, :], order.shape[1]).min(axis=1)
+    return {k: float(np.mean(hit_at < k)) for k in ks}
+
+
+def predictions(scores: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """-> (top-1 column, top-1 score, top-1 minus top-2 margin) per row."""
+    if scores.shape[1] == 1:
+        top = scores[:, 0]
+        return np.zeros(len(top), dtype="int64"), top, top
+    part = -np.partition(-scores, 1, axis=1)[:, :2]
+    pred = np.argmax(scores, axis=1)
+    return pred, part[:, 0], part[:, 0] - part[:, 1]
+
+
+def per_sku_accuracy(pred: np.ndarray, truth: np.ndarray, n_skus: int) -> tuple[np.ndarray, np.ndarray]:
+    """(correct, total) per true SKU column."""
+    known = truth >= 0
+    total = np.bincount(truth[known], minlength=n_skus)
+    correct = np.bincount(truth[known & (pred == truth)], minlength=n_skus)
+    return correct, total
+
+
+def confusions(pred: np.ndarray, truth: np.ndarray, top: int = 12) -> list[tuple[int, int, int]]:
+    """Most common (true column, predicted column, count) errors."""
+    wrong = (pred != truth) & (truth >= 0)
+    if not wrong.any():
+        return []
+    pairs, counts = np.unique(np.stack([truth[wrong], pred[wrong]], axis=1), axis=0, return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:top]
+    return [(int(pairs[i, 0]), int(pairs[i, 1]), int(counts[i])) for i in order]
+
+
+def threshold_sweep(values: np.ndarray, correct: np.ndarray, thresholds) -> list[dict]:
+    """Accept a top-1 only when `values` (top score or margin) >= t: coverage
+    (fraction answered) and accuracy among the answered, per threshold."""
+    rows = []
+    n = max(1, len(values))
+    for t in thresholds:
+        keep = values >= t
+        answered = int(keep.sum())
+        rows.append({
+            "threshold": round(float(t), 4),
+            "coverage": round(answered / n, 4),
+            "accuracy": round(float(correct[keep].mean()), 4) if answered else None,
+        })
+    return rows
+
+
+def cascade_predictions(
+    scores: np.ndarray, names: list[str], ocr_scores: list[dict[str, int]], threshold: float, top_k: int = 5
+) -> tuple[list[str | None], np.ndarray]:
+    """What IdentifyCascade would answer per row: the embedding top-1 when its margin
+    is >= threshold, else the top_k embedding candidates fused with that row's OCR
+    points (ocr_match scores, cascade.fuse). -> (predicted SKU per row, bool "went to
+    OCR" per row)."""
+    from .cascade import fuse
+
+    if not scores.shape[0]:
+        return [], np.zeros(0, dtype=bool)
+    _, _, gap = predictions(scores)
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+    to_ocr = np.round(gap, 4) < threshold
+    preds: list[str | None] = []
+    for row, cols in enumerate(order):
+        if not to_ocr[row]:
+            preds.append(names[cols[0]])
+            continue
+        candidates = [{"sku": names[c], "score": float(scores[row, c])} for c in cols]
+        ranked = fuse(candidates, ocr_scores[row], top_k)
+        preds.append(ranked[0]["sku"] if ranked else None)
+    return preds, to_ocr
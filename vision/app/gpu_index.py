@@ -0,0 +1,104 @@
+"""Device-resident mirror of an EmbeddingIndex: scan, per-SKU aggregation and top-k
+all on the GPU, so only k (sku, score) pairs cross the bus.
+
+The CPU path copies every query embedding off the GPU (`.cpu().numpy()`) and runs
+the similarity in NumPy. With a mirror, the query stays on the device: one fp16
+matmul over the (N, dim) matrix, `scatter_reduce` of the row scores into per-SKU
+max/mean, a mask for allow-lists, then `topk`.
+
+The mirror re-uploads lazily when the source index's `version` changes (enroll,
+reindex) — enrollment is rare next to identify. Before uploading it checks free
+VRAM (keeping GPU_INDEX_HEADROOM_MB for the models); if the matrix doesn't fit, or
+the upload runs out of memory, `ready` stays False and the engine searches on the
+CPU until the next change.
+"""
+from __future__ import annotations
+
+import threading
+
+import torch
+
+from .index import EmbeddingIndex
+
+
+class DeviceIndex:
+    def __init__(
+        self, index: EmbeddingIndex, device: str, *, dtype=torch.float16, headroom_mb: int = 1024
+    ) -> None:
+        self.index = index
+        self.device = device
+        self.dtype = dtype
+        self.headroom_mb = headroom_mb
+        self._lock = threading.Lock()
+        self._version = -1
+        self._matrix = None
+        self._seg = None
+        self._names: list[str] = []
+        self._pos: dict[str, int] = {}
+        self._counts = None
+        self.ready = False
+
+    def _fits(self, nbytes: int) -> bool:
+        if not str(self.device).startswith("cuda"):
+            return True
+        free, _ = torch.cuda.mem_get_info(torch.device(self.device))
+        return nbytes + self.headroom_mb * 2**20 <= free
+
+    def sync(self) -> bool:
+        """Upload the index if it changed since the last upload. Returns `ready`."""
+        with self._lock:
+            if self._version == self.index.version:
+                return self.ready
+            self._version = self.index.version
+            self._matrix = self._seg = self._counts = None
+            self.ready = False
+            if self.index.size == 0:
+                return False
+            vectors, names, seg = self.index.segments()
+            itemsize = torch.tensor([], dtype=self.dtype).element_size()
+            if not self._fits(vectors.shape[0] * vectors.shape[1] * itemsize):
+                print(f"  ! device index: not enough free VRAM for {vectors.shape[0]} vectors; CPU search")
+                return False
+            try:
+                self._matrix = torch.from_numpy(vectors).to(self.device, dtype=self.dtype)
+                self._seg = torch.from_numpy(seg).to(self.device)
+                self._counts = torch.bincount(self._seg, minlength=len(names)).to(torch.float32)
+            except torch.cuda.OutOfMemoryError:
+                self._matrix = self._seg = self._counts = None
+                torch.cuda.empty_cache()
+                print("  ! device index: out of memory on upload; CPU search")
+                return False
+            self._names = names
+            self._pos = {s: i for i, s in enumerate(names)}
+            self.ready = True
+            return True
+
+    @torch.no_grad()
+    def search(self, q: torch.Tensor, top_k: int, agg: str = "max", skus: list[str] | None = None) -> list[dict]:
+        """Same contract as EmbeddingIndex.search, for a (dim,) query tensor already on
+        `device`. Call sync() first; raises if the mirror isn't ready."""
+        with self._lock:  # one consistent snapshot even if enroll resyncs mid-search
+            if not self.ready:
+                raise RuntimeError("device index not ready")
+            matrix, seg, counts, names, pos = self._matrix, self._seg, self._counts, self._names, self._pos
+        sims = (matrix @ q.to(self.device, dtype=self.dtype)).float()
+        n = len(names)
+        if agg == "mean":
+            scores = torch.zeros(n, device=sims.device).scatter_add_(0, seg, sims) / counts
+        else:  # "max" — best matching reference photo wins
+            scores = torch.full((n,), float("-inf"), device=sims.device).scatter_reduce_(
+                0, seg, sims, reduce="amax"
+            )
+        if skus is not None:
+            keep = [pos[s] for s in set(skus) if s in pos]
+            if not keep:
+                return []
+            mask = torch.full((n,), float("-inf"), device=sims.device)
+            mask[torch.tensor(keep, device=sims.device)] = 0.0
+            scores = scores + mask
+            n = len(keep)
+        vals, idx = torch.topk(scores, min(top_k, n))
+        return [
+            {"sku": names[i], "score": round(float(v), 4)}
+            for v, i in zip(vals.cpu().tolist(), idx.cpu().tolist())
+        ]
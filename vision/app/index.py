@@ -3,20 +3,55 @@
 Vectors are unit-normalized, so cosine similarity == dot product. Backed by a single
 .npz (vectors + parallel sku labels). Small and dependency-free; swap in FAISS here
 if the vector count grows past ~100k — the public methods are the seam.
+
+Rows are kept grouped by SKU (re-sorted lazily after an add), so every SKU is one
+contiguous row range. The re-sort builds new arrays and swaps them in under the
+index's lock, and readers take a consistent (vectors, skus, ranges) snapshot, so
+concurrent searches right after a load or add never see rows and labels out of
+step. That makes per-SKU aggregation a single `reduceat`, and lets
+`search(skus=...)` scan only an allow-list's ranges — a receiving session expecting
+five SKUs touches five small slices, not the whole catalog.
+
+Reference sets stay small: `near_duplicate` lets enroll drop a photo that adds
+nothing (ENROLL_DEDUP), and `representatives` / `keep` condense each SKU to at most
+K diverse rows by farthest-point selection (scripts/condense_index.py).
 """
 from __future__ import annotations
 
-from collections import defaultdict
+import json
+import os
+import threading
 from pathlib import Path
 
 import numpy as np
 
 
+def farthest_point(vectors: np.ndarray, k: int) -> np.ndarray:
+    """Indices of <= k diverse rows of unit `vectors`: start at the row closest to
+    the centroid, then keep adding the row least similar to everything picked so far.
+    Returned sorted."""
+    n = vectors.shape[0]
+    if n <= k:
+        return np.arange(n)
+    first = int(np.argmax(vectors @ vectors.mean(axis=0)))
+    picked = [first]
+    nearest = vectors @ vectors[first]  # each row's best similarity to the picked set
+    for _ in range(k - 1):
+        i = int(np.argmin(nearest))
+        picked.append(i)
+        nearest = np.maximum(nearest, vectors @ vectors[i])
+    return np.sort(np.asarray(picked))
+
+
 class EmbeddingIndex:
     def __init__(self, dim: int) -> None:
         self.dim = dim
         self._vectors = np.zeros((0, dim), dtype="float32")
         self._skus: list[str] = []
+        self._ranges: dict[str, tuple[int, int]] | None = None  # sku -> [start, stop)
+        self._rows: dict[str, list[int]] | None = None  # sku -> rows, kept up by add()
+        self._lock = threading.Lock()  # guards the four fields above together
+        self.version = 0  # bumped on every mutation; device mirrors resync on change
 
     # ---- persistence -------------------------------------------------------
     @classmethod
@@ -32,25 +67,142 @@ class EmbeddingIndex:
 
     def save(self, path: Path) -> None:
         path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            vectors, skus = self._vectors, list(self._skus)
         np.savez(
             path,
-            vectors=self._vectors,
-            skus=np.array(self._skus, dtype=object),
+            vectors=vectors,
+            skus=np.array(skus, dtype=object),
         )
 
+    @classmethod
+    def load_dir(cls, path: Path, dim: int) -> "EmbeddingIndex":
+        """Directory form (vectors.npy + skus.json). The matrix is memory-mapped
+        read-only; an add() copies it into memory."""
+        idx = cls(dim)
+        vf = Path(path) / "vectors.npy"
+        if vf.exists():
+            vecs = np.load(vf, mmap_mode="r")
+            skus = json.loads((Path(path) / "skus.json").read_text())
+            if vecs.shape[0] and vecs.shape[1] == dim and len(skus) == vecs.shape[0]:
+                idx._vectors = vecs
+                idx._skus = skus
+        return idx
+
+    def save_dir(self, path: Path) -> None:
+        """Write the directory form, rows grouped by SKU so a load needs no re-sort
+        (and stays mapped). Files are replaced atomically."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        vectors, skus, _ = self._snapshot()
+        np.save(path / "vectors.tmp.npy", np.ascontiguousarray(vectors, dtype="float32"))
+        (path / "skus.tmp.json").write_text(json.dumps(skus))
+        os.replace(path / "vectors.tmp.npy", path / "vectors.npy")
+        os.replace(path / "skus.tmp.json", path / "skus.json")
+
     # ---- mutation ----------------------------------------------------------
     def add(self, sku: str, vectors: np.ndarray) -> int:
         """Append N (dim,) vectors all labeled `sku`. Returns count added."""
         vectors = np.atleast_2d(vectors).astype("float32")
         if vectors.shape[1] != self.dim:
             raise ValueError(f"expected dim {self.dim}, got {vectors.shape[1]}")
-        self._vectors = np.vstack([self._vectors, vectors])
-        self._skus.extend([sku] * vectors.shape[0])
+        with self._lock:
+            start = len(self._skus)
+            self._vectors = np.vstack([self._vectors, vectors])
+            self._skus = self._skus + [sku] * vectors.shape[0]
+            self._ranges = None
+            if self._rows is not None:
+                self._rows.setdefault(sku, []).extend(range(start, len(self._skus)))
+            self.version += 1
+        return vectors.shape[0]
+
+    def add_many(self, skus: list[str], vectors: np.ndarray) -> int:
+        """Append N (dim,) vectors labeled row by row with `skus`, in one vstack
+        (bulk loads; add() per SKU copies the whole matrix each time). Returns count added."""
+        vectors = np.atleast_2d(vectors).astype("float32")
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"expected dim {self.dim}, got {vectors.shape[1]}")
+        if len(skus) != vectors.shape[0]:
+            raise ValueError(f"{len(skus)} labels for {vectors.shape[0]} vectors")
+        with self._lock:
+            start = len(self._skus)
+            self._vectors = np.vstack([self._vectors, vectors])
+            self._skus = self._skus + list(skus)
+            self._ranges = None
+            if self._rows is not None:
+                for i, sku in enumerate(skus, start):
+                    self._rows.setdefault(sku, []).append(i)
+            self.version += 1
         return vectors.shape[0]
 
+    def subset(self, rows) -> "EmbeddingIndex":
+        """A new index holding only `rows` (grouped order); this one is untouched —
+        for trying a condensed variant without committing to it."""
+        vectors, skus, _ = self._snapshot()
+        rows = np.asarray(sorted(set(int(r) for r in rows)), dtype="int64")
+        out = EmbeddingIndex(self.dim)
+        out._vectors = np.ascontiguousarray(vectors[rows], dtype="float32")
+        out._skus = [skus[i] for i in rows]
+        return out
+
+    def keep(self, rows) -> None:
+        """Drop every row not in `rows` (row numbers in the grouped order, e.g. from
+        `representatives`)."""
+        with self._lock:
+            vectors, skus, _ = self._grouped()
+            rows = np.asarray(sorted(set(int(r) for r in rows)), dtype="int64")
+            self._vectors = np.ascontiguousarray(vectors[rows], dtype="float32")
+            self._skus = [skus[i] for i in rows]
+            self._ranges = self._rows = None
+            self.version += 1
+
     def reset(self) -> None:
-        self._vectors = np.zeros((0, self.dim), dtype="float32")
-        self._skus = []
+        with self._lock:
+            self._vectors = np.zeros((0, self.dim), dtype="float32")
+            self._skus = []
+            self._ranges = self._rows = None
+            self.version += 1
+
+    def _grouped(self) -> tuple[np.ndarray, list[str], dict[str, tuple[int, int]]]:
+        """Stable-sort rows by SKU (only if needed) and index each SKU's row range.
+        Caller holds the lock; the sorted arrays are built aside and swapped in."""
+        if self._ranges is None:
+            vectors, skus = self._vectors, self._skus
+            order = sorted(range(len(skus)), key=skus.__getitem__)
+            if order != list(range(len(order))):
+                vectors = vectors[order]
+                skus = [skus[i] for i in order]
+                self._rows = None  # row numbers moved
+            ranges: dict[str, tuple[int, int]] = {}
+            start = 0
+            for i in range(1, len(skus) + 1):
+                if i == len(skus) or skus[i] != skus[start]:
+                    ranges[skus[start]] = (start, i)
+                    start = i
+            self._vectors, self._skus, self._ranges = vectors, skus, ranges
+        return self._vectors, self._skus, self._ranges
+
+    def _snapshot(self) -> tuple[np.ndarray, list[str], dict[str, tuple[int, int]]]:
+        """Grouped (vectors, skus, ranges) that belong together, safe to use unlocked:
+        mutations replace these objects rather than changing them in place."""
+        with self._lock:
+            return self._grouped()
+
+    def segments(self) -> tuple[np.ndarray, list[str], np.ndarray]:
+        """(vectors grouped by SKU, SKU per segment, segment id per row) — the layout
+        a device-resident mirror uploads (see gpu_index.py)."""
+        vectors, _, ranges = self._snapshot()
+        names = list(ranges)
+        seg = np.empty(vectors.shape[0], dtype="int64")
+        for i, (a, b) in enumerate(ranges.values()):
+            seg[a:b] = i
+        return vectors, names, seg
+
+    def representatives(self, k: int) -> np.ndarray:
+        """Rows (grouped order) keeping at most k diverse vectors per SKU."""
+        vectors, _, ranges = self._snapshot()
+        keep = [a + farthest_point(vectors[a:b], k) for a, b in ranges.values()]
+        return np.concatenate(keep) if keep else np.zeros(0, dtype="int64")
 
     # ---- query -------------------------------------------------------------
     @property
@@ -61,17 +213,86 @@ class EmbeddingIndex:
     def sku_count(self) -> int:
         return len(set(self._skus))
 
-    def search(self, vec: np.ndarray, top_k: int, agg: str = "max") -> list[dict]:
-        """Cosine kNN, aggregated per SKU. Returns [{sku, score}] desc by score."""
-        if self.size == 0:
+    @property
+    def skus(self) -> list[str]:
+        """Distinct enrolled SKUs, sorted."""
+        return sorted(set(self._skus))
+
+    def near_duplicate(self, sku: str, vec: np.ndarray, threshold: float) -> bool:
+        """True when `sku` already has a vector with cosine >= threshold to `vec`.
+        Doesn't regroup: between adds it reads the SKU's rows from a row map that
+        add() extends (built once after a load / regroup), so checking each photo
+        of a bulk enroll costs that SKU's rows, not a scan of every label."""
+        with self._lock:
+            vectors = self._vectors
+            if self._ranges is not None:
+                a, b = self._ranges.get(sku, (0, 0))
+                idx: slice | list[int] = slice(a, b)
+            else:
+                if self._rows is None:
+                    self._rows = {}
+                    for i, s in enumerate(self._skus):
+                        self._rows.setdefault(s, []).append(i)
+                idx = list(self._rows.get(sku, ()))
+        rows = vectors[idx]
+        return bool(rows.shape[0]) and float((rows @ vec.astype("float32")).max()) >= threshold
+
+    def search(
+        self, vec: np.ndarray, top_k: int, agg: str = "max", skus: list[str] | None = None
+    ) -> list[dict]:
+        """Cosine kNN, aggregated per SKU. Returns [{sku, score}] desc by score.
+
+        `skus` restricts the scan to those SKUs' rows (unknown SKUs are ignored; an
+        allow-list with nothing enrolled returns [])."""
+        vectors, _, ranges = self._snapshot()
+        if vectors.shape[0] == 0:
             return []
-        sims = self._vectors @ vec.astype("float32")  # cosine, vectors are unit-norm
-        per_sku: dict[str, list[float]] = defaultdict(list)
-        for sku, sim in zip(self._skus, sims):
-            per_sku[sku].append(float(sim))
-        if agg == "mean":
-            scored = [(sku, float(np.mean(v))) for sku, v in per_sku.items()]
-        else:  # "max" — best matching reference photo wins
-            scored = [(sku, max(v)) for sku, v in per_sku.items()]
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [{"sku": sku, "score": round(score, 4)} for sku, score in scored[:top_k]]
+        q = vec.astype("float32")
+        if skus is None:
+            picked = list(ranges.items())
+            sims = vectors @ q  # cosine, vectors are unit-norm
+        else:
+            picked = sorted(((s, ranges[s]) for s in set(skus) if s in ranges), key=lambda x: x[1])
+            if not picked:
+                return []
+            rows = sum(b - a for _, (a, b) in picked)
+            if len(picked) > 64 and rows * 2 > vectors.shape[0]:
+                # Wide allow-list: one full matmul beats many small ones; keep its rows.
+                full = vectors @ q
+                sims = np.concatenate([full[a:b] for _, (a, b) in picked])
+            else:
+                sims = np.concatenate([vectors[a:b] @ q for _, (a, b) in picked])
+        scores = _aggregate(sims, [b - a for _, (a, b) in picked], agg)
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        return [{"sku": picked[i][0], "score": round(float(scores[i]), 4)} for i in top]
+
+    def search_batch(
+        self, vecs: np.ndarray, top_k: int, agg: str = "max", skus: list[str] | None = None,
+        chunk_cells: int = 1 << 25,
+    ) -> list[list[dict]]:
+        """search() for each row of (Q, dim) `vecs`, as one matrix product per chunk
+        of queries (chunks keep Q x size similarities under `chunk_cells` floats)."""
+        vecs = np.atleast_2d(vecs).astype("float32")
+        if skus is not None or self.size == 0:
+            return [self.search(v, top_k, agg, skus) for v in vecs]
+        vectors, _, ranges = self._snapshot()
+        names = list(ranges)
+        counts = [b - a for a, b in ranges.values()]
+        step = max(1, chunk_cells // vectors.shape[0])
+        out: list[list[dict]] = []
+        for i in range(0, vecs.shape[0], step):
+            scores = _aggregate(vecs[i:i + step] @ vectors.T, counts, agg)
+            for row in scores:
+                top = np.argsort(-row, kind="stable")[:top_k]
+                out.append([{"sku": names[j], "score": round(float(row[j]), 4)} for j in top])
+        return out
+
+
+def _aggregate(sims: np.ndarray, counts: list[int], agg: str) -> np.ndarray:
+    """Per-SKU score from similarities over contiguous SKU segments (last axis)."""
+    counts = np.asarray(counts)
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    if agg == "mean":
+        return np.add.reduceat(sims, offsets, axis=-1) / counts
+    # "max" — best matching reference photo wins
+    return np.maximum.reduceat(sims, offsets, axis=-1)
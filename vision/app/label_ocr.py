@@ -11,57 +11,18 @@ timestamp. See docs/visual-receiving-identify-plan.md.
 from __future__ import annotations
 
 import re
+import time
+from collections import deque
 
-# Ordered, specific-first. Each: (canonical product, regex over normalized OCR).
-# Patterns tolerate common OCR confusions (1<->I, 0<->O, 2<->Z). Internal model
-# numbers (416776, 417788, 418775, 421650, 412534) are included where a label shows
-# the number instead of / alongside the marketing name.
-LEXICON: list[tuple[str, str]] = [
-    # --- Wave radios / music systems (model-code keyed; most discriminative) ---
-    ("Bose Wave Radio/CD AWRC-1P",      r"AWRC[\-\s]?1P|AWAC[\-\s]?[I1]P"),
-    ("Bose Wave Radio/CD AWRC1G",       r"AWRC[\s]?1G|AWRC[\s]?[I1]G"),
-    ("Bose Wave Music System AWRCC2",   r"AWRCC[2Z]"),
-    ("Bose Wave Music System AWRCC1",   r"AWRCC[1I]"),
-    ("Bose Wave Radio AWR1-1W",         r"AWR[1I][\-\s]?1W|AWR[I1][\-\s]?[I1]W"),
-    ("Bose Wave Music System IV",       r"SYSTEM\s?IV|MUSIC\s?SYSTEM\s?4\b|\b417788\b"),
-    ("Bose Wave Music System III",      r"SYSTEM\s?III|MUSIC\s?SYSTEM\s?3\b"),
-    # --- SoundTouch (specific variants FIRST; generic must say "10"/model #) ---
-    ("Bose SoundTouch 300 Soundbar",    r"SOUND\s?TOUCH\s?300|\b421650\b"),
-    ("Bose SoundTouch Pedestal",        r"SOUND\s?TOUCH\s?PEDESTAL|PEDESTAL|\b412534\b"),
-    ("Bose SoundTouch 20",              r"SOUND\s?TOUCH\s?20"),
-    ("Bose SoundTouch 30",              r"SOUND\s?TOUCH\s?30"),
-    ("Bose SoundTouch 10",              r"SOUND\s?TOUCH\s?10|\b416776\b"),
-    # --- Docks / portable ---
-    ("Bose SoundDock Series III",       r"SOUND\s?DOCK\s?(SERIES\s?)?III"),
-    ("Bose SoundDock Series II",        r"SOUND\s?DOCK\s?(SERIES\s?)?II\b"),
-    ("Bose SoundDock 10",               r"SOUND\s?DOCK\s?10"),
-    ("Bose SoundDock",                  r"SOUND\s?DOCK"),
-    ("Bose SoundLink",                  r"SOUND\s?LINK"),
-    # --- Companion multimedia ---
-    ("Bose Companion 5",                r"COMPAN[I1]ON\s?5"),
-    ("Bose Companion 3",                r"COMPAN[I1]ON\s?3"),
-    ("Bose Companion 2 Series III",     r"COMPAN[I1]ON"),
-    # --- Home theater / Lifestyle ---
-    ("Bose Lifestyle AV35 Console",     r"AV[\-\s]?35"),
-    ("Bose Control Console AV20",       r"AV[\-\s]?20"),
-    ("Bose Lifestyle",                  r"LIFESTYLE"),
-    ("Bose 321 Home Theater",           r"\b321\b|AV3[\-\s]?2[\-\s]?1|GSX?\s?SERIES"),
-    ("Bose CineMate",                   r"CINE\s?MATE"),
-    ("Bose Acoustimass",                r"ACOUSTI\s?MASS|\bAM[\-\s]?(10|15|6|5)\b"),
-    ("Bose Solo Soundbar Series II",    r"SOLO\s?SOUNDBAR|SOLO\s?TV\s?SOUNDBAR|\b418775\b"),
-    ("Bose Solo 5 TV Sound System",     r"(?<!\d)SOLO\s?5\b|SOLO\s?5\s?TV"),
-    ("Bose TV Speaker",                 r"TV\s?SPEAKER"),
-    # --- Wired speakers ---
-    ("Bose VCS-10 Center Channel",      r"VCS[\-\s]?10|VCS[\-\s]?1\b"),
-    ("Bose 151 SE Environmental Spk",   r"\b1510?\s?SE\b|151\s?SE|\b151\b"),
-    ("Bose 251 Environmental Spk",      r"\b251\b"),
-    ("Bose 161 Speakers",               r"\b161\s?(SPEAKER|SERIES|DIRECT)"),
-    ("Bose 141 Bookshelf Speakers",     r"\b141\s?(SPEAKER|SERIES|BOOKSHELF)"),
-    ("Bose 201 Speakers",               r"\b201\s?(SERIES|DIRECT|REFLECT)"),
-    ("Bose 301 Speakers",               r"\b301\s?(SERIES|DIRECT|REFLECT)"),
-    ("Bose FreeSpace",                  r"FREE\s?SPACE"),
-]
-_COMPILED = [(name, re.compile(pat)) for name, pat in LEXICON]
+from .config import settings
+from .lexicon import LexiconMatcher, load_entries
+from .profiling import model_span
+
+# Ordered, specific-first lexicon of (canonical product, regex over normalized OCR).
+# The entries are data (app/lexicon.json, or LEXICON_PATH for a catalog-generated
+# file); app/lexicon.py compiles them into one single-pass, order-preserving matcher.
+LEXICON: list[tuple[str, str]] = load_entries(settings.lexicon_file)
+_MATCHER = LexiconMatcher(LEXICON)
 
 # A real Bose product label carries one of these anchors near the model code.
 _ANCHOR = re.compile(r"MODEL|SER\.?\s?NO|SERIAL|MADE IN|FRAMINGHAM|BOSE CORP")
@@ -87,40 +48,310 @@ def classify(text: str, strict: bool = True) -> tuple[str | None, int]:
             return None, 0
         if not _ANCHOR.search(norm):
             return None, 0
-    for name, pat in _COMPILED:
-        if pat.search(norm) or pat.search(norm_nospace):
-            return name, 1
-    return None, 0
+    name = _MATCHER.match(norm, norm_nospace)
+    return (name, 1) if name else (None, 0)
+
+
+def region_priority(regions: list[tuple[float, float, float, float]], size: tuple[int, int]) -> list[int]:
+    """Order text regions (x1, y1, x2, y2) for progressive OCR: largest first, then
+    nearest the frame centre. A deliberate label shot puts the model plate big and
+    central; small text at the edges (fine print, hands, bench clutter) reads last."""
+    w, h = size
+    cx, cy = w / 2.0, h / 2.0
+
+    def key(i: int) -> tuple[float, float]:
+        x1, y1, x2, y2 = regions[i]
+        area = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+        dist = ((x1 + x2) / 2.0 - cx) ** 2 + ((y1 + y2) / 2.0 - cy) ** 2
+        return (-area, dist)
+
+    return sorted(range(len(regions)), key=key)
+
+
+def progressive_classify(regions, recognize, size, *, strict: bool = True, step: int = 4) -> dict:
+    """Recognize regions in priority order, classifying as text accrues; stop at the
+    first strict match. `recognize(region_indices) -> [str]` is the (batched) OCR call,
+    kept injectable so this loop unit-tests without EasyOCR.
+
+    The classifier sees the read regions re-sorted into reading order (top-to-bottom,
+    left-to-right) so multi-word patterns match the same way they do on a full read.
+    Paperwork text in a region we never reach can't veto the match — in practice the
+    return/invoice labels that trigger the veto are big blocks that rank early.
+    """
+    order = region_priority(regions, size)
+    texts: dict[int, str] = {}
+    model = None
+    processed = 0
+    for start in range(0, len(order), max(1, step)):
+        batch = order[start:start + step]
+        for i, t in zip(batch, recognize(batch)):
+            texts[i] = t
+        processed += len(batch)
+        model, _ = classify(_reading_order(regions, texts), strict=strict)
+        if model is not None:
+            break
+    text = _reading_order(regions, texts)
+    return {
+        "model": model,
+        "text": text,
+        "regions_processed": processed,
+        "regions_total": len(regions),
+    }
+
+
+def _reading_order(regions, texts: dict[int, str]) -> str:
+    keys = sorted(texts, key=lambda i: (regions[i][1], regions[i][0]))
+    return " ".join(texts[i] for i in keys if texts[i])
 
 
 class LabelIdentifier:
-    """Lazy EasyOCR reader + lexicon matcher. One instance shared by the service."""
+    """Lazy EasyOCR reader + lexicon matcher. One instance shared by the service.
+
+    `auto_orient` turns upside-down / sideways label shots upright before
+    recognition (see orientation.py) at roughly single-pass cost. With a `store`
+    (ocr_store.OcrStore), reads are cached by the image file's content hash plus
+    `settings_key`; callers pass `content_hash` when they have the raw bytes.
+    A detector `box` (detector.Box, in the decoded frame) crops before reading; such
+    reads are stored under the hash plus the box.
+    """
 
-    def __init__(self, gpu: bool = True) -> None:
+    def __init__(self, gpu: bool = True, auto_orient: bool = True, store=None) -> None:
         import easyocr  # heavy; imported lazily
 
+        from .ocr_store import MAX_SIDE, settings_key
+
         self._reader = easyocr.Reader(["en"], gpu=gpu, verbose=False)
+        self._auto_orient = auto_orient
+        self._store = store
+        self.settings_key = settings_key(auto_orient, MAX_SIDE)
 
-    def read_text(self, image) -> str:
-        """OCR a PIL image (downscaled for speed). Returns concatenated text."""
+    @staticmethod
+    def prepare(image, box=None):
+        """PIL image -> upright-by-EXIF, RGB, <=2000px numpy array (label text stays
+        legible; faster detection). `box` crops first (padded, like the embedder)."""
         import numpy as np
         from PIL import ImageOps
 
-        im = ImageOps.exif_transpose(image).convert("RGB")
+        from .detector import crop
+
+        im = ImageOps.exif_transpose(crop(image, box)).convert("RGB")
         if max(im.size) > 2000:
             im.thumbnail((2000, 2000))
-        return " ".join(self._reader.readtext(np.array(im), detail=0, paragraph=True))
+        return np.array(im)
+
+    def _detect(self, arrs) -> list[tuple[list, list]]:
+        """EasyOCR detection for prepared arrays -> [(horizontal, free)] per array.
+        Same-shape arrays go through the detector as ONE stacked batch, the way
+        readtext_batched does it: EasyOCR's reformat_input only takes one 2-D/3-D
+        image, so the (N, H, W, 3) stack goes in with reformat=False (prepared arrays
+        are already the 3-channel input detection wants)."""
+        import numpy as np
+
+        with model_span("ocr.detect"):
+            if len(arrs) > 1 and all(a.shape == arrs[0].shape for a in arrs):
+                horizontal, free = self._reader.detect(np.stack(arrs), reformat=False)
+                return list(zip(horizontal, free))
+            out = []
+            for a in arrs:
+                horizontal, free = self._reader.detect(a)
+                out.append((horizontal[0], free[0]))
+            return out
+
+    def _layout(self, arr, detected=None):
+        """Detect text once (or take `detected` from a batched _detect) and
+        (optionally) fix orientation.
+
+        Returns (arr, regions, angle, raw) — the possibly-rotated array, its boxes as
+        (x1, y1, x2, y2) in that frame, the CCW angle applied, and EasyOCR's raw
+        (horizontal, free) lists, which are only valid when angle == 0.
+        """
+        import numpy as np
+
+        from .orientation import estimate_orientation, rotate_regions
 
-    def identify(self, image, strict: bool = True) -> dict:
+        horizontal, free = detected if detected is not None else self._detect([arr])[0]
+        regions = [(float(b[0]), float(b[2]), float(b[1]), float(b[3])) for b in horizontal]
+        for quad in free:
+            xs = [float(p[0]) for p in quad]
+            ys = [float(p[1]) for p in quad]
+            regions.append((min(xs), min(ys), max(xs), max(ys)))
+        if not self._auto_orient or not regions:
+            return arr, regions, 0, (horizontal, free)
+
+        h, w = arr.shape[:2]
+
+        def probe(angle: int, idx: list[int]) -> float:
+            turned = np.ascontiguousarray(np.rot90(arr, k=angle // 90))
+            boxes = rotate_regions([regions[i] for i in idx], (w, h), angle)
+            with model_span("ocr.orient_probe"):
+                out = self._reader.recognize(
+                    turned, horizontal_list=_to_easyocr(boxes), free_list=[], detail=1
+                )
+            return sum(float(r[2]) for r in out) / len(out) if out else 0.0
+
+        angle = estimate_orientation(regions, probe)
+        if angle == 0:
+            return arr, regions, 0, (horizontal, free)
+        turned = np.ascontiguousarray(np.rot90(arr, k=angle // 90))
+        return turned, rotate_regions(regions, (w, h), angle), angle, None
+
+    def _read(self, arr, detected=None, batch_size: int = 1) -> tuple[str, int]:
+        """Full read of a prepared array. Returns (text, applied CCW angle)."""
+        arr, regions, angle, raw = self._layout(arr, detected)
+        if not regions:
+            return "", angle
+        if raw is not None:
+            horizontal, free = raw
+        else:
+            horizontal, free = _to_easyocr(regions), []
+        with model_span("ocr.recognize"):
+            out = self._reader.recognize(
+                arr, horizontal_list=horizontal, free_list=free, detail=0, paragraph=True,
+                batch_size=batch_size,
+            )
+        return " ".join(out), angle
+
+    def read_arrays(self, arrs, digests=None, paths=None, batch_size: int = 16) -> list[str]:
+        """Batched full read of prepared arrays (see prepare()). Detection runs as one
+        batch per same-shape group; recognition batches each image's text crops.
+        Results go to the store when `digests` are given."""
+        digests = digests or [None] * len(arrs)
+        paths = paths or [None] * len(arrs)
+        texts = []
+        for arr, det, digest, path in zip(arrs, self._detect(arrs), digests, paths):
+            text, angle = self._read(arr, det, batch_size=batch_size)
+            self._remember(digest, text, angle, None if path is None else str(path))
+            texts.append(text)
+        return texts
+
+    def lookup(self, content_hash: str | None) -> tuple[str, int] | None:
+        if self._store is None or not content_hash:
+            return None
+        return self._store.get(content_hash, self.settings_key)
+
+    def _remember(self, content_hash: str | None, text: str, angle: int, path: str | None = None) -> None:
+        if self._store is not None and content_hash:
+            self._store.put(content_hash, self.settings_key, text, rotation=angle, path=path)
+
+    def read_text(self, image, content_hash: str | None = None, path: str | None = None, box=None) -> str:
+        """OCR a PIL image (downscaled for speed). Returns concatenated text."""
+        content_hash = region_key(content_hash, box)
+        hit = self.lookup(content_hash)
+        if hit is not None:
+            return hit[0]
+        text, angle = self._read(self.prepare(image, box))
+        self._remember(content_hash, text, angle, path)
+        return text
+
+    def read_file(self, path) -> str:
+        """OCR an image file through the store: a hit skips decode and OCR entirely."""
+        import io
+        from pathlib import Path
+
+        from PIL import Image
+
+        from .ocr_store import content_hash
+
+        data = Path(path).read_bytes()
+        digest = content_hash(data) if self._store is not None else None
+        hit = self.lookup(digest)
+        if hit is not None:
+            return hit[0]
+        with Image.open(io.BytesIO(data)) as im:
+            text, angle = self._read(self.prepare(im))
+        self._remember(digest, text, angle, str(path))
+        return text
+
+    def _recognize_regions(self, arr, regions) -> list[str]:
+        """Recognize only the given boxes (one batched EasyOCR recognition call)."""
+        boxes = _to_easyocr(regions)
+        h, w = arr.shape[:2]
+        # recognize() clamps each box to the frame, echoes it back as corner points
+        # of the clamped box, and returns them sorted by (clamped) top edge. Clamp
+        # the same way and queue box indices per clamped box in that order, so results
+        # map back by order even for edge boxes and duplicates; a box with nothing
+        # left inside the frame is not sent (EasyOCR can't crop it) and reads "".
+        queues: dict[tuple[int, int, int, int], deque] = {}
+        send = []
+        for i, (x1, x2, y1, y2) in sorted(enumerate(boxes), key=lambda ib: max(0, ib[1][2])):
+            key = (max(0, x1), max(0, y1), min(x2, w), min(y2, h))
+            if key[2] > key[0] and key[3] > key[1]:
+                queues.setdefault(key, deque()).append(i)
+                send.append(boxes[i])
+        texts = [""] * len(boxes)
+        if not send:
+            return texts
+        with model_span("ocr.recognize"):
+            out = self._reader.recognize(arr, horizontal_list=send, free_list=[], detail=1)
+        for corners, text, *_ in out:
+            (x1, y1), _, (x2, y2), _ = corners
+            queue = queues.get((int(x1), int(y1), int(x2), int(y2)))
+            if queue:
+                texts[queue.popleft()] = text
+        return texts
+
+    def identify(
+        self, image, strict: bool = True, progressive: bool = False, content_hash: str | None = None, box=None
+    ) -> dict:
         """PIL image -> {model, raw_text, matched}. `model` is None when no confident,
-        unambiguous product-label read (caller should fall back to manual search)."""
-        text = self.read_text(image)
-        # Try strict (trusted) first; if nothing, report the loose read for context.
-        model, hits = classify(text, strict=strict)
+        unambiguous product-label read (caller should fall back to manual search).
+
+        progressive=True detects text regions once, then recognizes them largest /
+        most-central first and stops at the first strict match. The response then
+        also carries regions_processed / regions_total so the saving is visible.
+        A stored full read for the same content wins over both paths (`cached`).
+        `box` restricts the read to a detected product region.
+        """
+        t0 = time.perf_counter()
+        content_hash = region_key(content_hash, box)
+        extra: dict = {}
+        hit = self.lookup(content_hash)
+        if hit is not None:
+            text, angle = hit
+            model, _ = classify(text, strict=strict)
+        elif progressive:
+            arr, regions, angle, _ = self._layout(self.prepare(image, box))
+            h, w = arr.shape[:2]
+            prog = progressive_classify(
+                regions,
+                lambda idx: self._recognize_regions(arr, [regions[i] for i in idx]),
+                (w, h),
+                strict=strict,
+            )
+            text = prog["text"]
+            model = prog["model"]
+            extra = {
+                "regions_processed": prog["regions_processed"],
+                "regions_total": prog["regions_total"],
+            }
+            if prog["regions_processed"] == prog["regions_total"]:
+                self._remember(content_hash, text, angle)  # only a full read is reusable
+        else:
+            text, angle = self._read(self.prepare(image, box))
+            self._remember(content_hash, text, angle)
+            # Try strict (trusted) first; if nothing, report the loose read for context.
+            model, _ = classify(text, strict=strict)
         loose_model, _ = classify(text, strict=False)
         return {
             "model": model,
             "loose_model": loose_model,
             "raw_text": text[:400],
             "matched": model is not None,
+            "rotation": angle,
+            "progressive": progressive,
+            "cached": hit is not None,
+            **extra,
+            "ocr_ms": round((time.perf_counter() - t0) * 1000, 1),
         }
+
+
+def region_key(content_hash: str | None, box) -> str | None:
+    """Store key for a read of `box` within the content (the whole image if None)."""
+    if content_hash is None or box is None:
+        return content_hash
+    return f"{content_hash}@{','.join(str(int(v)) for v in box)}"
+
+
+def _to_easyocr(regions) -> list[list[int]]:
+    """(x1, y1, x2, y2) boxes -> EasyOCR horizontal_list [x_min, x_max, y_min, y_max]."""
+    return [[int(x1), int(x2), int(y1), int(y2)] for x1, y1, x2, y2 in regions]
@@ -0,0 +1,169 @@
+"""Lexicon compiler: ordered (product, regex) entries -> one single-pass matcher.
+
+`classify` used to run every entry's regex, twice, per call — fine for ~40 hand-written
+Bose entries, not for thousands generated from the whole sku_catalog. The compiled
+form keeps the exact semantics (first entry in lexicon order that matches either the
+spaced or the alnum-only text wins) but only runs the regexes that can possibly hit:
+
+  * Each entry's regex is parsed and, per top-level alternative, its REQUIRED
+    alphanumeric literals are pulled out (`AWRC[\\-\\s]?1P` -> "AWRC", "1P"); the one
+    fewest entries share becomes the anchor. Any match of the entry must contain one
+    of its anchors, and an alnum literal present in the spaced text is also present
+    in the alnum-only text.
+  * All literals go into one trie-shaped regex, scanned once over the alnum-only text
+    (the `re` engine walks the trie in C). Each hit, plus the literals that are its
+    prefixes, maps through an inverted index to the entries it anchors.
+  * Candidate entries (plus the few with no usable literal) are then verified with
+    their own regex in lexicon order, so specific-before-generic precedence holds.
+
+Entries live in a JSON data file (`app/lexicon.json`) so catalog-generated lexicons
+can be dropped in without touching code.
+"""
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+try:  # Python 3.11+ moved the regex parser
+    from re import _parser as _sre_parse  # type: ignore[attr-defined]
+    from re import _constants as _sre_c  # type: ignore[attr-defined]
+except ImportError:  # pragma: no cover — older interpreters
+    import sre_constants as _sre_c  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+_MIN_LITERAL = 2
+
+
+def load_entries(path: Path) -> list[tuple[str, str]]:
+    """Read `{"entries": [{"product", "pattern", ...}]}` -> [(product, pattern)]."""
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [(e["product"], e["pattern"]) for e in doc["entries"]]
+
+
+def _is_alnum(code: int) -> bool:
+    ch = chr(code)
+    return ch.isascii() and ch.isalnum()
+
+
+def _required_runs(items) -> list[str]:
+    """Alnum literal runs that every match of this parsed sequence must contain."""
+    runs: list[str] = []
+    cur: list[str] = []
+
+    def flush() -> None:
+        if cur:
+            runs.append("".join(cur))
+            cur.clear()
+
+    for op, av in items:
+        if op is _sre_c.LITERAL and _is_alnum(av):
+            cur.append(chr(av))
+            continue
+        flush()
+        if op is _sre_c.SUBPATTERN:
+            # A plain (non-branching) group is required: its literals are too.
+            sub = av[-1]
+            if not any(o is _sre_c.BRANCH for o, _ in sub):
+                runs.extend(_required_runs(sub))
+        elif op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT) and av[0] >= 1:
+            runs.extend(_required_runs(av[2]))
+    flush()
+    return runs
+
+
+def anchor_literals(pattern: str) -> list[list[str]] | None:
+    """Per top-level alternative, the alnum literals every match of it must contain;
+    None if some alternative has no usable literal (that entry is always checked)."""
+    parsed = _sre_parse.parse(pattern)
+    items = list(parsed)
+    if len(items) == 1 and items[0][0] is _sre_c.BRANCH:
+        branches = items[0][1][1]
+    else:
+        branches = [parsed]
+    out: list[list[str]] = []
+    for branch in branches:
+        runs = sorted({r for r in _required_runs(list(branch)) if len(r) >= _MIN_LITERAL})
+        if not runs:
+            return None
+        out.append(runs)
+    return out
+
+
+def _trie_regex(words: list[str]) -> str:
+    """Alternation of `words` shaped as a trie; at each position the longest wins."""
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: dict) -> str:
+        end = "" in node
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if end:
+            body = "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+class LexiconMatcher:
+    """Compiled, order-preserving matcher over (product, regex) entries."""
+
+    def __init__(self, entries: list[tuple[str, str]]) -> None:
+        self.entries = list(entries)
+        self._patterns = [re.compile(pat) for _, pat in self.entries]
+        self._by_literal: dict[str, list[int]] = {}
+        self._always: list[int] = []
+        parsed = [anchor_literals(pat) for _, pat in self.entries]
+        # Anchor each alternative on its most selective literal: the one the fewest
+        # entries share ("AWRCC" over the brand word every entry carries), then longest.
+        df: dict[str, int] = {}
+        for branches in parsed:
+            for lit in {lit for runs in branches or [] for lit in runs}:
+                df[lit] = df.get(lit, 0) + 1
+        for i, branches in enumerate(parsed):
+            if branches is None:
+                self._always.append(i)
+                continue
+            for lit in {min(runs, key=lambda r: (df[r], -len(r), r)) for runs in branches}:
+                self._by_literal.setdefault(lit, []).append(i)
+        # The scan reports only the longest literal starting at each position; the
+        # shorter literals that are its prefixes are implied.
+        self._prefixes = {
+            lit: [lit[:n] for n in range(_MIN_LITERAL, len(lit) + 1) if lit[:n] in self._by_literal]
+            for lit in self._by_literal
+        }
+        self._scan = (
+            re.compile("(?=(" + _trie_regex(sorted(self._by_literal)) + "))")
+            if self._by_literal else None
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "LexiconMatcher":
+        return cls(load_entries(path))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def candidates(self, nospace: str) -> list[int]:
+        """Entry indices, in lexicon order, whose anchor literal occurs in the text."""
+        hits = set(self._always)
+        if self._scan is not None:
+            for lit in {m.group(1) for m in self._scan.finditer(nospace)}:
+                for p in self._prefixes[lit]:
+                    hits.update(self._by_literal[p])
+        return sorted(hits)
+
+    def match(self, norm: str, nospace: str) -> str | None:
+        """First entry (lexicon order) matching the spaced or alnum-only text."""
+        for i in self.candidates(nospace):
+            pat = self._patterns[i]
+            if pat.search(norm) or pat.search(nospace):
+                return self.entries[i][0]
+        return None
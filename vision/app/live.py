@@ -0,0 +1,142 @@
+"""Live identify over a WebSocket: a stream of small frames in, smoothed candidates out.
+
+Re-posting full frames to /identify several times a second would queue work faster
+than DINOv2 drains it. Here each connection keeps ONE pending-frame slot:
+
+  * a frame that arrives while inference is busy replaces the pending one (the stale
+    frame is dropped, never queued), so latency stays one inference deep;
+  * a frame whose difference hash is within LIVE_DIFF_BITS of the last identified
+    frame is skipped — the camera is looking at the same thing;
+  * inference runs on a small shared pool (LIVE_WORKERS, default 1) for ALL
+    connections, so GPU load is bounded whatever frame rate clients send;
+  * results are exponentially smoothed per SKU so the suggestion doesn't flicker
+    between near-tied candidates frame to frame.
+
+`dhash`, `hamming`, `CandidateSmoother` and `LiveSession` take injected
+engine / receive / send so they unit-test without a socket or torch.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+_HASH = 8  # 8x8 difference hash -> 64 bits
+
+
+def dhash(image: Image.Image, size: int = _HASH) -> int:
+    """Difference hash: sign of horizontal gradients on a (size+1) x size thumbnail."""
+    px = np.asarray(image.convert("L").resize((size + 1, size), Image.BILINEAR), dtype="int16")
+    bits = (px[:, :-1] > px[:, 1:]).ravel()  # row-major, first bit most significant
+    return int.from_bytes(np.packbits(bits).tobytes(), "big") >> (-bits.size % 8)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class CandidateSmoother:
+    """EMA of per-SKU scores across frames. SKUs missing from a frame decay toward 0."""
+
+    def __init__(self, alpha: float = 0.5, top_k: int = 5, floor: float = 0.01) -> None:
+        self.alpha = alpha
+        self.top_k = top_k
+        self.floor = floor
+        self._scores: dict[str, float] = {}
+
+    def update(self, ranked: list[dict]) -> list[dict]:
+        fresh = {c["sku"]: float(c["score"]) for c in ranked}
+        for sku in set(self._scores) | set(fresh):
+            prev = self._scores.get(sku, fresh.get(sku, 0.0))
+            self._scores[sku] = self.alpha * fresh.get(sku, 0.0) + (1 - self.alpha) * prev
+        self._scores = {s: v for s, v in self._scores.items() if v >= self.floor}
+        top = sorted(self._scores.items(), key=lambda x: x[1], reverse=True)[: self.top_k]
+        return [{"sku": s, "score": round(v, 4)} for s, v in top]
+
+
+class LiveSession:
+    """One WebSocket connection's frame slot, diff gate, and smoother.
+
+    `engine` needs locate(image) and identify(image, box=, shard=); `executor` is the
+    shared inference pool that bounds GPU concurrency across sessions; `shard` is the
+    tenant catalog (None = global).
+    """
+
+    def __init__(
+        self, engine, executor, *, diff_bits: int = 4, alpha: float = 0.5, top_k: int = 5, shard=None
+    ) -> None:
+        self._engine = engine
+        self._executor = executor
+        self._shard = shard
+        self.diff_bits = diff_bits
+        self._smoother = CandidateSmoother(alpha, top_k)
+        self._pending: bytes | None = None
+        self._ready = asyncio.Event()
+        self._last_hash: int | None = None
+        self.stats = {"received": 0, "dropped": 0, "skipped": 0, "identified": 0}
+
+    def offer(self, frame: bytes) -> None:
+        """Newest frame wins: an unprocessed pending frame is dropped, not queued."""
+        self.stats["received"] += 1
+        if self._pending is not None:
+            self.stats["dropped"] += 1
+        self._pending = frame
+        self._ready.set()
+
+    def _identify(self, image: Image.Image) -> tuple[list[dict], object]:
+        box = self._engine.locate(image)
+        return self._engine.identify(image, box=box, shard=self._shard), box
+
+    async def process(self, frame: bytes) -> dict | None:
+        """Identify one frame -> message, or None if it was unreadable / unchanged."""
+        try:
+            image = await asyncio.to_thread(lambda: Image.open(io.BytesIO(frame)).convert("RGB"))
+        except Exception:  # noqa: BLE001 — a torn frame is just skipped
+            self.stats["skipped"] += 1
+            return None
+        h = dhash(image)
+        if self._last_hash is not None and hamming(h, self._last_hash) <= self.diff_bits:
+            self.stats["skipped"] += 1
+            return None
+        t0 = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        ranked, box = await loop.run_in_executor(self._executor, self._identify, image)
+        self._last_hash = h
+        self.stats["identified"] += 1
+        return {
+            "candidates": self._smoother.update(ranked),
+            "raw": ranked,
+            "box": box,
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+            **self.stats,
+        }
+
+    async def _read(self, receive) -> None:
+        while True:
+            self.offer(await receive())
+
+    async def run(self, receive, send) -> None:
+        """Pump frames from `receive()` and push messages via `send(dict)` until the
+        receiver ends (client disconnect)."""
+        reader = asyncio.create_task(self._read(receive))
+        try:
+            while True:
+                waiter = asyncio.create_task(self._ready.wait())
+                done, _ = await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if waiter not in done:
+                    waiter.cancel()
+                    break
+                self._ready.clear()
+                frame, self._pending = self._pending, None
+                if frame is None:
+                    continue
+                msg = await self.process(frame)
+                if msg is not None:
+                    await send(msg)
+        finally:
+            reader.cancel()
+            if reader.done() and not reader.cancelled():
+                reader.exception()  # disconnect ends the session; don't log it as unhandled
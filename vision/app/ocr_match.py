@@ -0,0 +1,170 @@
+"""Product-level OCR matcher: score OCR text against every product's signature tokens.
+
+Complements the Bose lexicon in label_ocr.py (a hand-written model regex list) with
+a matcher built straight from product names, so it covers whatever is enrolled.
+Model codes (AWRCC1 vs AWRCC2, VCS-10, AV35) and generation markers (III/IV) carry
+almost all the discriminative weight.
+
+Scoring is driven by inverted indexes, so a call only touches products that share a
+token with the OCR text instead of every product x every token:
+
+  * weak tokens (product-line words, short digits): whole-token postings, looked up
+    per OCR token;
+  * strong model codes: substring matches in the concatenated text (OCR may split
+    "AWRCC1" as "AWR CC1"), indexed by each code's rarest character 3-gram and
+    verified with a substring check;
+  * OCR confusions (1/I/L, 0/O/D/Q, 2/Z, 5/S, 8/B, 6/G) are folded to one symbol on
+    both sides, i.e. an edit distance where those substitutions cost nothing. A code
+    only found after folding scores a little less than an exact read, so AWRCCZ still
+    lands on AWRCC2 but never outranks a clean AWRCC2.
+
+Shared by the service and scripts/ocr_identify.py.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+
+# Map IV/III/II <-> digits both ways so "Wave III" matches "Wave 3".
+_ROMAN = {"III": "3", "IV": "4", "II": "2", "VI": "6", "V": "5"}
+
+STRONG = 10          # weight of a full model code
+_FOLDED_PENALTY = 2  # a code read only through OCR-confusion folding
+_FOLD_MIN = 4        # 3-char codes (251, 321) fold into too many serial-number reads
+_GRAM = 3
+
+_FOLD = str.maketrans({"I": "1", "L": "1", "O": "0", "D": "0", "Q": "0",
+                       "Z": "2", "S": "5", "B": "8", "G": "6"})
+
+
+def normalize(text: str) -> tuple[str, str]:
+    """Return (spaced-uppercase-tokens, concatenated-alnum) forms of OCR text."""
+    up = text.upper()
+    for r, d in _ROMAN.items():
+        up = re.sub(rf"\b{r}\b", d, up)
+    spaced = re.sub(r"[^A-Z0-9]+", " ", up).strip()
+    concat = re.sub(r"[^A-Z0-9]+", "", up)
+    return spaced, concat
+
+
+def fold(s: str) -> str:
+    """Collapse OCR-confusable characters to one canonical symbol each."""
+    return s.translate(_FOLD)
+
+
+def signature(name: str) -> dict[str, int]:
+    """Weighted signature tokens for a product name. Model codes dominate."""
+    spaced, _ = normalize(name)
+    sig: dict[str, int] = {}
+    for tok in spaced.split():
+        if len(tok) < 2:
+            continue
+        has_digit = any(c.isdigit() for c in tok)
+        if has_digit and len(tok) >= 3:
+            sig[tok] = STRONG      # strong model code: AWRCC1, AWRC1G, VCS10, AV35, 251
+        elif has_digit:
+            sig[tok] = 5           # short code/generation digit: 2, 5, 10, 3, 4
+        elif tok in {"SOUNDDOCK", "SOUNDTOUCH", "COMPANION", "LIFESTYLE", "ACOUSTIMASS",
+                      "SOUNDLINK", "CINEMATE", "SOLO", "VCS"}:
+            sig[tok] = 4           # product-line words
+        elif tok in {"WAVE", "RADIO", "MUSIC", "SYSTEM", "SPEAKER", "ENVIRONMENTAL",
+                      "OUTDOOR", "CENTER", "CHANNEL", "TV", "CONSOLE", "CD"}:
+            sig[tok] = 1
+    return sig
+
+
+def load_names(data_dir: Path) -> dict[str, str]:
+    """zoho_item_id -> product name, from the dataset manifest (or NAS pairing)."""
+    for f in ["dataset_manifest.json", "nas_pairing.json"]:
+        p = Path(data_dir) / f
+        if p.exists():
+            doc = json.loads(p.read_text())
+            return {x["zoho_item_id"]: (x.get("name") or x["zoho_item_id"])
+                    for x in doc.get("products", [])}
+    return {}
+
+
+def _grams(s: str) -> set[str]:
+    return {s[i:i + _GRAM] for i in range(len(s) - _GRAM + 1)}
+
+
+class _CodeIndex:
+    """Strong codes keyed by their rarest 3-gram; exact substring verification."""
+
+    def __init__(self, codes: dict[str, list[tuple[str, int]]]) -> None:
+        self.codes = codes
+        df: dict[str, int] = defaultdict(int)
+        for code in codes:
+            for g in _grams(code):
+                df[g] += 1
+        self.by_gram: dict[str, list[str]] = defaultdict(list)
+        for code in codes:
+            key = min(_grams(code), key=lambda g: (df[g], g))
+            self.by_gram[key].append(code)
+
+    def hits(self, concat: str) -> list[str]:
+        out: list[str] = []
+        for g in _grams(concat):
+            for code in self.by_gram.get(g, ()):
+                if code in concat:
+                    out.append(code)
+        return out
+
+
+class OcrMatcher:
+    def __init__(self, product_ids: list[str], names: dict[str, str]):
+        self.names = names
+        self.sigs = {pid: signature(names.get(pid, pid)) for pid in product_ids}
+        weak: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        strong: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        folded: dict[str, list[tuple[str, int]]] = defaultdict(list)
+        for pid, sig in self.sigs.items():
+            for tok, w in sig.items():
+                if w >= STRONG:
+                    strong[tok].append((pid, w))
+                    if len(tok) >= _FOLD_MIN:
+                        folded[fold(tok)].append((pid, w - _FOLDED_PENALTY))
+                else:
+                    weak[tok].append((pid, w))
+        self._weak = dict(weak)
+        self._strong = _CodeIndex(dict(strong))
+        self._folded = _CodeIndex(dict(folded))
+
+    def _scores(self, ocr_text: str, only=None) -> dict[str, int]:
+        spaced, concat = normalize(ocr_text)
+        scores: dict[str, int] = defaultdict(int)
+        for tok in set(spaced.split()):
+            for pid, w in self._weak.get(tok, ()):
+                scores[pid] += w
+        exact: set[tuple[str, str]] = set()
+        for code in self._strong.hits(concat):
+            for pid, w in self._strong.codes[code]:
+                scores[pid] += w
+                exact.add((pid, fold(code)))
+        for code in self._folded.hits(fold(concat)):
+            for pid, w in self._folded.codes[code]:
+                if (pid, code) not in exact:
+                    scores[pid] += w
+        if only is not None:
+            only = set(only)
+            return {pid: v for pid, v in scores.items() if pid in only}
+        return scores
+
+    def score(self, ocr_text: str, only=None) -> list[tuple[str, int]]:
+        """Products sharing at least one signature token with the text, desc by
+        score. Products that score 0 are omitted; `only` limits the candidates to
+        those product ids (e.g. a receiving session's allow-list)."""
+        return sorted(self._scores(ocr_text, only).items(), key=lambda x: x[1], reverse=True)
+
+    def predict(self, ocr_text: str, min_score: int = 10, only=None) -> tuple[str | None, int, int]:
+        top2 = heapq.nlargest(2, self._scores(ocr_text, only).items(), key=lambda x: x[1])
+        if not top2:
+            return None, 0, 0
+        top_id, top = top2[0]
+        second = top2[1][1] if len(top2) > 1 else 0
+        if top < min_score or top == second:   # need a confident, unambiguous winner
+            return None, top, second
+        return top_id, top, second
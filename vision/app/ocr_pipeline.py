@@ -0,0 +1,173 @@
+"""Batched, prefetching OCR driver for the dataset scripts.
+
+Reading a dataset one `readtext(path)` at a time leaves the GPU idle while a thread
+decodes, EXIF-transposes and downsizes the next JPEG, and leaves the CPU idle while
+EasyOCR runs. Here a small thread pool does the CPU half ahead of time:
+
+    paths -> [workers: read bytes, hash, store lookup, decode, prepare()]
+          -> bounded queue -> [main thread: batched detect + recognize] -> results
+
+  * A store hit (ocr_store.OcrStore, keyed by file content hash) is answered on the
+    worker without decoding, so a rerun after an interruption resumes where it
+    stopped — every fresh result was written as it was produced.
+  * Misses are grouped by prepared shape (phone photos mostly share one), so
+    detection runs on a stacked batch; recognition batches each image's text crops.
+  * The bounded queue caps memory; `every` controls the progress/throughput line.
+
+Used by ocr_extract, ocr_identify and ocr_dump. Results arrive roughly, not
+strictly, in input order.
+"""
+from __future__ import annotations
+
+import io
+import queue
+import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from PIL import Image
+
+from .ocr_store import content_hash
+
+_DONE = object()
+IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def dataset_images(root: Path, exts: set[str] = IMG_EXT) -> Iterator[Path]:
+    """root/<sku>/<image> paths in sorted order (the data/train, data/eval layout)."""
+    for sku_dir in sorted(Path(root).iterdir()):
+        if not sku_dir.is_dir():
+            continue
+        for img in sorted(sku_dir.iterdir()):
+            if img.suffix.lower() in exts:
+                yield img
+
+
+class OcrPipeline:
+    def __init__(
+        self,
+        identifier,
+        *,
+        workers: int = 4,
+        prefetch: int = 32,
+        batch: int = 8,
+        every: int = 100,
+        log=sys.stderr,
+    ) -> None:
+        self.li = identifier
+        self.workers = max(1, workers)
+        self.prefetch = max(batch, prefetch)
+        self.batch = max(1, batch)
+        self.every = every
+        self.log = log
+        self.stats = {"images": 0, "cached": 0, "ocr": 0, "errors": 0, "seconds": 0.0}
+
+    # ---- CPU side (worker threads) ------------------------------------------
+    def _load(self, path: Path):
+        """-> (path, text, None) on a store hit / error, else (path, None, (arr, digest))."""
+        try:
+            data = path.read_bytes()
+            digest = content_hash(data)
+            hit = self.li.lookup(digest)
+            if hit is not None:
+                return path, hit[0], None
+            with Image.open(io.BytesIO(data)) as im:
+                return path, None, (self.li.prepare(im), digest)
+        except Exception as exc:  # noqa: BLE001 — unreadable file reads as "", keep going
+            return path, "", exc
+
+    def _feed(self, paths: Iterable[Path], todo: queue.Queue) -> None:
+        for p in paths:
+            todo.put(Path(p))
+        for _ in range(self.workers):
+            todo.put(_DONE)
+
+    def _work(self, todo: queue.Queue, ready: queue.Queue) -> None:
+        while True:
+            p = todo.get()
+            if p is _DONE:
+                ready.put(_DONE)
+                return
+            ready.put(self._load(p))
+
+    # ---- GPU side (caller's thread) -----------------------------------------
+    def _flush(self, pending: list) -> list[tuple[Path, str]]:
+        arrs = [a for _, (a, _) in pending]
+        digests = [d for _, (_, d) in pending]
+        paths = [p for p, _ in pending]
+        try:
+            texts = self.li.read_arrays(arrs, digests, paths)
+        except Exception:  # noqa: BLE001 — one bad image must not sink the batch
+            texts = []
+            for arr, d, p in zip(arrs, digests, paths):
+                try:
+                    texts.extend(self.li.read_arrays([arr], [d], [p]))
+                except Exception:  # noqa: BLE001
+                    self.stats["errors"] += 1
+                    texts.append("")
+        self.stats["ocr"] += len(pending)
+        return list(zip(paths, texts))
+
+    def run(self, paths: Iterable[Path]) -> Iterator[tuple[Path, str]]:
+        """Yield (path, ocr_text) for every path. Unreadable images yield ""."""
+        self.stats = {"images": 0, "cached": 0, "ocr": 0, "errors": 0, "seconds": 0.0}
+        todo: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        ready: queue.Queue = queue.Queue(maxsize=self.prefetch)
+        threads = [threading.Thread(target=self._feed, args=(paths, todo), daemon=True)]
+        threads += [threading.Thread(target=self._work, args=(todo, ready), daemon=True)
+                    for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+
+        t0 = time.perf_counter()
+        buckets: dict[tuple, list] = {}
+        live = self.workers
+        while live or buckets:
+            item = None
+            if live:
+                try:
+                    # Don't sit on a partial batch while the GPU is free.
+                    item = ready.get(timeout=0.05 if buckets else None)
+                except queue.Empty:
+                    item = None
+            if item is _DONE:
+                live -= 1
+                item = None
+            if item is not None:
+                path, text, payload = item
+                if text is not None:
+                    self.stats["cached" if payload is None else "errors"] += 1
+                    yield from self._emit([(path, text)], t0)
+                    continue
+                shape = payload[0].shape
+                buckets.setdefault(shape, []).append((path, payload))
+                if len(buckets[shape]) < self.batch:
+                    continue
+                yield from self._emit(self._flush(buckets.pop(shape)), t0)
+            elif buckets:
+                # Queue drained (or input done): run the fullest partial batch.
+                shape = max(buckets, key=lambda s: len(buckets[s]))
+                yield from self._emit(self._flush(buckets.pop(shape)), t0)
+        self.stats["seconds"] = time.perf_counter() - t0
+        self._report(final=True)
+
+    def _emit(self, results, t0: float) -> Iterator[tuple[Path, str]]:
+        for r in results:
+            self.stats["images"] += 1
+            self.stats["seconds"] = time.perf_counter() - t0
+            if self.every and self.stats["images"] % self.every == 0:
+                self._report()
+            yield r
+
+    def _report(self, final: bool = False) -> None:
+        s = self.stats
+        rate = s["images"] / s["seconds"] if s["seconds"] else 0.0
+        ocr_rate = s["ocr"] / s["seconds"] if s["seconds"] else 0.0
+        tag = "done" if final else "..."
+        print(
+            f"  {tag} {s['images']} images  ({s['cached']} stored, {s['ocr']} OCR'd, "
+            f"{s['errors']} errors)  {rate:.1f} img/s  ({ocr_rate:.1f} OCR img/s)",
+            file=self.log, flush=True,
+        )
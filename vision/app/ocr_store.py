@@ -0,0 +1,147 @@
+"""Persistent OCR result store shared by the service and the dataset scripts.
+
+OCR is the expensive step (seconds per photo on a busy box), and the same photo gets
+read again and again: ocr_extract reruns, ocr_identify evals, golden tests, a frame
+re-posted to /identify-label. Results are keyed by
+
+    (sha256 of the image FILE bytes, OCR settings key)
+
+so a moved/renamed file still hits, and changing anything that alters the read
+(orientation handling, downscale size, EasyOCR version) misses cleanly instead of
+serving stale text. No more path + "+r180" suffix keys.
+
+Backed by one SQLite file in WAL mode (stdlib, embedded): every put is a small
+incremental write (no full re-serialize every 100 images), readers don't block the
+writer or each other, and `iter_texts` streams rows off a cursor instead of loading
+the whole cache into memory. Connections are per-thread so the FastAPI worker
+threads can share one store.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+MAX_SIDE = 2000  # LabelIdentifier downscale; part of the settings key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr (
+    content_hash TEXT NOT NULL,
+    settings     TEXT NOT NULL,
+    text         TEXT NOT NULL,
+    rotation     INTEGER NOT NULL DEFAULT 0,
+    path         TEXT,
+    created_at   REAL NOT NULL,
+    PRIMARY KEY (content_hash, settings)
+)
+"""
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def settings_key(auto_orient: bool, max_side: int = MAX_SIDE) -> str:
+    """Everything that changes what OCR returns for the same bytes."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        engine = f"easyocr-{version('easyocr')}"
+    except PackageNotFoundError:
+        engine = "easyocr-unknown"
+    return f"{engine}|orient={int(auto_orient)}|max={max_side}"
+
+
+class OcrStore:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, digest: str, key: str) -> tuple[str, int] | None:
+        """(text, rotation) for this content under these settings, or None."""
+        row = self._conn().execute(
+            "SELECT text, rotation FROM ocr WHERE content_hash = ? AND settings = ?", (digest, key)
+        ).fetchone()
+        return (row[0], int(row[1])) if row else None
+
+    def put(self, digest: str, key: str, text: str, *, rotation: int = 0, path: str | None = None) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ocr (content_hash, settings, text, rotation, path, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, key, text, rotation, path, time.time()),
+            )
+
+    def iter_texts(self, key: str | None = None) -> Iterator[tuple[str, str]]:
+        """Stream (path-or-hash, text) for one settings key (or all of them)."""
+        sql = "SELECT COALESCE(path, content_hash), text FROM ocr"
+        args: tuple = ()
+        if key is not None:
+            sql += " WHERE settings = ?"
+            args = (key,)
+        # Own connection: a long iteration must not hold the thread's write handle.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            yield from conn.execute(sql, args)
+        finally:
+            conn.close()
+
+    def count(self, key: str | None = None) -> int:
+        if key is None:
+            return self._conn().execute("SELECT COUNT(*) FROM ocr").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM ocr WHERE settings = ?", (key,)).fetchone()[0]
+
+    def import_json_cache(self, cache_path: Path, key: str) -> int:
+        """One-shot migration of the old `{path[+r180]: text}` ocr_cache.json into
+        settings `key` — pass the reader's current settings_key, so LabelIdentifier
+        and the scripts actually find the rows. Entries whose file still exists are
+        re-keyed by content hash. The old reads were never auto-oriented (plain, or
+        with EasyOCR's extra 180° pass, which wins when a file has both) and are
+        stored with rotation 0; rows already in the store for `key` are kept.
+        Returns rows imported."""
+        cache: dict[str, str] = json.loads(Path(cache_path).read_text())
+        reads: dict[str, tuple[str, bool]] = {}  # path -> (text, rotated pass)
+        for raw_key, text in cache.items():
+            path, sep, angle = raw_key.rpartition("+r")
+            rotated = bool(sep) and angle.isdigit()
+            if not rotated:
+                path = raw_key  # a "+" that belongs to the file name
+            if rotated or path not in reads:
+                reads[path] = (text, rotated)
+        n = 0
+        with self._conn() as conn:
+            for path, (text, _) in reads.items():
+                p = Path(path)
+                if not p.exists():
+                    continue
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO ocr (content_hash, settings, text, rotation, path, created_at) "
+                    "VALUES (?, ?, ?, 0, ?, ?)",
+                    (file_hash(p), key, text, path, time.time()),
+                )
+                n += cur.rowcount
+        return n
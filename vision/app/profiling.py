@@ -0,0 +1,211 @@
+"""Opt-in profiling of slow requests, cheap enough to leave on in production.
+
+A 5-second /analyze says nothing about *where* the 5 seconds went. With
+PROFILE_SLOW_MS set, a PROFILE_SAMPLE_RATE fraction of requests (or any request
+carrying `X-Profile: 1`) is profiled while it runs:
+
+  * a Python stack sampler (every PROFILE_INTERVAL_MS, all threads — the handler,
+    the analyze OCR pool, the live inference pool) -> stacks.folded, ready for
+    flamegraph.pl / speedscope;
+  * `model_span` timings around the request's own model calls (embed, detect,
+    OCR detect / recognize) -> spans.json, with the thread each ran on. Spans are
+    attributed through a contextvar set by `recording`, so they follow the request
+    into tasks and threadpool calls (copy the context into bare executors) and
+    concurrent requests don't see each other's timings;
+  * with torch loaded, a torch.profiler trace of the same window (one request at a
+    time; the profiler is process-global) -> torch_trace.json for Perfetto /
+    chrome://tracing, with the model spans labelled via record_function.
+
+Only requests that end up slower than PROFILE_SLOW_MS (or were forced) are written,
+each to its own directory under PROFILE_DIR; the oldest are deleted past
+PROFILE_KEEP. Outside a profiled request `model_span` is one contextvar lookup.
+The stack sampler is process-wide: a concurrent request's threads show up in it.
+"""
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import random
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+_current: contextvars.ContextVar["RequestProfile | None"] = contextvars.ContextVar("request_profile", default=None)
+_torch_busy = threading.Lock()  # torch.profiler can't nest across requests
+
+
+@contextlib.contextmanager
+def model_span(name: str):
+    """Time a model call into the current request's RequestProfile (and label it
+    in the torch trace). A no-op outside `recording`."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    torch = sys.modules.get("torch")
+    label = torch.autograd.profiler.record_function(name) if torch is not None else contextlib.nullcontext()
+    t0 = time.perf_counter()
+    try:
+        with label:
+            yield
+    finally:
+        t1 = time.perf_counter()
+        profile.spans.append({  # list.append is atomic; spans may come from several threads
+            "name": name,
+            "thread": threading.current_thread().name,
+            "start_ms": round((t0 - profile.t0) * 1000, 2),
+            "ms": round((t1 - t0) * 1000, 2),
+        })
+
+
+@contextlib.contextmanager
+def recording(profile: "RequestProfile | None"):
+    """Attribute `model_span`s in this context — and in tasks and threadpool calls
+    started from it — to `profile` (None: record nothing)."""
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+class StackSampler:
+    """Background thread that samples every other thread's Python stack into
+    collapsed "thread;outer;...;inner" -> count lines."""
+
+    def __init__(self, interval_s: float = 0.005) -> None:
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval_s):
+            for t in threading.enumerate():
+                names[t.ident] = t.name
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.counts.most_common())
+
+
+class RequestProfile:
+    """Sampler + model spans (+ torch trace) for one request's lifetime."""
+
+    def __init__(self, label: str, *, interval_s: float = 0.005, torch_trace: bool = True) -> None:
+        self.label = label
+        self.t0 = time.perf_counter()
+        self.spans: list[dict] = []
+        self.sampler = StackSampler(interval_s)
+        self._want_torch = torch_trace
+        self._torch_prof = None
+
+    def start(self) -> "RequestProfile":
+        self.t0 = time.perf_counter()
+        torch = sys.modules.get("torch")  # only when the models are already loaded
+        if self._want_torch and torch is not None and _torch_busy.acquire(blocking=False):
+            try:
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                self._torch_prof = torch.profiler.profile(activities=activities)
+                self._torch_prof.__enter__()
+            except Exception:  # noqa: BLE001 — profiling must never fail the request
+                self._torch_prof = None
+                _torch_busy.release()
+        self.sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self.sampler.stop()
+        if self._torch_prof is not None:
+            try:
+                self._torch_prof.__exit__(None, None, None)
+            finally:
+                _torch_busy.release()
+
+    def write(self, out: Path, meta: dict) -> None:
+        out.mkdir(parents=True, exist_ok=True)
+        (out / "stacks.folded").write_text(self.sampler.folded())
+        (out / "spans.json").write_text(json.dumps(
+            {**meta, "samples": self.sampler.samples, "spans": self.spans}, indent=2
+        ))
+        if self._torch_prof is not None:
+            self._torch_prof.export_chrome_trace(str(out / "torch_trace.json"))
+
+
+class Profiler:
+    """Decides which requests to profile and which profiles to keep.
+
+    `slow_ms` 0 disables sampling (forced requests are still honored);
+    `sample_rate` is the fraction of requests profiled; `keep` bounds the number of
+    dump directories under `root`.
+    """
+
+    def __init__(
+        self, root: Path, *, slow_ms: float, sample_rate: float, keep: int = 50,
+        interval_ms: float = 5.0, seed: int | None = None,
+    ) -> None:
+        self.root = Path(root)
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.interval_s = interval_ms / 1000
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # end() runs on worker threads
+        self.written = 0
+
+    def begin(self, label: str, forced: bool = False) -> RequestProfile | None:
+        if not forced and not (self.slow_ms > 0 and self._rng.random() < self.sample_rate):
+            return None
+        return RequestProfile(label, interval_s=self.interval_s).start()
+
+    def end(self, profile: RequestProfile | None, elapsed_ms: float, forced: bool = False) -> str | None:
+        """Stop `profile`; write it if the request was slow (or forced). -> dump name.
+        Blocking (sampler join, file writes, torch trace export): call it off the
+        event loop."""
+        if profile is None:
+            return None
+        profile.stop()
+        if not forced and elapsed_ms < self.slow_ms:
+            return None
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", profile.label).strip("-")[:40] or "request"
+        with self._lock:
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{int(elapsed_ms)}ms-{self._rng.randrange(16**4):04x}"
+        profile.write(self.root / name, {"request": profile.label, "elapsed_ms": round(elapsed_ms, 1), "forced": forced})
+        with self._lock:
+            self.written += 1
+            self._rotate()
+        return name
+
+    def _rotate(self) -> None:
+        dumps = sorted((d for d in self.root.iterdir() if d.is_dir()), key=lambda d: d.stat().st_mtime)
+        for old in dumps[: max(0, len(dumps) - self.keep)]:
+            shutil.rmtree(old, ignore_errors=True)
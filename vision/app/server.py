@@ -4,19 +4,39 @@ same shape as the NAS photo PUT) and gets ranked SKU candidates back.
 from __future__ import annotations
 
 import io
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import Depends, FastAPI, File, Form, Header, HTTPException, UploadFile
+from fastapi import (
+    Depends, FastAPI, File, Form, Header, HTTPException, Request, Response, UploadFile, WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from PIL import Image
+from pydantic import BaseModel
 
 from .config import settings
 from .engine import get_engine
+from .ocr_store import content_hash
+from .profiling import Profiler, recording
+from .sessions import SessionRegistry
 
 app = FastAPI(title="USAV Vision", version="0.1.0")
 
 # Lazy singleton — EasyOCR + models load on first /identify-label call, not at import.
 _label_identifier = None
 _photo_analyzer = None
+_cascade = None
+_live_pool = None
+_sessions = SessionRegistry(ttl_s=settings.session_ttl)
+_profiler = Profiler(
+    settings.profile_path,
+    slow_ms=settings.profile_slow_ms,
+    sample_rate=settings.profile_sample_rate,
+    keep=settings.profile_keep,
+    interval_ms=settings.profile_interval_ms,
+)
 
 
 def get_label_identifier():
@@ -24,9 +44,14 @@ def get_label_identifier():
     if _label_identifier is None:
         from .label_ocr import LabelIdentifier
 
+        from .ocr_store import OcrStore
+
         device = settings.device
         use_gpu = device != "cpu"  # "auto"/"cuda" -> GPU; EasyOCR falls back if absent
-        _label_identifier = LabelIdentifier(gpu=use_gpu)
+        store = OcrStore(settings.ocr_store_file) if settings.ocr_cache else None
+        _label_identifier = LabelIdentifier(
+            gpu=use_gpu, auto_orient=settings.ocr_auto_orient, store=store
+        )
     return _label_identifier
 
 
@@ -39,55 +64,204 @@ def get_photo_analyzer():
         _photo_analyzer = PhotoAnalyzer(get_engine(), get_label_identifier())
     return _photo_analyzer
 
+
+def get_cascade():
+    """Shared IdentifyCascade — EasyOCR still loads only when a request needs it."""
+    global _cascade
+    if _cascade is None:
+        from .cascade import IdentifyCascade
+        from .ocr_match import load_names
+
+        _cascade = IdentifyCascade(
+            get_engine(),
+            get_label_identifier,
+            load_names(settings.data_path),
+            threshold=settings.cascade_margin,
+            top_k=settings.top_k,
+        )
+    return _cascade
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
 )
 
 
+@app.middleware("http")
+async def _profile_slow(request: Request, call_next):
+    """Sampled / `X-Profile: 1` requests run under the profiler; slow ones are
+    written to PROFILE_DIR and named in the response's X-Profile header."""
+    forced = request.headers.get("x-profile") == "1" and (
+        not settings.vision_token or request.headers.get("x-vision-token") == settings.vision_token
+    )
+    profile = _profiler.begin(f"{request.method} {request.url.path}", forced)
+    if profile is None:
+        return await call_next(request)
+    t0 = time.perf_counter()
+    try:
+        with recording(profile):
+            response = await call_next(request)
+    except Exception:
+        await run_in_threadpool(_profiler.end, profile, (time.perf_counter() - t0) * 1000, forced)
+        raise
+    name = await run_in_threadpool(_profiler.end, profile, (time.perf_counter() - t0) * 1000, forced)
+    if name:
+        response.headers["X-Profile"] = name
+    return response
+
+
+def get_live_pool() -> ThreadPoolExecutor:
+    """Inference pool shared by every /identify-live connection: bounds GPU load."""
+    global _live_pool
+    if _live_pool is None:
+        _live_pool = ThreadPoolExecutor(max_workers=max(1, settings.live_workers), thread_name_prefix="live")
+    return _live_pool
+
+
 def _check_token(x_vision_token: str | None) -> None:
     if settings.vision_token and x_vision_token != settings.vision_token:
         raise HTTPException(status_code=401, detail="invalid vision token")
 
 
-async def _read_image(file: UploadFile) -> Image.Image:
+async def _read_upload(file: UploadFile) -> tuple[Image.Image, bytes]:
     raw = await file.read()
     if not raw:
         raise HTTPException(status_code=400, detail="empty file")
     try:
-        return Image.open(io.BytesIO(raw))
+        return Image.open(io.BytesIO(raw)), raw
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=400, detail=f"unreadable image: {exc}") from exc
 
 
+async def _read_image(file: UploadFile) -> Image.Image:
+    return (await _read_upload(file))[0]
+
+
+def _allow_list(skus: str | None, session: str | None) -> list[str] | None:
+    """`?skus=A,B,C` or `?session=<id>` -> SKU allow-list (None = whole catalog)."""
+    if session:
+        allowed = _sessions.get(session)
+        if allowed is None:
+            raise HTTPException(status_code=404, detail="unknown or expired session")
+        return allowed
+    if skus:
+        return [s.strip() for s in skus.split(",") if s.strip()] or None
+    return None
+
+
+def _shard(x_tenant: str | None, x_brand: str | None = None):
+    """`X-Tenant` / `X-Brand` headers -> that tenant's index shard (global if absent),
+    as a context manager: `with _shard(...) as shard:` keeps it resident (not
+    evictable) for the rest of the request."""
+    try:
+        return get_engine().use_shard(x_tenant, x_brand)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
 @app.on_event("startup")
 def _warm() -> None:
     get_engine()  # load model + index up front
 
 
 @app.get("/health")
-def health() -> dict:
-    return {"ok": True, **get_engine().status()}
+def health(x_tenant: str | None = Header(default=None), x_brand: str | None = Header(default=None)) -> dict:
+    with _shard(x_tenant, x_brand) as shard:
+        return {"ok": True, **get_engine().status(shard)}
 
 
 @app.post("/identify")
 async def identify(
     file: UploadFile = File(...),
+    skus: str | None = None,
+    session: str | None = None,
     x_vision_token: str | None = Header(default=None),
+    x_tenant: str | None = Header(default=None),
+    x_brand: str | None = Header(default=None),
 ) -> dict:
+    """Ranked SKU candidates. `skus` (comma-separated) or `session` (see /sessions)
+    restricts the search to the expected SKUs; `scope` says whether that allow-list
+    answered or the whole catalog did because nothing in it cleared
+    ALLOWLIST_MIN_SCORE ("fallback"). `X-Tenant` / `X-Brand` pick the tenant's shard.
+    """
+    _check_token(x_vision_token)
+    allowed = _allow_list(skus, session)
+    with _shard(x_tenant, x_brand) as shard:
+        image = await _read_image(file)
+        engine = get_engine()
+        box = engine.locate(image)
+        candidates, info = engine.identify_ranked(image, box=box, skus=allowed, shard=shard)
+    return {"candidates": candidates, "box": box, "scope": info["scope"]}
+
+
+class SessionIn(BaseModel):
+    skus: list[str]
+    session_id: str | None = None
+
+
+@app.post("/sessions")
+def create_session(body: SessionIn, x_vision_token: str | None = Header(default=None)) -> dict:
+    """Register a receiving session's expected SKUs (from the PO). Returns the id to
+    pass as `?session=` to /identify and /identify-cascade."""
     _check_token(x_vision_token)
-    image = await _read_image(file)
-    candidates = get_engine().identify(image)
-    return {"candidates": candidates}
+    sid = _sessions.create(body.skus, body.session_id)
+    return {"session": sid, "skus": _sessions.get(sid), "ttl_s": settings.session_ttl}
+
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str, x_vision_token: str | None = Header(default=None)) -> dict:
+    _check_token(x_vision_token)
+    return {"deleted": _sessions.delete(session_id)}
+
+
+@app.websocket("/identify-live")
+async def identify_live(
+    ws: WebSocket, token: str | None = None, tenant: str | None = None, brand: str | None = None
+) -> None:
+    """Live suggestions for the bench camera. The client sends binary messages, each
+    a small JPEG/WebP frame (~320-480px is plenty), as fast as it likes; the server
+    replies with JSON `{ candidates (smoothed), raw, box, ms, received, dropped,
+    skipped, identified }` for each frame it actually identifies. Stale frames are
+    dropped and unchanged ones skipped (see live.py). Browsers can't set headers on
+    a WebSocket, so the token and tenant may also come as `?token=` / `?tenant=` /
+    `?brand=`.
+    """
+    if settings.vision_token and settings.vision_token not in (token, ws.headers.get("x-vision-token")):
+        await ws.close(code=1008)
+        return
+    from .live import LiveSession
+
+    try:
+        lease = get_engine().use_shard(
+            tenant or ws.headers.get("x-tenant"), brand or ws.headers.get("x-brand")
+        )
+    except ValueError:
+        await ws.close(code=1008)
+        return
+    with lease as shard:  # resident for the whole session
+        await ws.accept()
+        session = LiveSession(
+            get_engine(),
+            get_live_pool(),
+            diff_bits=settings.live_diff_bits,
+            alpha=settings.live_alpha,
+            top_k=settings.top_k,
+            shard=shard,
+        )
+        try:
+            await session.run(ws.receive_bytes, ws.send_json)
+        except WebSocketDisconnect:
+            pass
 
 
 @app.post("/identify-label")
 async def identify_label(
     file: UploadFile = File(...),
     strict: bool = True,
+    progressive: bool | None = None,
     x_vision_token: str | None = Header(default=None),
 ) -> dict:
     """Read the Bose model off a product-label photo. The browser posts a deliberate
@@ -95,28 +269,78 @@ async def identify_label(
     canonical model string (or null) — the Vercel side resolves it to a sku_catalog
     row. `strict=true` (default) only returns a model when a real product label is
     seen (anchor present, no paperwork), so the UI can trust it for auto-fill.
+    `progressive` (default OCR_PROGRESSIVE) stops OCR at the first strict match and
+    reports regions_processed / regions_total. With USE_DETECTOR the read is limited to
+    the detected product and its `box` is returned.
     """
     _check_token(x_vision_token)
-    image = await _read_image(file)
-    result = get_label_identifier().identify(image, strict=strict)
-    return result
+    image, raw = await _read_upload(file)
+    if progressive is None:
+        progressive = settings.ocr_progressive
+    box = get_engine().locate(image)
+    result = get_label_identifier().identify(
+        image, strict=strict, progressive=progressive, content_hash=content_hash(raw), box=box
+    )
+    return {**result, "box": box}
+
+
+@app.post("/identify-cascade")
+async def identify_cascade(
+    file: UploadFile = File(...),
+    margin: float | None = None,
+    skus: str | None = None,
+    session: str | None = None,
+    x_vision_token: str | None = Header(default=None),
+    x_tenant: str | None = Header(default=None),
+    x_brand: str | None = Header(default=None),
+) -> dict:
+    """One round trip for receiving: DINOv2 candidates, and only when the top-1 /
+    top-2 margin is under `margin` (default CASCADE_MARGIN) the label is OCR'd and
+    fused into the ranking. `path` says which ran ("embed" or "ocr"). `skus` /
+    `session` restrict the embedding search, and `X-Tenant` / `X-Brand` pick the
+    shard, as on /identify.
+    """
+    _check_token(x_vision_token)
+    allowed = _allow_list(skus, session)
+    with _shard(x_tenant, x_brand) as shard:
+        image, raw = await _read_upload(file)
+        return get_cascade().identify(
+            image, content_hash=content_hash(raw), threshold=margin, skus=allowed, shard=shard
+        )
+
+
+@app.get("/identify-cascade/stats")
+def identify_cascade_stats(x_vision_token: str | None = Header(default=None)) -> dict:
+    """Share of requests that skipped OCR and p50/p95 latency per path."""
+    _check_token(x_vision_token)
+    return get_cascade().stats.snapshot()
 
 
 @app.post("/analyze")
 async def analyze(
+    response: Response,
     file: UploadFile = File(...),
     x_vision_token: str | None = Header(default=None),
+    x_tenant: str | None = Header(default=None),
+    x_brand: str | None = Header(default=None),
 ) -> dict:
     """Enrich a photo into catalog/claim metadata, on-prem. Returns the same shape
     as the cloud GCP-Vision path (`src/lib/photos/analyze.ts`):
     { ocr_text, labels, damage_detected, damage_notes, caption }. Used by the Vercel
     photo-analysis cron when an org selects the 'local-vision' provider, so its photos
     never leave the building. OCR (EasyOCR) + product labels (DINOv2 index) only — no
-    new model loaded.
+    new model loaded. Per-stage timings (decode / ocr / embed, run concurrently) go
+    out in a Server-Timing header so the body stays the cloud shape. Labels come from
+    the `X-Tenant` shard when the header is set.
     """
     _check_token(x_vision_token)
-    image = await _read_image(file)
-    return get_photo_analyzer().analyze(image)
+    with _shard(x_tenant, x_brand) as shard:
+        image = await _read_image(file)
+        meta, timing = get_photo_analyzer().analyze_timed(image, shard)
+    response.headers["Server-Timing"] = ", ".join(
+        f"{k.removesuffix('_ms')};dur={v}" for k, v in timing.items()
+    )
+    return meta
 
 
 @app.post("/enroll")
@@ -124,21 +348,55 @@ async def enroll(
     sku: str = Form(...),
     files: list[UploadFile] = File(...),
     x_vision_token: str | None = Header(default=None),
+    x_tenant: str | None = Header(default=None),
+    x_brand: str | None = Header(default=None),
 ) -> dict:
     _check_token(x_vision_token)
     sku = sku.strip()
     if not sku:
         raise HTTPException(status_code=400, detail="sku is required")
     engine = get_engine()
-    added = 0
-    for f in files:
-        image = await _read_image(f)
-        added += engine.enroll_image(sku, image)
-    return {"sku": sku, "added": added, **engine.status()}
+    with _shard(x_tenant, x_brand) as shard:
+        added = 0
+        for f in files:
+            image = await _read_image(f)
+            added += engine.enroll_image(sku, image, shard)
+        # Look-alikes already enrolled (ENROLL_COLLISION): the embedding alone will mix
+        # these up, so receiving should lean on the label for them.
+        collisions = await run_in_threadpool(engine.collisions, sku, shard) if added else []
+        return {"sku": sku, "added": added, "collisions": collisions, **engine.status(shard)}
+
+
+@app.get("/similarity")
+def similarity(
+    sku: str | None = None,
+    k: int = 10,
+    top: int = 50,
+    min_score: float | None = None,
+    x_vision_token: str | None = Header(default=None),
+    x_tenant: str | None = Header(default=None),
+    x_brand: str | None = Header(default=None),
+) -> dict:
+    """Visually similar SKUs from the stored vectors, no eval run needed: with `sku`,
+    its `k` nearest other SKUs; without, the `top` most similar pairs in the
+    catalog. Scores are the best cosine between any two reference photos."""
+    _check_token(x_vision_token)
+    with _shard(x_tenant, x_brand) as shard:
+        sim = get_engine().similarity(shard)
+    if sku is not None:
+        if sku not in sim.names:
+            raise HTTPException(status_code=404, detail=f"sku not enrolled: {sku}")
+        return {"sku": sku, "neighbors": sim.neighbors(sku, k, min_score)}
+    return {"skus": len(sim.names), "pairs": sim.pairs(top, min_score)}
 
 
 @app.post("/reindex")
-def reindex(x_vision_token: str | None = Header(default=None)) -> dict:
+def reindex(
+    x_vision_token: str | None = Header(default=None),
+    x_tenant: str | None = Header(default=None),
+    x_brand: str | None = Header(default=None),
+) -> dict:
     _check_token(x_vision_token)
-    added = get_engine().reindex()
-    return {"reindexed": added, **get_engine().status()}
+    with _shard(x_tenant, x_brand) as shard:
+        added = get_engine().reindex(shard)
+        return {"reindexed": added, **get_engine().status(shard)}
@@ -0,0 +1,60 @@
+"""Receiving sessions: a short-lived id -> expected-SKU allow-list.
+
+When a shipment is received the PO already says which handful of SKUs to expect. The
+Vercel side registers them once (POST /sessions) and the bench passes `?session=`
+on each identify, so the search only scans those SKUs (EmbeddingIndex.search
+`skus=`) and falls back to the whole catalog when none of them is a good match.
+
+In-memory and per-process: a restart just means the next identify 404s on the
+session and the client re-registers. Sessions expire after SESSION_TTL seconds of
+no use; the oldest are evicted past `max_sessions`.
+"""
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class SessionRegistry:
+    def __init__(self, ttl_s: float = 4 * 3600, max_sessions: int = 1000) -> None:
+        self.ttl_s = ttl_s
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, tuple[list[str], float]] = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        while self._items:
+            sid, (_, seen) = next(iter(self._items.items()))
+            if now - seen <= self.ttl_s and len(self._items) <= self.max_sessions:
+                break
+            del self._items[sid]
+
+    def create(self, skus: list[str], session_id: str | None = None) -> str:
+        """Register (or replace) an allow-list. Returns the session id."""
+        sid = session_id or secrets.token_urlsafe(9)
+        clean = sorted({s.strip() for s in skus if s and s.strip()})
+        with self._lock:
+            self._items.pop(sid, None)
+            self._items[sid] = (clean, time.monotonic())
+            self._expire(time.monotonic())
+        return sid
+
+    def get(self, session_id: str) -> list[str] | None:
+        """The session's SKUs (refreshing its TTL), or None if unknown / expired."""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            item = self._items.pop(session_id, None)
+            if item is None:
+                return None
+            self._items[session_id] = (item[0], now)
+            return item[0]
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._items.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._items)
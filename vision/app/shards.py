@@ -0,0 +1,215 @@
+"""Per-tenant (optionally per-brand) index shards, loaded lazily, LRU-bounded.
+
+Several orgs reach this box through the `local-vision` provider. One global index
+means every identify scans every tenant's catalog — one tenant's 50k-vector catalog
+slows everyone, and cross-tenant SKUs can outrank the right one. Requests carrying
+`X-Tenant` (and optionally `X-Brand`) are served from that tenant's shard instead:
+
+    data/tenants/<tenant>[/<brand>]/reference/<sku>/*.jpg   reference photos
+    data/tenants/<tenant>[/<brand>]/index/                  vectors.npy + skus.json
+
+Shards are stored grouped by SKU in plain .npy (EmbeddingIndex.save_dir) so a load
+is a memory map, not a parse: pages fault in as the shard is searched. A load runs
+outside the manager's lock (concurrent requests for the same cold shard wait for
+that one load; other tenants aren't blocked by it). At most MAX_RESIDENT_SHARDS
+stay resident; the least recently used one is dropped (its GPU mirror with it) —
+but never one still in use: requests, live sessions and enrolls hold a lease
+(`use`), and a leased shard stays resident even past the cap until released. So a
+second copy is never loaded next to one that an enroll may still write to, and as
+every enroll saves immediately, dropping an unleased shard loses nothing.
+Requests without a tenant use the original global index (INDEX_PATH).
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from .index import EmbeddingIndex
+
+_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+def shard_key(tenant: str | None, brand: str | None = None) -> str | None:
+    """'acme' / 'acme/bose' for a tenant (+ brand); None for the global index.
+    Raises ValueError on names that aren't safe path segments."""
+    if not tenant:
+        return None
+    parts = [tenant] + ([brand] if brand else [])
+    for part in parts:
+        if not _NAME.match(part) or ".." in part:
+            raise ValueError(f"invalid tenant/brand name: {part!r}")
+    return "/".join(parts)
+
+
+class ShardStats:
+    """Per-shard identify count and rolling latency."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._lock = threading.Lock()
+        self._ms: deque = deque(maxlen=window)
+        self.requests = 0
+        self.loads = 0
+        self.load_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self._ms.append(ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ms = np.asarray(self._ms, dtype="float64")
+            return {
+                "requests": self.requests,
+                "p50_ms": round(float(np.percentile(ms, 50)), 1) if ms.size else None,
+                "p95_ms": round(float(np.percentile(ms, 95)), 1) if ms.size else None,
+                "loads": self.loads,
+                "load_ms": round(self.load_ms, 1),
+            }
+
+
+class Shard:
+    """One catalog: its full-res index, optional low-res index and device mirrors.
+
+    `root` is the shard directory (None for the global index, which keeps its
+    original .npz files)."""
+
+    def __init__(
+        self,
+        key: str,
+        index: EmbeddingIndex,
+        lowres: EmbeddingIndex | None = None,
+        root: Path | None = None,
+        lowres_size: int = 0,
+    ) -> None:
+        self.key = key
+        self.index = index
+        self.lowres = lowres
+        self.root = root
+        self.lowres_size = lowres_size
+        self.mirrors: dict[str, object] = {}
+        self.similarity = None  # similarity.SkuSimilarity, loaded on first use
+        self.stats = ShardStats()
+
+    @property
+    def index_dir(self) -> Path | None:
+        return None if self.root is None else self.root / "index"
+
+    @property
+    def lowres_dir(self) -> Path | None:
+        return None if self.root is None else self.root / f"index.r{self.lowres_size}"
+
+    @property
+    def reference_dir(self) -> Path | None:
+        return None if self.root is None else self.root / "reference"
+
+    @property
+    def similarity_file(self) -> Path | None:
+        return None if self.index_dir is None else self.index_dir / "similarity.npz"
+
+    def lowres_ready(self) -> bool:
+        return self.lowres is not None and 0 < self.lowres.size == self.index.size
+
+
+class ShardManager:
+    """LRU cache of tenant shards. `load(key)` builds a Shard (called at most once
+    per key while it stays resident). Hold shards through `use(key)`; `get(key)`
+    alone doesn't keep one from being evicted."""
+
+    def __init__(self, load: Callable[[str], Shard], *, max_resident: int = 8) -> None:
+        self._load = load
+        self.max_resident = max(1, max_resident)
+        self._lock = threading.Lock()
+        self._resident: OrderedDict[str, Shard] = OrderedDict()
+        self._loading: dict[str, Future] = {}  # key -> its in-flight load
+        self._users: dict[str, int] = {}  # key -> open leases
+        self._stats: dict[str, ShardStats] = {}  # outlive eviction
+        self.evictions = 0
+
+    def get(self, key: str) -> Shard:
+        with self._lock:
+            shard = self._resident.get(key)
+            if shard is not None:
+                self._resident.move_to_end(key)
+                return shard
+            pending = self._loading.get(key)
+            if pending is None:
+                pending = self._loading[key] = Future()
+                loader = True
+            else:
+                loader = False
+        if not loader:
+            return pending.result()  # another request is loading it
+        t0 = time.perf_counter()
+        try:
+            shard = self._load(key)
+        except BaseException as exc:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            stats = self._stats.setdefault(key, ShardStats())
+            stats.loads += 1
+            stats.load_ms = (time.perf_counter() - t0) * 1000
+            shard.stats = stats
+            self._resident[key] = shard
+            del self._loading[key]
+            self._evict()
+        pending.set_result(shard)
+        return shard
+
+    @contextmanager
+    def use(self, key: str) -> Iterator[Shard]:
+        """The shard for `key`, kept resident until the block exits."""
+        with self._lock:
+            self._users[key] = self._users.get(key, 0) + 1
+        try:
+            yield self.get(key)
+        finally:
+            with self._lock:
+                left = self._users.pop(key) - 1
+                if left:
+                    self._users[key] = left
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used shards without leases down to the cap (lock held).
+        The most recent one is the one just handed out, so it always stays."""
+        for key in list(self._resident)[:-1]:
+            if len(self._resident) <= self.max_resident:
+                break
+            if not self._users.get(key):
+                del self._resident[key]
+                self.evictions += 1
+
+    def resident(self) -> list[str]:
+        with self._lock:
+            return list(self._resident)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            resident = dict(self._resident)
+            stats = dict(self._stats)
+            in_use = set(self._users)
+        return {
+            "max_resident": self.max_resident,
+            "evictions": self.evictions,
+            "shards": {
+                key: {
+                    "resident": key in resident,
+                    "in_use": key in in_use,
+                    "vectors": resident[key].index.size if key in resident else None,
+                    **s.snapshot(),
+                }
+                for key, s in sorted(stats.items())
+            },
+        }
@@ -0,0 +1,189 @@
+"""SKU x SKU similarity from the stored reference vectors: which products look alike.
+
+"Which SKUs does DINOv2 confuse?" used to need a full eval run (eval_index.py's TOP
+CONFUSIONS), and a new SKU that is visually identical to an enrolled one (AWRCC1 vs
+AWRCC2 — the case label OCR exists for) went unnoticed until it was misidentified.
+Here every pair of SKUs gets the best cosine between any photo of one and any photo
+of the other, straight from the index:
+
+  * computed blockwise — a block of rows against the whole index, reduced per SKU
+    with `maximum.reduceat` — so memory stays at one block x index, not N x N;
+  * incremental — each SKU carries a fingerprint of its rows (count + a fixed random
+    projection summed), so after an enroll only the SKUs whose rows changed are
+    recomputed: one SKU's photos x the index, not the whole matrix. Their row and
+    column are rewritten in place; a new SKU takes the next free slot of a matrix
+    allocated with headroom, so an enroll never copies the N x N matrix (only
+    dropping SKUs compacts it);
+  * persisted next to the index (similarity.npz), so a restart resumes from it.
+
+Engine.similarity(shard) keeps it current; /enroll uses it to warn when a SKU lands
+within ENROLL_COLLISION of another one, GET /similarity and
+scripts/sku_similarity.py read it.
+"""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .index import EmbeddingIndex
+
+
+def _fingerprints(vectors: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Per-SKU sum of rows projected on a fixed random direction: changes when any
+    row of the SKU changes, doesn't when its rows are merely reordered."""
+    if not vectors.shape[0]:
+        return np.zeros(0, dtype="float64")
+    w = np.random.default_rng(0).standard_normal(vectors.shape[1])
+    return np.add.reduceat(np.asarray(vectors, dtype="float64") @ w, offsets)
+
+
+class SkuSimilarity:
+    """Max cosine between the reference photos of every pair of SKUs.
+
+    `matrix[i, j]` is symmetric; the diagonal is -inf (a SKU is not its own
+    neighbor). `names` labels rows and columns, in the order SKUs were first seen
+    (not sorted). `dirty` is set by an update that changed anything and cleared by
+    `save`; `saved_at` is the time.monotonic() of the last load or save (0 = never)."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self._slot: dict[str, int] = {}
+        self._buf = np.zeros((0, 0), dtype="float32")  # matrix == _buf[:n, :n]
+        self._counts = np.zeros(0, dtype="int64")
+        self._prints = np.zeros(0, dtype="float64")
+        self._synced: tuple[int, int] | None = None  # (id(index), index.version)
+        self.dirty = False
+        self.saved_at = 0.0
+
+    @property
+    def matrix(self) -> np.ndarray:
+        n = len(self.names)
+        return self._buf[:n, :n]
+
+    # ---- persistence -------------------------------------------------------
+    @classmethod
+    def load(cls, path: Path) -> "SkuSimilarity":
+        sim = cls()
+        if Path(path).exists():
+            data = np.load(path, allow_pickle=False)
+            sim.names = [str(s) for s in data["names"]]
+            sim._slot = {s: i for i, s in enumerate(sim.names)}
+            sim._buf = data["matrix"].astype("float32")
+            sim._counts = data["counts"]
+            sim._prints = data["prints"]
+            sim.saved_at = time.monotonic()
+        return sim
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, names=np.array(self.names, dtype=str), matrix=self.matrix,
+                 counts=self._counts, prints=self._prints)
+        tmp.replace(path)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    # ---- update ------------------------------------------------------------
+    def update(self, index: EmbeddingIndex, chunk_cells: int = 1 << 25) -> list[str]:
+        """Bring the matrix in line with `index`; recompute only SKUs whose rows
+        changed (new ones included), drop removed ones. -> SKUs recomputed."""
+        if self._synced == (id(index), index.version):
+            return []
+        vectors, names, seg = index.segments()
+        counts = np.bincount(seg, minlength=len(names)).astype("int64")
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype("int64")
+        prints = _fingerprints(vectors, offsets)
+
+        present = set(names)
+        if any(s not in present for s in self.names):
+            self._compact([s for s in self.names if s in present])
+        new = [s for s in names if s not in self._slot]
+        known = len(self.names)
+        if new:
+            self._grow(new)
+        slots = np.array([self._slot[s] for s in names], dtype="int64")  # index order -> slot
+        changed = np.flatnonzero(
+            (slots >= known)
+            | (self._counts[slots] != counts)
+            | ~np.isclose(self._prints[slots], prints)
+        )
+        self._counts[slots] = counts
+        self._prints[slots] = prints
+
+        if changed.size:
+            rows = np.concatenate([np.arange(offsets[j], offsets[j] + counts[j]) for j in changed])
+            owner = np.repeat(np.arange(changed.size), counts[changed])  # row -> position in `changed`
+            best = np.full((changed.size, len(names)), -np.inf, dtype="float32")
+            step = max(1, chunk_cells // max(1, vectors.shape[0]))
+            for i in range(0, rows.size, step):
+                sims = np.maximum.reduceat(vectors[rows[i:i + step]] @ vectors.T, offsets, axis=1)
+                np.maximum.at(best, owner[i:i + step], sims)
+            mine = slots[changed]
+            self._buf[np.ix_(mine, slots)] = best
+            self._buf[np.ix_(slots, mine)] = best.T
+            self._buf[mine, mine] = -np.inf
+            self.dirty = True
+
+        self._synced = (id(index), index.version)
+        return [names[j] for j in changed]
+
+    def _grow(self, new: list[str]) -> None:
+        """Give `new` SKUs the next slots (-inf rows/columns until computed),
+        reallocating the matrix with ~25% headroom only when it is full."""
+        n, m = len(self.names), len(self.names) + len(new)
+        if m > self._buf.shape[0]:
+            cap = max(m, int(m * 1.25) + 8)
+            buf = np.full((cap, cap), -np.inf, dtype="float32")
+            buf[:n, :n] = self.matrix
+            self._buf = buf
+        else:
+            self._buf[n:m, :m] = -np.inf
+            self._buf[:m, n:m] = -np.inf
+        self.names = self.names + new
+        self._slot.update({s: n + i for i, s in enumerate(new)})
+        self._counts = np.concatenate([self._counts, np.zeros(len(new), dtype="int64")])
+        self._prints = np.concatenate([self._prints, np.zeros(len(new), dtype="float64")])
+
+    def _compact(self, keep: list[str]) -> None:
+        """Drop every SKU not in `keep` (a full copy — only when SKUs are removed)."""
+        idx = np.array([self._slot[s] for s in keep], dtype="int64")
+        self._buf = np.ascontiguousarray(self._buf[np.ix_(idx, idx)])
+        self._counts = self._counts[idx]
+        self._prints = self._prints[idx]
+        self.names = list(keep)
+        self._slot = {s: i for i, s in enumerate(keep)}
+        self.dirty = True
+
+    # ---- query -------------------------------------------------------------
+    def neighbors(self, sku: str, k: int = 10, min_score: float | None = None) -> list[dict]:
+        """Most similar other SKUs -> [{sku, score}] desc. [] for an unknown SKU."""
+        try:
+            row = self.matrix[self.names.index(sku)]
+        except ValueError:
+            return []
+        top = np.argsort(-row, kind="stable")[:k]
+        out = [{"sku": self.names[j], "score": round(float(row[j]), 4)} for j in top if np.isfinite(row[j])]
+        return [r for r in out if min_score is None or r["score"] >= min_score]
+
+    def pairs(self, top: int = 50, min_score: float | None = None) -> list[dict]:
+        """The `top` most similar SKU pairs -> [{a, b, score}] desc (each pair once)."""
+        n = len(self.names)
+        if n < 2:
+            return []
+        flat = self.matrix.ravel()
+        want = min(flat.size, 2 * top)  # symmetric: every pair shows up twice
+        cand = np.argpartition(-flat, want - 1)[:want]
+        cand = cand[np.argsort(-flat[cand], kind="stable")]
+        out = []
+        for f in cand:
+            a, b = divmod(int(f), n)
+            score = float(flat[f])
+            if a >= b or not np.isfinite(score):
+                continue
+            if min_score is not None and score < min_score:
+                break
+            out.append({"a": self.names[a], "b": self.names[b], "score": round(score, 4)})
+        return out[:top]
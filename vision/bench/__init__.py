@@ -0,0 +1,15 @@
+"""Speed benchmarks for the vision pipeline (accuracy lives in scripts/eval_index.py).
+
+    python -m vision.bench                                   # synthetic images
+    python -m vision.bench --images data/eval --n 64         # real frames
+    python -m vision.bench --baseline bench/baseline.json    # compare, flag regressions
+    python -m vision.bench --save-baseline bench/baseline.json
+
+Stages: decode, preprocess, embed (batch 1..N), detector, index search at several
+index sizes, lexicon classify and OCR. Stages whose model isn't installed (no
+ultralytics, no easyocr) are reported as skipped, not failed. Results are JSON with
+p50 / p95 / mean ms per call and items/s, so a change to `Embedder` or
+`EmbeddingIndex` can be measured against a saved run.
+
+`stats` is pure (timing + baseline comparison) so it unit-tests without torch.
+"""
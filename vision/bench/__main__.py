@@ -0,0 +1,108 @@
+"""CLI for the bench suite — see vision/bench/__init__.py.
+
+    python -m vision.bench [--images DIR] [--n 32] [--repeat 20]
+                           [--stages decode,embed,detect,search,lexicon,ocr]
+                           [--batches 1,4,8,16] [--sizes 1000,10000,100000]
+                           [--out FILE] [--baseline FILE] [--save-baseline FILE]
+                           [--tolerance 0.10]
+
+Exits 1 when --baseline is given and any stage's p50 is slower than the tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+
+from vision.app.config import settings  # noqa: E402
+from vision.bench import stages  # noqa: E402
+from vision.bench.stats import compare, table  # noqa: E402
+
+_ALL = ["decode", "embed", "detect", "search", "lexicon", "ocr"]
+
+
+def _ints(s: str) -> list[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m vision.bench", description=__doc__.splitlines()[0])
+    ap.add_argument("--images", type=Path, help="folder of real frames (default: synthetic)")
+    ap.add_argument("--n", type=int, default=32, help="images to load / generate")
+    ap.add_argument("--repeat", type=int, default=20, help="timed calls per stage")
+    ap.add_argument("--stages", default=",".join(_ALL))
+    ap.add_argument("--batches", default="1,4,8,16", help="embed batch sizes")
+    ap.add_argument("--sizes", default="1000,10000,100000", help="index sizes for search")
+    ap.add_argument("--dim", type=int, default=768, help="vector dim for search (dinov2-base: 768)")
+    ap.add_argument("--out", type=Path, default=Path(__file__).parent / "results" / "latest.json")
+    ap.add_argument("--baseline", type=Path)
+    ap.add_argument("--save-baseline", type=Path)
+    ap.add_argument("--tolerance", type=float, default=0.10)
+    args = ap.parse_args()
+
+    wanted = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(wanted) - set(_ALL)
+    if unknown:
+        raise SystemExit(f"unknown stage(s): {', '.join(sorted(unknown))} (have: {', '.join(_ALL)})")
+
+    blobs = stages.folder_images(args.images, args.n) if args.images else stages.synthetic_images(args.n)
+    if not blobs:
+        raise SystemExit(f"no images under {args.images}")
+    images = stages.decoded(blobs) if set(wanted) & {"embed", "detect", "ocr"} else []
+
+    results: dict = {}
+    for name in wanted:
+        print(f"  - {name} ...", flush=True)
+        if name == "decode":
+            results.update(stages.decode(blobs, args.repeat))
+        elif name == "embed":
+            results.update(stages.embed(images, args.repeat, _ints(args.batches)))
+        elif name == "detect":
+            results.update(stages.detector(images, args.repeat, settings.detector_batch))
+        elif name == "search":
+            results.update(stages.search(_ints(args.sizes), args.dim, args.repeat * 5))
+        elif name == "lexicon":
+            results.update(stages.lexicon(args.repeat))
+        elif name == "ocr":
+            results.update(stages.ocr(images, max(3, args.repeat // 4), gpu=settings.device != "cpu"))
+
+    run = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": platform.node(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "device": settings.device,
+            "embed_model": settings.embed_model,
+            "images": str(args.images) if args.images else f"synthetic x{len(blobs)}",
+        },
+        "stages": results,
+    }
+    print("\n" + table(results))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(run, indent=2))
+    print(f"\nwrote {args.out}")
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(run, indent=2))
+        print(f"saved baseline {args.save_baseline}")
+
+    if args.baseline:
+        rows = compare(run, json.loads(args.baseline.read_text()), args.tolerance)
+        print(f"\n=== vs {args.baseline} (±{args.tolerance:.0%}) ===")
+        for r in rows:
+            print(f"{r['stage']:28s} {r['base_ms']:10.2f} -> {r['now_ms']:10.2f} ms  {r['change']:+7.1%}  {r['verdict']}")
+        if any(r["verdict"] == "slower" for r in rows):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Replay captured frames against the vision server: throughput / latency curve.
+
+How many receiving stations and analysis crons can one box carry? This posts real
+frames (or synthetic ones) at /identify, /identify-label, /analyze and
+/identify-cascade in a configurable mix and reports, per load level, achieved
+requests/s, p50 / p95 / p99 latency and error rate — overall and per endpoint.
+
+Two modes:
+
+  closed loop  --concurrency 1,4,16    N clients, each sends its next request when
+                                       the last one answered (stations waiting on a
+                                       result). Finds max throughput.
+  open loop    --rate 2,5,10           requests ARRIVE at a fixed rate (Poisson)
+                                       whether or not earlier ones finished (crons,
+                                       many independent users). Latency is counted
+                                       from the scheduled arrival, so a backed-up
+                                       server shows up as latency, not as fewer
+                                       requests (no coordinated omission).
+
+    python -m vision.bench.loadgen http://box:8700 --frames data/eval --concurrency 1,2,4,8
+    python -m vision.bench.loadgen http://box:8700 --rate 1,2,4 --duration 30 \\
+        --mix identify=0.6,identify-label=0.1,analyze=0.3 --token $VISION_TOKEN --json load.json
+
+CPU-only CI: run the real app with stub models (vision/bench/stub_app.py):
+
+    uvicorn vision.bench.stub_app:app --port 8700 &
+    python -m vision.bench.loadgen http://localhost:8700 --concurrency 1,4 --duration 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+
+ENDPOINTS = {
+    "identify": "/identify",
+    "identify-label": "/identify-label",
+    "identify-cascade": "/identify-cascade",
+    "analyze": "/analyze",
+}
+
+
+@dataclass
+class Record:
+    endpoint: str
+    ms: float
+    status: int  # HTTP status; 0 = transport error / timeout
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """'identify=3,analyze=1' -> {identify: 0.75, analyze: 0.25}."""
+    weights: dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, w = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {name!r} (have: {', '.join(ENDPOINTS)})")
+        weights[name] = float(w) if w else 1.0
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("mix needs at least one positive weight")
+    return {k: v / total for k, v in weights.items()}
+
+
+def _latency(ms: list[float]) -> dict:
+    a = np.asarray(ms, dtype="float64")
+    if not a.size:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    return {f"p{q}_ms": round(float(np.percentile(a, q)), 1) for q in (50, 95, 99)}
+
+
+def summarize(records: list[Record], wall_s: float) -> dict:
+    """Records of one load level -> {requests, rps, error_rate, p50/p95/p99 (ok
+    requests only), per_endpoint: {...same...}}."""
+    def block(rs: list[Record]) -> dict:
+        ok = [r.ms for r in rs if 200 <= r.status < 300]
+        return {
+            "requests": len(rs),
+            "rps": round(len(ok) / wall_s, 2) if wall_s > 0 else None,
+            "error_rate": round(1 - len(ok) / len(rs), 4) if rs else None,
+            **_latency(ok),
+        }
+
+    out = block(records)
+    out["per_endpoint"] = {
+        name: block([r for r in records if r.endpoint == name])
+        for name in sorted({r.endpoint for r in records})
+    }
+    return out
+
+
+class LoadGen:
+    """Fires requests at `client` (an httpx.AsyncClient with base_url set)."""
+
+    def __init__(self, client, frames: list[bytes], mix: dict[str, float], *, seed: int = 0,
+                 headers: dict | None = None, timeout_s: float = 60.0) -> None:
+        self._client = client
+        self._frames = frames
+        self._names = list(mix)
+        self._weights = list(mix.values())
+        self._rng = random.Random(seed)
+        self._headers = headers or {}
+        self._timeout = timeout_s
+
+    def _pick(self) -> tuple[str, bytes]:
+        return self._rng.choices(self._names, self._weights)[0], self._rng.choice(self._frames)
+
+    async def _fire(self, name: str, frame: bytes, t_start: float) -> Record:
+        try:
+            r = await self._client.post(
+                ENDPOINTS[name], files={"file": ("frame.jpg", frame, "image/jpeg")},
+                headers=self._headers, timeout=self._timeout,
+            )
+            status = r.status_code
+        except Exception:  # noqa: BLE001 — timeouts / resets count as errors
+            status = 0
+        return Record(name, (time.perf_counter() - t_start) * 1000, status)
+
+    async def closed(self, concurrency: int, *, duration_s: float | None = None,
+                     requests: int | None = None) -> tuple[list[Record], float]:
+        """`concurrency` clients back to back until duration_s elapses or `requests`
+        have been sent. -> (records, wall seconds)."""
+        records: list[Record] = []
+        budget = [requests]
+        t0 = time.perf_counter()
+
+        def more() -> bool:
+            if budget[0] is not None:
+                if budget[0] <= 0:
+                    return False
+                budget[0] -= 1
+                return True
+            return time.perf_counter() - t0 < duration_s
+
+        async def client() -> None:
+            while more():
+                name, frame = self._pick()
+                records.append(await self._fire(name, frame, time.perf_counter()))
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return records, time.perf_counter() - t0
+
+    async def open(self, rate: float, *, duration_s: float | None = None,
+                   requests: int | None = None) -> tuple[list[Record], float]:
+        """Poisson arrivals at `rate`/s; each request is timed from its scheduled
+        arrival. -> (records, wall seconds including the drain)."""
+        tasks = []
+        t0 = time.perf_counter()
+        due = t0
+        sent = 0
+        while (requests is None or sent < requests) and (duration_s is None or due - t0 < duration_s):
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name, frame = self._pick()
+            tasks.append(asyncio.create_task(self._fire(name, frame, due)))
+            sent += 1
+            due += self._rng.expovariate(rate)
+        records = list(await asyncio.gather(*tasks))
+        return records, time.perf_counter() - t0
+
+
+async def sweep(gen: LoadGen, *, concurrency: list[int], rates: list[float], duration_s: float | None,
+                requests: int | None, on_row=None) -> list[dict]:
+    rows = []
+    levels = [("closed", c) for c in concurrency] + [("open", r) for r in rates]
+    for mode, level in levels:
+        if mode == "closed":
+            records, wall = await gen.closed(level, duration_s=duration_s, requests=requests)
+        else:
+            records, wall = await gen.open(level, duration_s=duration_s, requests=requests)
+        row = {"mode": mode, "level": level, "wall_s": round(wall, 2), **summarize(records, wall)}
+        rows.append(row)
+        if on_row:
+            on_row(row)
+    return rows
+
+
+def _print_row(row: dict) -> None:
+    def f(v, spec):
+        return format(v, spec) if v is not None else "-".rjust(len(format(0, spec)))
+
+    level = f"c={row['level']}" if row["mode"] == "closed" else f"{row['level']}/s"
+    print(
+        f"{row['mode']:6s} {level:>8s} {row['requests']:7d} {f(row['rps'], '8.2f')} "
+        f"{f(row['p50_ms'], '8.1f')} {f(row['p95_ms'], '8.1f')} {f(row['p99_ms'], '8.1f')} "
+        f"{row['error_rate'] * 100 if row['error_rate'] is not None else 0:6.1f}%"
+    )
+    for name, e in row["per_endpoint"].items():
+        print(f"{'':16s}{name:>17s} {e['requests']:5d}  p50 {f(e['p50_ms'], '7.1f')}  "
+              f"p95 {f(e['p95_ms'], '7.1f')}  err {(e['error_rate'] or 0) * 100:.1f}%")
+
+
+def _floats(s: str | None) -> list[float]:
+    return [float(x) for x in s.split(",") if x.strip()] if s else []
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m vision.bench.loadgen", description=__doc__.splitlines()[0])
+    ap.add_argument("url", help="server base URL, e.g. http://localhost:8700")
+    ap.add_argument("--frames", type=Path, help="folder of captured frames (default: synthetic)")
+    ap.add_argument("--n", type=int, default=64, help="frames to load / generate")
+    ap.add_argument("--mix", default="identify=1", help="endpoint weights, e.g. identify=0.7,analyze=0.3")
+    ap.add_argument("--concurrency", help="closed-loop levels, e.g. 1,2,4,8")
+    ap.add_argument("--rate", help="open-loop arrival rates (req/s), e.g. 1,2,5")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    ap.add_argument("--requests", type=int, help="requests per level (instead of --duration)")
+    ap.add_argument("--token", help="x-vision-token")
+    ap.add_argument("--tenant", help="X-Tenant (per-tenant shard)")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--json", type=Path)
+    args = ap.parse_args()
+
+    import httpx
+
+    from vision.bench.stages import folder_images, synthetic_images
+
+    frames = folder_images(args.frames, args.n) if args.frames else synthetic_images(args.n, (960, 720))
+    if not frames:
+        raise SystemExit(f"no frames under {args.frames}")
+    conc = [int(c) for c in _floats(args.concurrency)]
+    rates = _floats(args.rate)
+    if not conc and not rates:
+        conc = [1, 2, 4, 8]
+    headers = {}
+    if args.token:
+        headers["x-vision-token"] = args.token
+    if args.tenant:
+        headers["x-tenant"] = args.tenant
+    duration = None if args.requests else args.duration
+
+    async def run() -> list[dict]:
+        limits = httpx.Limits(max_connections=max(conc + [64]), max_keepalive_connections=max(conc + [64]))
+        async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+            gen = LoadGen(client, frames, parse_mix(args.mix), headers=headers, timeout_s=args.timeout)
+            return await sweep(gen, concurrency=conc, rates=rates, duration_s=duration,
+                               requests=args.requests, on_row=_print_row)
+
+    print(f"{len(frames)} frames, mix {args.mix}, {'%d req' % args.requests if args.requests else '%gs' % duration}/level")
+    print(f"{'mode':6s} {'level':>8s} {'reqs':>7s} {'ok rps':>8s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'errors':>7s}")
+    rows = asyncio.run(run())
+    if args.json:
+        args.json.write_text(json.dumps({"url": args.url, "mix": args.mix, "rows": rows}, indent=2))
+        print(f"\nwrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
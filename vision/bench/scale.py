@@ -0,0 +1,247 @@
+"""Where does EmbeddingIndex fall over? Synthetic scale test, CPU only, no models.
+
+Builds indexes of random unit vectors at each size with a realistic SKU shape (most
+SKUs have a handful of reference photos, a few have dozens), then times, per size
+and storage backend:
+
+    build       bulk add, one add() per SKU (the enroll_dir pattern)
+    add         one more single-photo add() on the full index (the /enroll pattern)
+    save/load   .npz (global index) and the mmap directory form (tenant shards)
+    search      one query, p50 / p95 — in RAM, memory-mapped, and (with CUDA) on the
+                fp16 device mirror
+    search_b64  search_batch of 64 queries, per-query cost
+
+and records process RSS after each size. Peak traced memory (NumPy allocations) comes
+from a separate untimed pass — bulk load, add, .npz save + load, one search_batch —
+because tracemalloc hooks every allocation and would inflate the timings above.
+
+    python -m vision.bench.scale                              # 10k, 100k, 1M at dim 768
+    python -m vision.bench.scale --sizes 10000,10000000 --max-gb 48
+    python -m vision.bench.scale --json scale.json --plot scale.png
+
+Sizes whose vector matrix (size x dim x 4 bytes, plus a copy while saving / adding)
+would exceed --max-gb are skipped, not attempted. --plot needs matplotlib.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+
+from vision.app.index import EmbeddingIndex  # noqa: E402
+from vision.bench.stats import summarize  # noqa: E402
+
+
+def sku_counts(n: int, rng: np.random.Generator, mean: float = 8.0) -> list[int]:
+    """Photos per SKU summing to n: geometric (mostly a few, a long tail of many)."""
+    counts: list[int] = []
+    left = n
+    while left > 0:
+        c = min(left, int(rng.geometric(1 / mean)))
+        counts.append(c)
+        left -= c
+    return counts
+
+
+def _unit(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    v = rng.standard_normal((n, dim), dtype="float32")
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    return v
+
+
+def _rss_mb() -> float | None:
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+
+
+def _timed(fn) -> tuple[object, float]:
+    t0 = time.perf_counter()
+    out = fn()
+    return out, round((time.perf_counter() - t0) * 1000, 2)
+
+
+def _gpu_search(idx: EmbeddingIndex, q: np.ndarray) -> dict | None:
+    """Same queries against the fp16 device mirror (gpu_index.py); None without CUDA
+    or when the mirror doesn't fit."""
+    try:
+        import torch
+
+        from vision.app.gpu_index import DeviceIndex
+    except ImportError:
+        return None
+    if not torch.cuda.is_available():
+        return None
+    mirror = DeviceIndex(idx, "cuda", headroom_mb=512)
+    if not mirror.sync():
+        return None
+    qt = torch.from_numpy(q).to("cuda")
+    samples = []
+    for v in qt:
+        _, ms = _timed(lambda v=v: mirror.search(v, 5))
+        samples.append(ms)
+    return summarize(samples)
+
+
+def run_size(n: int, dim: int, *, queries: int = 200, seed: int = 0, workdir: Path) -> dict:
+    """Time every operation at one index size. -> {op: ms | summary, ...}."""
+    rng = np.random.default_rng(seed)
+    counts = sku_counts(n, rng)
+    row = {"size": n, "dim": dim, "skus": len(counts)}
+
+    idx = EmbeddingIndex(dim)
+    vecs = _unit(rng, n, dim)
+
+    def build():
+        start = 0
+        for i, c in enumerate(counts):
+            idx.add(f"S{i:07d}", vecs[start:start + c])
+            start += c
+
+    # add() vstacks the whole matrix per call, so the one-add-per-SKU build is
+    # O(n x SKUs): ~2 s at 10k, minutes at 100k — the first thing to fall over.
+    # Past that, report it as "-" and bulk-fill so the rest can run.
+    if n * len(counts) <= 20_000_000:
+        _, row["build_ms"] = _timed(build)
+    else:
+        row["build_ms"] = None
+        idx.add_many(_labels(counts), vecs)
+    del vecs
+    q = _unit(rng, queries, dim)
+    _, row["group_ms"] = _timed(lambda: idx.search(q[0], 5))
+    _, row["add_ms"] = _timed(lambda: idx.add("S-NEW", q[0]))
+
+    npz = workdir / f"index-{n}.npz"
+    _, row["save_npz_ms"] = _timed(lambda: idx.save(npz))
+    _, row["load_npz_ms"] = _timed(lambda: EmbeddingIndex.load(npz, dim))
+    row["npz_mb"] = round(npz.stat().st_size / 2**20, 1)
+    npz.unlink()
+    shard = workdir / f"shard-{n}"
+    _, row["save_dir_ms"] = _timed(lambda: idx.save_dir(shard))
+    mapped, row["load_dir_ms"] = _timed(lambda: EmbeddingIndex.load_dir(shard, dim))
+
+    for name, index in (("ram", idx), ("mmap", mapped)):
+        samples = []
+        for v in q:
+            _, ms = _timed(lambda v=v: index.search(v, 5))
+            samples.append(ms)
+        row[f"search_{name}"] = summarize(samples)
+        batch = [_timed(lambda i=i: index.search_batch(q[i:i + 64], 5))[1] for i in range(0, queries - 63, 64)]
+        row[f"search_b64_{name}"] = summarize(batch, items=64)
+
+    row["search_gpu"] = _gpu_search(idx, q)
+    row["rss_mb"] = _rss_mb()
+    del idx, mapped
+    for f in shard.iterdir():
+        f.unlink()
+    shard.rmdir()
+    row["peak_traced_mb"] = _peak_traced_mb(counts, dim, q[:64], seed=seed, workdir=workdir)
+    return row
+
+
+def _labels(counts: list[int]) -> list[str]:
+    return [f"S{i:07d}" for i, c in enumerate(counts) for _ in range(c)]
+
+
+def _peak_traced_mb(counts: list[int], dim: int, q: np.ndarray, *, seed: int, workdir: Path) -> float:
+    """Peak NumPy memory of the heavy operations, in their own untimed pass."""
+    tracemalloc.start()
+    try:
+        idx = EmbeddingIndex(dim)
+        idx.add_many(_labels(counts), _unit(np.random.default_rng(seed), sum(counts), dim))
+        idx.add("S-NEW", q[0])
+        npz = workdir / "peak.npz"
+        idx.save(npz)
+        EmbeddingIndex.load(npz, dim).search_batch(q, 5)
+        npz.unlink()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2**20, 1)
+
+
+def _print_row(r: dict) -> None:
+    def ms(v):
+        return f"{v:10.1f}" if v is not None else f"{'-':>10s}"
+
+    print(
+        f"{r['size']:>10,d} {r['skus']:>9,d} {ms(r['build_ms'])} {ms(r['add_ms'])} "
+        f"{ms(r['save_npz_ms'])} {ms(r['load_npz_ms'])} {ms(r['save_dir_ms'])} {ms(r['load_dir_ms'])} "
+        f"{r['search_ram']['p50_ms']:9.2f} {r['search_mmap']['p50_ms']:9.2f} "
+        f"{r['search_gpu']['p50_ms'] if r['search_gpu'] else float('nan'):9.2f} "
+        f"{r['search_b64_ram'].get('p50_ms', float('nan')) / 64:9.3f} "
+        f"{r['peak_traced_mb']:9.0f} {r['rss_mb'] or float('nan'):8.0f}"
+    )
+
+
+def _plot(rows: list[dict], path: Path) -> None:
+    import matplotlib  # optional
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    sizes = [r["size"] for r in rows]
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for key, label in (("add_ms", "add (1 photo)"), ("save_npz_ms", "save .npz"), ("load_npz_ms", "load .npz"),
+                       ("load_dir_ms", "load mmap")):
+        ax.plot(sizes, [r[key] for r in rows], marker="o", label=label)
+    ax.plot(sizes, [r["search_ram"]["p50_ms"] for r in rows], marker="o", label="search p50")
+    ax.plot(sizes, [r["search_b64_ram"].get("p50_ms", np.nan) / 64 for r in rows], marker="o",
+            label="search_batch / query")
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("vectors")
+    ax.set_ylabel("ms")
+    ax.legend()
+    ax.grid(True, which="both", alpha=0.3)
+    fig.savefig(path, dpi=120, bbox_inches="tight")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m vision.bench.scale", description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--dim", type=int, default=768)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--max-gb", type=float, default=8.0, help="skip sizes needing more RAM than this")
+    ap.add_argument("--json", type=Path)
+    ap.add_argument("--plot", type=Path)
+    args = ap.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(
+        f"{'vectors':>10s} {'skus':>9s} {'build ms':>10s} {'add ms':>10s} {'save npz':>10s} {'load npz':>10s} "
+        f"{'save dir':>10s} {'load mmap':>10s} {'srch p50':>9s} {'mmap p50':>9s} {'gpu p50':>9s} {'b64 /q':>9s} "
+        f"{'peak MB':>9s} {'RSS MB':>8s}"
+    )
+    rows = []
+    with tempfile.TemporaryDirectory() as d:
+        for n in sizes:
+            need_gb = 3 * n * args.dim * 4 / 2**30  # matrix + copy during add/sort + loaded copy
+            if need_gb > args.max_gb:
+                print(f"{n:>10,d}  skipped: needs ~{need_gb:.1f} GB (> --max-gb {args.max_gb})")
+                continue
+            r = run_size(n, args.dim, queries=args.queries, workdir=Path(d))
+            rows.append(r)
+            _print_row(r)
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+        print(f"\nwrote {args.json}")
+    if args.plot and rows:
+        _plot(rows, args.plot)
+        print(f"wrote {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
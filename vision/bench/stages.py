@@ -0,0 +1,157 @@
+"""One function per pipeline stage. Each returns {stage_name: summary}; a stage whose
+optional model isn't installed or won't load (no weights, download failed) returns
+{stage_name: {"skipped": reason}} instead of sinking the whole run.
+
+Heavy imports (torch via the embedder, ultralytics, easyocr) happen inside the stage
+that needs them, so `--stages decode,search,lexicon` runs on a bare CPU box.
+"""
+from __future__ import annotations
+
+import io
+import random
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .stats import measure
+
+_IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+# ---- inputs ----------------------------------------------------------------
+def synthetic_images(n: int, size: tuple[int, int] = (1280, 960), seed: int = 0) -> list[bytes]:
+    """n JPEG frames: a product-ish box with a text block on a noisy bench."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        im = Image.new("RGB", size, tuple(rng.randint(60, 200) for _ in range(3)))
+        d = ImageDraw.Draw(im)
+        w, h = size
+        x1, y1 = rng.randint(0, w // 3), rng.randint(0, h // 3)
+        x2, y2 = x1 + rng.randint(w // 4, w // 2), y1 + rng.randint(h // 4, h // 2)
+        d.rectangle((x1, y1, x2, y2), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        d.text((x1 + 10, y1 + 10), f"BOSE MODEL AWRCC{i % 9} SER NO 0{i:04d}", fill=(0, 0, 0))
+        buf = io.BytesIO()
+        im.save(buf, "JPEG", quality=85)
+        out.append(buf.getvalue())
+    return out
+
+
+def folder_images(root: Path, limit: int) -> list[bytes]:
+    """Up to `limit` encoded images from root (recursively), as raw bytes."""
+    paths = sorted(p for p in Path(root).rglob("*") if p.suffix.lower() in _IMG_EXT)
+    return [p.read_bytes() for p in paths[:limit]]
+
+
+def _unavailable(what: str, exc: Exception) -> str:
+    if isinstance(exc, ImportError):
+        return f"{what} unavailable ({exc.name})"
+    return f"{what} failed to load ({type(exc).__name__}: {exc})"
+
+
+def decoded(blobs: list[bytes]) -> list[Image.Image]:
+    from vision.app.analyze import decode_once
+
+    return [decode_once(Image.open(io.BytesIO(b))) for b in blobs]
+
+
+# ---- stages ----------------------------------------------------------------
+def decode(blobs: list[bytes], repeat: int) -> dict:
+    from vision.app.analyze import decode_once
+
+    def run(i):
+        decode_once(Image.open(io.BytesIO(blobs[i % len(blobs)])))
+
+    return {"decode": measure(run, repeat=repeat)}
+
+
+def embed(images: list[Image.Image], repeat: int, batches: list[int]) -> dict:
+    """Processor-only preprocessing, then embed at each batch size (one forward pass
+    per batch; items/s is the throughput number to compare)."""
+    try:
+        from vision.app.embedder import Embedder
+
+        emb = Embedder()
+    except Exception as exc:  # noqa: BLE001 — missing package, model or weights
+        return {"embed": {"skipped": _unavailable("embedder", exc)}}
+    out = {
+        "preprocess": measure(
+            lambda i: emb.processor(images=images[i % len(images)], return_tensors="pt"), repeat=repeat
+        )
+    }
+    for b in batches:
+        def run(i, b=b):
+            start = (i * b) % len(images)
+            batch = (images * (b // len(images) + 2))[start:start + b]
+            emb.embed_batch(batch)
+            if emb.device == "cuda":
+                import torch
+
+                torch.cuda.synchronize()
+
+        out[f"embed/b{b}"] = measure(run, repeat=max(3, repeat // b), items=b)
+    return out
+
+
+def detector(images: list[Image.Image], repeat: int, batch: int) -> dict:
+    try:
+        from vision.app.detector import Detector
+
+        det = Detector()
+    except Exception as exc:  # noqa: BLE001 — missing package, model or weights
+        return {"detect": {"skipped": _unavailable("detector", exc)}}
+    return {
+        "detect/b1": measure(lambda i: det.detect(images[i % len(images)]), repeat=repeat),
+        f"detect/b{batch}": measure(
+            lambda i: det.detect_batch((images * (batch // len(images) + 1))[:batch]),
+            repeat=max(3, repeat // batch),
+            items=batch,
+        ),
+    }
+
+
+def search(sizes: list[int], dim: int, repeat: int, per_sku: int = 8, seed: int = 0) -> dict:
+    """EmbeddingIndex.search over random unit vectors, `per_sku` photos per SKU, plus
+    a 5-SKU allow-list search (a receiving session) at each size."""
+    from vision.app.index import EmbeddingIndex
+
+    rng = np.random.default_rng(seed)
+    out = {}
+    for n in sizes:
+        vecs = rng.standard_normal((n, dim), dtype="float32")
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+        idx = EmbeddingIndex(dim)
+        skus = [f"S{i // per_sku:06d}" for i in range(n)]
+        idx.add_many(skus, vecs)  # one vstack; add() per SKU is the scale test's job
+        queries = rng.standard_normal((64, dim), dtype="float32")
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        idx.search(queries[0], 5)  # group once, outside the timing
+        allowed = sorted(set(skus))[:: max(1, len(set(skus)) // 5)][:5]
+        out[f"search/n{n}"] = measure(lambda i: idx.search(queries[i % 64], 5), repeat=repeat)
+        out[f"search/n{n}/allow5"] = measure(
+            lambda i: idx.search(queries[i % 64], 5, skus=allowed), repeat=repeat
+        )
+    return out
+
+
+def lexicon(repeat: int) -> dict:
+    from vision.app.label_ocr import classify
+    from vision.scripts.test_golden import UNIT_CASES
+
+    texts = [t for t, _, _ in UNIT_CASES]
+    return {
+        "lexicon/classify": measure(
+            lambda i: [classify(t) for t in texts], repeat=repeat, items=len(texts)
+        )
+    }
+
+
+def ocr(images: list[Image.Image], repeat: int, gpu: bool) -> dict:
+    try:
+        from vision.app.label_ocr import LabelIdentifier
+
+        li = LabelIdentifier(gpu=gpu, store=None)
+    except Exception as exc:  # noqa: BLE001 — missing package, model or weights
+        return {"ocr": {"skipped": _unavailable("easyocr", exc)}}
+    return {"ocr/read_text": measure(lambda i: li.read_text(images[i % len(images)]), repeat=repeat, warmup=1)}
@@ -0,0 +1,75 @@
+"""Timing summaries and baseline comparison for the bench suite. NumPy only."""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+
+def summarize(samples_ms: list[float], items: int = 1) -> dict:
+    """Per-call latencies -> {calls, p50_ms, p95_ms, mean_ms, per_s}. `items` is how
+    many images (or queries) one call handles, so per_s is items per second."""
+    ms = np.asarray(samples_ms, dtype="float64")
+    if not ms.size:
+        return {"calls": 0}
+    total_s = float(ms.sum()) / 1000
+    return {
+        "calls": int(ms.size),
+        "items": items,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "per_s": round(items * ms.size / total_s, 1) if total_s > 0 else None,
+    }
+
+
+def measure(fn: Callable[[int], object], *, repeat: int, warmup: int = 2, items: int = 1) -> dict:
+    """Call `fn(i)` warmup + repeat times, time the last `repeat` calls."""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return summarize(samples, items)
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> list[dict]:
+    """Stage-by-stage p50 against a baseline run's "stages".
+
+    -> [{stage, base_ms, now_ms, change, verdict}] where change is the relative p50
+    change (+0.25 = 25% slower) and verdict is "slower" / "faster" beyond
+    `tolerance`, else "same". Stages missing or skipped on either side are left out.
+    """
+    rows = []
+    base_stages = baseline.get("stages", {})
+    for stage, now in current.get("stages", {}).items():
+        base = base_stages.get(stage)
+        if not base or "p50_ms" not in base or "p50_ms" not in now or not base["p50_ms"]:
+            continue
+        change = now["p50_ms"] / base["p50_ms"] - 1
+        verdict = "slower" if change > tolerance else "faster" if change < -tolerance else "same"
+        rows.append({
+            "stage": stage,
+            "base_ms": base["p50_ms"],
+            "now_ms": now["p50_ms"],
+            "change": round(change, 4),
+            "verdict": verdict,
+        })
+    return rows
+
+
+def table(stages: dict) -> str:
+    """Fixed-width text table of a run's stages."""
+    lines = [f"{'stage':28s} {'p50 ms':>10s} {'p95 ms':>10s} {'items/s':>10s}"]
+    for stage, r in stages.items():
+        if "skipped" in r:
+            lines.append(f"{stage:28s} skipped: {r['skipped']}")
+            continue
+        lines.append(
+            f"{stage:28s} {r['p50_ms']:10.2f} {r['p95_ms']:10.2f} "
+            f"{r['per_s'] if r['per_s'] is not None else float('nan'):10.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,101 @@
+"""The real FastAPI app with stub models, for load-testing the HTTP layer CPU-only.
+
+    STUB_EMBED_MS=25 STUB_OCR_MS=150 uvicorn vision.bench.stub_app:app --port 8700
+    python -m vision.bench.loadgen http://localhost:8700 --concurrency 1,4,16
+
+Routing, multipart parsing, decode, sessions, the cascade and the analyzer's thread
+pool are all the real code; only DINOv2 / the detector / EasyOCR are replaced by
+stubs that sleep for a fixed time (blocking, like the real models) and return
+plausible output. No torch, no weights.
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import nullcontext
+
+from vision.app import server
+from vision.app.analyze import PhotoAnalyzer
+
+EMBED_MS = float(os.environ.get("STUB_EMBED_MS", "25"))
+OCR_MS = float(os.environ.get("STUB_OCR_MS", "150"))
+
+_SKUS = [f"STUB-{i:03d}" for i in range(50)]
+
+
+class _StubIndex:
+    size = len(_SKUS) * 8
+    sku_count = len(_SKUS)
+    skus = _SKUS
+    version = 0
+
+
+class StubEngine:
+    """Engine's call surface (identify / locate / status / shard / enroll)."""
+
+    index = _StubIndex()
+
+    def __init__(self) -> None:
+        self._n = 0
+
+    def locate(self, _image):
+        return None
+
+    def shard(self, tenant=None, brand=None):
+        return None
+
+    def use_shard(self, tenant=None, brand=None):
+        return nullcontext(None)
+
+    def identify_ranked(self, image, *, lowres=True, box=None, skus=None, shard=None):
+        time.sleep(EMBED_MS / 1000)
+        self._n += 1
+        pool = skus or _SKUS
+        top = self._n % len(pool)
+        ranked = [{"sku": pool[(top + i) % len(pool)], "score": round(0.9 - 0.03 * i, 4)} for i in range(min(5, len(pool)))]
+        return ranked, {"resolution": "full", "scope": "all" if skus is None else "allowlist"}
+
+    def identify(self, image, box=None, skus=None, shard=None):
+        return self.identify_ranked(image, box=box, skus=skus, shard=shard)[0]
+
+    def enroll_image(self, sku, image, shard=None):
+        time.sleep(EMBED_MS / 1000)
+        return 1
+
+    def collisions(self, sku, shard=None):
+        return []
+
+    def reindex(self, shard=None):
+        return {}
+
+    def status(self, shard=None):
+        return {"embed_model": "stub", "device": "cpu", "vectors": self.index.size, "skus": self.index.sku_count}
+
+
+class StubLabeler:
+    """LabelIdentifier's call surface (identify / read_text / lookup)."""
+
+    TEXT = "BOSE Wave music system MODEL AWRCC1 SER NO 033"
+
+    def lookup(self, content_hash):
+        return None
+
+    def read_text(self, image, content_hash=None, path=None, box=None):
+        time.sleep(OCR_MS / 1000)
+        return self.TEXT
+
+    def identify(self, image, strict=True, progressive=False, content_hash=None, box=None):
+        from vision.app.label_ocr import classify
+
+        text = self.read_text(image)
+        model, _ = classify(text, strict=strict)
+        return {"model": model, "raw_text": text, "matched": model is not None}
+
+
+_engine = StubEngine()
+_labeler = StubLabeler()
+server.get_engine = lambda: _engine
+server._label_identifier = _labeler
+server._photo_analyzer = PhotoAnalyzer(_engine, _labeler)
+
+app = server.app
@@ -0,0 +1,93 @@
+"""Microbenchmark: compiled LexiconMatcher vs the plain regex loop. CPU only, no OCR.
+
+Times classify() over a realistic OCR-text mix with (a) the shipped lexicon and
+(b) synthetic catalog-scale lexicons (brand + model-code entries, like the ones we
+generate from sku_catalog), checks both matchers agree on every text, and re-runs
+the test_golden UNIT_CASES through the compiled path.
+
+    python -m vision.scripts.bench_lexicon              # sizes 37, 1000, 5000
+    python -m vision.scripts.bench_lexicon 200 20000
+"""
+from __future__ import annotations
+
+import random
+import re
+import sys
+import time
+
+from vision.app.label_ocr import LEXICON, classify, normalize
+from vision.app.lexicon import LexiconMatcher
+from vision.scripts.test_golden import UNIT_CASES
+
+_BRANDS = ["BOSE", "SONY", "YAMAHA", "DENON", "JBL", "SONOS", "KLIPSCH", "ONKYO", "MARANTZ"]
+_LETTERS = "ABCDEFGHJKLMNPRSTUVWXYZ"
+
+
+def synthetic_entries(n: int, rng: random.Random) -> list[tuple[str, str]]:
+    """Real lexicon first, then n generated model-code entries (OCR-tolerant)."""
+    out = list(LEXICON)
+    while len(out) < n:
+        brand = rng.choice(_BRANDS)
+        code = "".join(rng.choice(_LETTERS) for _ in range(rng.randint(2, 4)))
+        num = str(rng.randint(1, 9999))
+        tolerant = num.replace("1", "[1I]").replace("0", "[0O]")
+        out.append((f"{brand} {code}-{num}", rf"{brand}\s?{code}[\-\s]?{tolerant}\b"))
+    return out[:max(n, 1)]
+
+
+def sample_texts(entries: list[tuple[str, str]], k: int, rng: random.Random) -> list[str]:
+    filler = ["MODEL", "SER NO 0331", "MADE IN CHINA", "FCC ID A94", "120V 60Hz", "DESIGNED BY",
+              "FRAMINGHAM MA", "CAUTION", "RISK OF ELECTRIC SHOCK", "DO NOT OPEN"]
+    texts = [t for t, _, _ in UNIT_CASES]
+    while len(texts) < k:
+        words = rng.sample(filler, rng.randint(2, 6))
+        if rng.random() < 0.6:  # most frames carry a real model name somewhere
+            words.insert(rng.randint(0, len(words)), rng.choice(entries)[0])
+        texts.append(" ".join(words))
+    return texts
+
+
+def _naive(compiled, norm: str, nospace: str) -> str | None:
+    for name, pat in compiled:
+        if pat.search(norm) or pat.search(nospace):
+            return name
+    return None
+
+
+def bench(n: int, rng: random.Random, k: int = 500) -> None:
+    entries = synthetic_entries(n, rng)
+    t0 = time.perf_counter()
+    matcher = LexiconMatcher(entries)
+    build_ms = (time.perf_counter() - t0) * 1000
+    compiled = [(name, re.compile(pat)) for name, pat in entries]
+    texts = [(norm, re.sub(r"[^A-Z0-9]", "", norm))
+             for norm in (normalize(t) for t in sample_texts(entries, k, rng))]
+
+    t0 = time.perf_counter()
+    slow = [_naive(compiled, a, b) for a, b in texts]
+    naive_us = (time.perf_counter() - t0) / len(texts) * 1e6
+    t0 = time.perf_counter()
+    fast = [matcher.match(a, b) for a, b in texts]
+    fast_us = (time.perf_counter() - t0) / len(texts) * 1e6
+
+    bad = sum(1 for a, b in zip(slow, fast) if a != b)
+    print(f"{len(entries):7d} entries  build {build_ms:8.1f} ms   loop {naive_us:9.1f} us/text   "
+          f"compiled {fast_us:7.1f} us/text   x{naive_us / max(fast_us, 1e-9):6.1f}   "
+          f"{'agree' if not bad else f'{bad} DISAGREE'}")
+    if bad:
+        raise SystemExit(1)
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [len(LEXICON), 1000, 5000]
+    failed = [t for t, strict, want in UNIT_CASES if classify(t, strict=strict)[0] != want]
+    print(f"UNIT_CASES via compiled matcher: {len(UNIT_CASES) - len(failed)}/{len(UNIT_CASES)} passed")
+    rng = random.Random(0)
+    for n in sizes:
+        bench(n, rng)
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
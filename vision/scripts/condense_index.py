@@ -0,0 +1,89 @@
+"""Cap every SKU's reference set at K diverse photos and report what it costs.
+
+Bulk enrolls add bursts of near-identical shots; the index grows linearly with no
+recall to show for it. This keeps at most K vectors per SKU by farthest-point
+selection (EmbeddingIndex.representatives) — the photos that cover the SKU's spread
+of angles and lighting, not K copies of the same one — then saves the index (and the
+low-res index, same rows).
+
+    python -m vision.scripts.condense_index 8
+    python -m vision.scripts.condense_index 8 --eval data/eval     # top-1 before / after
+    python -m vision.scripts.condense_index 8 --eval data/eval --dry-run
+
+With --eval each eval image is embedded ONCE and searched against the index before
+and after condensing, so the accuracy delta is exact and cheap. --dry-run reports
+without saving.
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from vision.app.config import settings  # noqa: E402
+from vision.app.engine import get_engine  # noqa: E402
+from vision.app.index import EmbeddingIndex  # noqa: E402
+
+_IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def _eval_vectors(engine, root: Path) -> list[tuple[str, np.ndarray]]:
+    out = []
+    for sku_dir in sorted(d for d in root.iterdir() if d.is_dir()):
+        for img in sorted(sku_dir.iterdir()):
+            if img.suffix.lower() not in _IMG_EXT:
+                continue
+            try:
+                with Image.open(img) as im:
+                    out.append((sku_dir.name, engine.embed_images([im.convert("RGB")])[0]))
+            except Exception as exc:  # noqa: BLE001
+                print(f"  ! {img.name}: {exc}")
+    return out
+
+
+def _top1(index: EmbeddingIndex, queries: list[tuple[str, np.ndarray]]) -> float:
+    hits = sum(
+        1 for sku, vec in queries
+        if (r := index.search(vec, 1, settings.score_agg)) and r[0]["sku"] == sku
+    )
+    return hits / len(queries)
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    pos = [a for a in args if not a.startswith("--")]
+    if not pos:
+        raise SystemExit(__doc__)
+    k = int(pos[0])
+    eval_root = Path(args[args.index("--eval") + 1]) if "--eval" in args else None
+    dry_run = "--dry-run" in args
+
+    engine = get_engine()
+    index = engine.index
+    queries = _eval_vectors(engine, eval_root) if eval_root else []
+    before_acc = _top1(index, queries) if queries else None
+    before = index.size
+    rows = index.representatives(k)
+
+    if dry_run:
+        after_index = index.subset(rows)
+        after = after_index.size
+    else:
+        after = engine.condense(k)["after"]
+        after_index = engine.index
+
+    print(f"K={k}: {before} -> {after} vectors ({(1 - after / max(before, 1)) * 100:.0f}% smaller) "
+          f"across {index.sku_count} SKUs{'  [dry run, not saved]' if dry_run else ''}")
+    if queries:
+        after_acc = _top1(after_index, queries)
+        print(f"top-1 on {len(queries)} eval images: {before_acc * 100:.1f}% -> {after_acc * 100:.1f}% "
+              f"({(after_acc - before_acc) * 100:+.1f} pts)")
+
+
+if __name__ == "__main__":
+    main()
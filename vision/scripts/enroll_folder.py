@@ -1,14 +1,25 @@
 """Enroll reference photos into the index. No model retraining.
 
 Usage:
-    python -m vision.scripts.enroll_folder [path]
+    python -m vision.scripts.enroll_folder [path] [--workers 4] [--batch 16]
+        [--checkpoint 500] [--prefetch-mb 512] [--fresh] [--tenant T [--brand B]]
 
 `path` defaults to the configured REFERENCE_DIR. It can be either:
   • a parent folder of per-SKU subfolders:  reference/<SKU>/*.jpg
   • a single SKU folder:                    reference/BOSE-QC35-II/*.jpg
+
+Photos are decoded on --workers threads and embedded --batch at a time
+(app/bulk_enroll.py). Every --checkpoint photos the index is saved along with a
+progress manifest under data/cache/enroll/, so rerunning the same command after a
+crash or Ctrl-C picks up where it stopped (--fresh ignores the manifest). Photos
+that fail to decode or embed are listed, with the reason, in that directory's
+errors.json.
 """
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
 import sys
 from pathlib import Path
 
@@ -19,16 +30,43 @@ from vision.app.config import settings  # noqa: E402
 from vision.app.engine import get_engine  # noqa: E402
 
 
+def state_dir(target: Path, shard_key: str) -> Path:
+    """data/cache/enroll/<shard>-<hash of the folder>: one manifest per folder + shard."""
+    digest = hashlib.sha1(str(target.resolve()).encode()).hexdigest()[:10]
+    return settings.data_path / "cache" / "enroll" / f"{shard_key.replace('/', '_')}-{digest}"
+
+
 def main() -> None:
-    target = Path(sys.argv[1]) if len(sys.argv) > 1 else settings.reference_path
+    ap = argparse.ArgumentParser(prog="python -m vision.scripts.enroll_folder", description=__doc__.splitlines()[0])
+    ap.add_argument("path", nargs="?", type=Path, default=settings.reference_path)
+    ap.add_argument("--workers", type=int, default=4, help="decode threads")
+    ap.add_argument("--batch", type=int, help="photos per embed batch (default max(8, DETECTOR_BATCH))")
+    ap.add_argument("--checkpoint", type=int, default=500, help="save index + manifest every N photos")
+    ap.add_argument("--prefetch-mb", type=float, default=512, help="cap on decoded photos waiting to be embedded")
+    ap.add_argument("--fresh", action="store_true", help="ignore an unfinished run's manifest")
+    ap.add_argument("--tenant")
+    ap.add_argument("--brand")
+    args = ap.parse_args()
+    target = args.path
     if not target.exists():
         raise SystemExit(f"path not found: {target}")
     print(f"Enrolling from {target} ...")
     engine = get_engine()
-    added = engine.enroll_dir(target)
+    shard = engine.shard(args.tenant, args.brand)
+    state = state_dir(target, shard.key)
+    if args.fresh:
+        (state / "manifest.json").unlink(missing_ok=True)
+    added = engine.enroll_dir(
+        target, shard, workers=args.workers, batch=args.batch, checkpoint=args.checkpoint,
+        prefetch_mb=args.prefetch_mb, state_dir=state,
+    )
     total = sum(added.values())
     print(f"\nDone. Added {total} image(s) across {len(added)} SKU(s).")
-    print(f"Index now: {engine.index.size} vectors / {engine.index.sku_count} SKUs.")
+    print(f"Index now: {shard.index.size} vectors / {shard.index.sku_count} SKUs.")
+    report = state / "errors.json"
+    failed = json.loads(report.read_text())["errors"] if report.exists() else []
+    if failed:
+        print(f"{len(failed)} photo(s) failed to enroll — see {report}")
 
 
 if __name__ == "__main__":
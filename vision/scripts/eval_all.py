@@ -0,0 +1,255 @@
+"""Embedding, OCR and cascade eval over data/eval in ONE pass: decode once, batch both models.
+
+eval_index.py and ocr_identify.py each walk data/eval on their own, decoding every
+photo again and running one image at a time, so a full evaluation is two serial
+passes. Here each photo is read and decoded exactly once, and the pixels feed both
+models. The embedder gets the frame as decoded, exactly as eval_index.py and
+enrollment see it; only the OCR half's prepare() makes an EXIF-upright, <=2000px copy:
+
+    paths -> [decode pool: bytes, content hash, OCR store lookup, decode_once, prepare()]
+          -> batches of --batch -> [embed thread: detector + DINOv2, one forward pass]
+                                -> [OCR thread: batched EasyOCR for store misses]
+
+The two model threads run side by side (as in /analyze), and the decode pool works
+ahead of both. Reports:
+
+  * embedding: top-1/3/5, worst SKUs, confusions, threshold sweeps (eval_sweep's report)
+  * OCR: ocr_identify's overall / label-legible accuracy, scored against the index SKUs
+  * cascade: what /identify-cascade would answer at CASCADE_MARGIN (or --threshold) —
+    OCR fused in only where the embedding margin is close — and how many photos paid
+    for OCR
+  * wall clock: decode, embed and OCR busy time, time the batcher waited on decode, total
+
+    python -m vision.scripts.eval_all                   # data/eval
+    python -m vision.scripts.eval_all data/eval --workers 8 --batch 32 --threshold 0.08
+
+OCR reads the whole photo and shares ocr_extract / ocr_identify's stored reads (same
+content-hash key), so a rerun only re-embeds. The service cascade reads the detector
+crop instead; with the detector off the two are the same read.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from vision.app import evaluate as ev  # noqa: E402
+from vision.app.analyze import decode_once  # noqa: E402
+from vision.app.config import settings  # noqa: E402
+from vision.app.ocr_match import OcrMatcher, load_names  # noqa: E402
+from vision.app.ocr_pipeline import dataset_images  # noqa: E402
+from vision.app.ocr_store import content_hash  # noqa: E402
+from vision.scripts.eval_sweep import report  # noqa: E402
+
+
+class _Clock:
+    """Busy seconds per stage, summed across threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.busy: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.busy[stage] = self.busy.get(stage, 0.0) + seconds
+
+
+def _decode(path: Path, li, clock: _Clock):
+    """-> (image, digest, stored OCR text or None, prepared OCR array or None).
+    `image` is un-transposed (what the embedder sees at enrollment); the OCR array is
+    the upright copy."""
+    t0 = time.perf_counter()
+    data = path.read_bytes()
+    digest = content_hash(data)
+    with Image.open(io.BytesIO(data)) as im:
+        image = decode_once(im)
+    hit = li.lookup(digest)
+    arr = None if hit is not None else li.prepare(image)
+    clock.add("decode", time.perf_counter() - t0)
+    return image, digest, None if hit is None else hit[0], arr
+
+
+def _embed(engine, images, clock: _Clock) -> np.ndarray:
+    t0 = time.perf_counter()
+    out = engine.embed_images(images)
+    clock.add("embed", time.perf_counter() - t0)
+    return out
+
+
+def _ocr(li, items, clock: _Clock) -> list[str]:
+    """items: [(path, digest, stored text, array)] -> text per item (stored or fresh)."""
+    t0 = time.perf_counter()
+    texts = [t for _, _, t, _ in items]
+    todo = [i for i, (_, _, t, _) in enumerate(items) if t is None]
+    if todo:
+        arrs = [items[i][3] for i in todo]
+        digests = [items[i][1] for i in todo]
+        paths = [items[i][0] for i in todo]
+        try:
+            fresh = li.read_arrays(arrs, digests, paths)
+        except Exception:  # noqa: BLE001 — one bad image must not sink the batch
+            fresh = []
+            for a, d, p in zip(arrs, digests, paths):
+                try:
+                    fresh.extend(li.read_arrays([a], [d], [p]))
+                except Exception:  # noqa: BLE001
+                    fresh.append("")
+        for i, text in zip(todo, fresh):
+            texts[i] = text
+    clock.add("ocr", time.perf_counter() - t0)
+    return texts
+
+
+def run(engine, li, paths: list[Path], *, workers: int = 4, batch: int = 16, clock: _Clock):
+    """-> (kept paths, vectors (N, dim), OCR texts) for every readable path."""
+    kept: list[Path] = []
+    vectors: list[np.ndarray] = []
+    texts: list[str] = []
+    in_flight: deque = deque()  # (paths, embed future, ocr future), oldest first
+
+    def drain(limit: int) -> None:
+        while len(in_flight) > limit:
+            ps, fe, fo = in_flight.popleft()
+            kept.extend(ps)
+            vectors.append(fe.result())
+            texts.extend(fo.result())
+
+    with ThreadPoolExecutor(workers, thread_name_prefix="decode") as pool, \
+            ThreadPoolExecutor(1, thread_name_prefix="embed") as embed_pool, \
+            ThreadPoolExecutor(1, thread_name_prefix="ocr") as ocr_pool:
+        pending = deque()
+        todo = iter(paths)
+        errors = 0
+        done = 0
+        t0 = time.perf_counter()
+        while True:
+            while len(pending) < max(2 * batch, workers * 2):
+                p = next(todo, None)
+                if p is None:
+                    break
+                pending.append((p, pool.submit(_decode, p, li, clock)))
+            if not pending:
+                break
+            chunk = []
+            while pending and len(chunk) < batch:
+                p, fut = pending.popleft()
+                tw = time.perf_counter()
+                try:
+                    chunk.append((p, *fut.result()))
+                except Exception as exc:  # noqa: BLE001 — unreadable file: report, keep going
+                    errors += 1
+                    print(f"\n  ! {p.name}: {exc}")
+                clock.add("decode_wait", time.perf_counter() - tw)
+            if chunk:
+                ps = [c[0] for c in chunk]
+                fe = embed_pool.submit(_embed, engine, [c[1] for c in chunk], clock)
+                fo = ocr_pool.submit(_ocr, li, [(c[0], c[2], c[3], c[4]) for c in chunk], clock)
+                in_flight.append((ps, fe, fo))
+                drain(1)  # one batch queued behind the running one keeps both models fed
+            done += len(chunk)
+            rate = done / (time.perf_counter() - t0)
+            print(f"  {done}/{len(paths)}  {rate:.1f} img/s  ({errors} unreadable)", end="\r", flush=True)
+        drain(0)
+    print()
+    dim = engine.embedder.dim
+    return kept, np.concatenate(vectors).reshape(-1, dim) if vectors else np.zeros((0, dim), "float32"), texts
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m vision.scripts.eval_all", description=__doc__.splitlines()[0])
+    ap.add_argument("eval_dir", nargs="?", type=Path, default=settings.reference_path.parent / "eval")
+    ap.add_argument("--workers", type=int, default=4, help="decode threads")
+    ap.add_argument("--batch", type=int, default=16, help="images per embed / OCR batch")
+    ap.add_argument("--threshold", type=float, default=settings.cascade_margin, help="cascade margin")
+    args = ap.parse_args()
+    if not args.eval_dir.exists():
+        raise SystemExit(f"eval dir not found: {args.eval_dir}")
+
+    from vision.app.engine import get_engine
+    from vision.app.label_ocr import LabelIdentifier  # EasyOCR is heavy; lazy
+    from vision.app.ocr_store import OcrStore
+
+    t_start = time.perf_counter()
+    engine = get_engine()
+    print("Loading EasyOCR...")
+    li = LabelIdentifier(gpu=engine.embedder.device == "cuda", store=OcrStore(settings.ocr_store_file))
+    index = engine.index
+    t_load = time.perf_counter() - t_start
+    print(f"index: {index.size} vectors / {index.sku_count} SKUs  device={engine.embedder.device}")
+    names_map = load_names(settings.data_path)
+
+    def label(sku: str) -> str:
+        return names_map.get(sku, sku)[:48]
+
+    clock = _Clock()
+    paths = list(dataset_images(args.eval_dir))
+    t_run = time.perf_counter()
+    kept, queries, texts = run(engine, li, paths, workers=args.workers, batch=args.batch, clock=clock)
+    t_run = time.perf_counter() - t_run
+    if not kept:
+        raise SystemExit("no readable eval images")
+    labels = [p.parent.name for p in kept]
+
+    t_score = time.perf_counter()
+    scores, names = ev.sku_scores(index, queries, settings.score_agg)
+    truth = ev.truth_columns(names, labels)
+    report(f"embedding, agg={settings.score_agg}", scores, names, truth, label)
+
+    matcher = OcrMatcher(list(names), names_map)
+    ocr_pred = []
+    ocr_points = []
+    for text in texts:
+        ocr_pred.append(matcher.predict(text)[0])
+        ocr_points.append(dict(matcher.score(text)))
+    n = len(labels)
+    ocr_ok = sum(p == t for p, t in zip(ocr_pred, labels))
+    legible = [(p, t) for p, t in zip(ocr_pred, labels) if p is not None]
+    print("\n=== OCR ===")
+    print(f"overall: {ocr_ok}/{n} = {ocr_ok / n * 100:.1f}%")
+    if legible:
+        hits = sum(p == t for p, t in legible)
+        print(f"on label-legible photos: {hits}/{len(legible)} = {hits / len(legible) * 100:.1f}%  "
+              f"({len(legible) / n * 100:.0f}% of photos had a readable label)")
+
+    emb_pred, _, _ = ev.predictions(scores)
+    emb_ok = np.array([names[c] == t for c, t in zip(emb_pred, labels)])
+    cas_pred, to_ocr = ev.cascade_predictions(scores, names, ocr_points, args.threshold)
+    cas_ok = np.array([p == t for p, t in zip(cas_pred, labels)])
+    print(f"\n=== cascade (margin < {args.threshold:g} -> OCR) ===")
+    print(f"top-1: {cas_ok.mean() * 100:.1f}%   (embedding alone {emb_ok.mean() * 100:.1f}%, "
+          f"OCR alone {ocr_ok / n * 100:.1f}%)")
+    print(f"sent to OCR: {int(to_ocr.sum())}/{n} = {to_ocr.mean() * 100:.0f}%")
+    for path, mask in (("embed", ~to_ocr), ("ocr", to_ocr)):
+        if mask.any():
+            print(f"  {path:5s} path: {cas_ok[mask].mean() * 100:5.1f}% of {int(mask.sum())}  "
+                  f"(embedding top-1 on these: {emb_ok[mask].mean() * 100:.1f}%)")
+    fixed = int((cas_ok & ~emb_ok).sum())
+    broken = int((~cas_ok & emb_ok).sum())
+    print(f"  OCR fixed {fixed}, broke {broken}")
+    t_score = time.perf_counter() - t_score
+
+    busy = clock.busy
+    print(f"\n=== wall clock ({n} images, {args.workers} decode workers, batch {args.batch}) ===")
+    print(f"model load          {t_load:7.1f}s")
+    print(f"pipeline            {t_run:7.1f}s   {n / t_run:.1f} img/s")
+    print(f"  decode busy       {busy.get('decode', 0.0):7.1f}s   (summed over workers)")
+    print(f"  embed busy        {busy.get('embed', 0.0):7.1f}s")
+    print(f"  OCR busy          {busy.get('ocr', 0.0):7.1f}s")
+    print(f"  waited on decode  {busy.get('decode_wait', 0.0):7.1f}s")
+    print(f"scoring + reports   {t_score:7.1f}s")
+    print(f"total               {time.perf_counter() - t_start:7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
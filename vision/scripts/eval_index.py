@@ -7,13 +7,20 @@ accuracy, and the most common confusions (which product got predicted instead).
 
     python -m vision.scripts.eval_index            # uses data/eval
     python -m vision.scripts.eval_index data/eval
+    python -m vision.scripts.eval_index --full     # skip the LOWRES_SIZE first pass
+
+Also reports identify latency (mean / p50 / p95) and, with LOWRES_SIZE set, how many
+queries the low-res pass answered — run once with and once with --full to compare
+accuracy and average latency of the multi-resolution cascade.
 """
 from __future__ import annotations
 
 import sys
+import time
 from collections import defaultdict
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 
 from vision.app.config import settings
@@ -23,7 +30,9 @@ _IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
 
 
 def main() -> None:
-    eval_root = Path(sys.argv[1]) if len(sys.argv) > 1 else (settings.reference_path.parent / "eval")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    use_lowres = "--full" not in sys.argv[1:]
+    eval_root = Path(args[0]) if args else (settings.reference_path.parent / "eval")
     if not eval_root.exists():
         raise SystemExit(f"eval dir not found: {eval_root}")
 
@@ -35,6 +44,9 @@ def main() -> None:
     per_prod_total: dict[str, int] = defaultdict(int)
     per_prod_correct: dict[str, int] = defaultdict(int)
     confusions: dict[tuple[str, str], int] = defaultdict(int)
+    latency_ms: list[float] = []
+    by_res: dict[str, int] = defaultdict(int)
+    res_correct: dict[str, int] = defaultdict(int)
     # readable names from the dataset manifest if present
     names: dict[str, str] = {}
     import json
@@ -52,15 +64,21 @@ def main() -> None:
                 continue
             try:
                 with Image.open(img) as im:
-                    cands = engine.identify(im)
+                    im.load()
+                    t0 = time.perf_counter()
+                    cands, info = engine.identify_ranked(im, lowres=use_lowres)
+                    res = info["resolution"]
+                    latency_ms.append((time.perf_counter() - t0) * 1000)
             except Exception as exc:  # noqa: BLE001
                 print(f"  ! {img.name}: {exc}")
                 continue
             total += 1
             per_prod_total[true_sku] += 1
+            by_res[res] += 1
             pred = cands[0]["sku"] if cands else None
             if pred == true_sku:
                 correct += 1
+                res_correct[res] += 1
                 per_prod_correct[true_sku] += 1
             else:
                 confusions[(true_sku, pred or "∅")] += 1
@@ -81,6 +99,14 @@ def main() -> None:
     print(f"\nOVERALL top-1: {correct}/{total} = {correct/total*100:.1f}%   top-3: {top3_correct/total*100:.1f}%")
     perfect = sum(1 for s in per_prod_total if per_prod_correct[s] == per_prod_total[s])
     print(f"products at 100%: {perfect}/{len(per_prod_total)}")
+    lat = np.asarray(latency_ms)
+    print(
+        f"identify latency: mean {lat.mean():.1f} ms  p50 {np.percentile(lat, 50):.1f}  "
+        f"p95 {np.percentile(lat, 95):.1f}"
+    )
+    for res in sorted(by_res):
+        n = by_res[res]
+        print(f"  answered at {res}-res: {n}/{total} ({n/total*100:.0f}%)  top-1 {res_correct[res]/n*100:.1f}%")
 
     if confusions:
         print("\n=== TOP CONFUSIONS (true -> predicted) ===")
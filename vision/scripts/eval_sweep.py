@@ -0,0 +1,165 @@
+"""Identify eval from cached embeddings: sweep settings in NumPy, no GPU pass per run.
+
+eval_index.py pushes every eval image through engine.identify each time, so asking
+"max or mean?", "what score threshold?", "does condensing to 8 photos per SKU hurt?"
+costs a full embedding pass per question. This embeds data/eval ONCE (batched,
+through the same preprocessing, detector crop included) into a cache, then answers
+all of those from the stored vectors:
+
+    python -m vision.scripts.eval_sweep                      # data/eval, cached
+    python -m vision.scripts.eval_sweep --condense 4,8,16    # + condensed variants
+    python -m vision.scripts.eval_sweep --loo                # + leave-one-out on the index
+    python -m vision.scripts.eval_sweep --refresh            # re-embed everything
+
+Reports, per index variant x aggregation (max / mean): top-1/3/5 accuracy. For the
+configured SCORE_AGG on the full index: worst SKUs, top confusions, and coverage vs
+accuracy when a top-1 is only accepted above a score / margin threshold.
+--loo scores every reference photo against the index minus itself — how well the
+references cover each other, with no eval set needed.
+
+The cache (data/cache/eval_vectors.npz) is keyed by model + detector setting and by
+each file's size + mtime, so only new or changed images are embedded.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from vision.app import evaluate as ev  # noqa: E402
+from vision.app.config import settings  # noqa: E402
+from vision.app.engine import get_engine  # noqa: E402
+from vision.app.ocr_match import load_names  # noqa: E402
+
+_IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+_AGGS = ("max", "mean")
+
+
+def _listing(root: Path) -> list[tuple[str, Path, str]]:
+    out = []
+    for sku_dir in sorted(d for d in root.iterdir() if d.is_dir()):
+        for img in sorted(sku_dir.iterdir()):
+            if img.suffix.lower() in _IMG_EXT:
+                st = img.stat()
+                out.append((sku_dir.name, img, f"{st.st_size}-{int(st.st_mtime)}"))
+    return out
+
+
+def cached_vectors(engine, root: Path, cache: Path, *, refresh: bool = False, batch: int = 16):
+    """-> (labels, vectors (N, dim)) for every readable image under root/<sku>/."""
+    key = f"{settings.embed_model}|detector={int(engine.detector is not None)}"
+    known: dict[tuple[str, str], np.ndarray] = {}
+    if cache.exists() and not refresh:
+        data = np.load(cache, allow_pickle=False)
+        if str(data["key"]) == key:
+            known = {(p, s): v for p, s, v in zip(data["paths"], data["stamps"], data["vectors"])}
+    listing = _listing(root)
+    todo = [(i, path) for i, (_, path, stamp) in enumerate(listing) if (str(path), stamp) not in known]
+    fresh: dict[int, np.ndarray] = {}
+    for start in range(0, len(todo), batch):
+        chunk = todo[start:start + batch]
+        images, ids = [], []
+        for i, path in chunk:
+            try:
+                with Image.open(path) as im:
+                    images.append(im.convert("RGB"))
+                ids.append(i)
+            except Exception as exc:  # noqa: BLE001
+                print(f"  ! {path.name}: {exc}")
+        if images:
+            for i, v in zip(ids, engine.embed_images(images)):
+                fresh[i] = v
+        print(f"  embedded {min(start + batch, len(todo))}/{len(todo)}", end="\r", flush=True)
+    if todo:
+        print()
+    labels, vecs, paths, stamps = [], [], [], []
+    for i, (sku, path, stamp) in enumerate(listing):
+        v = fresh.get(i, known.get((str(path), stamp)))
+        if v is None:
+            continue
+        labels.append(sku)
+        vecs.append(v)
+        paths.append(str(path))
+        stamps.append(stamp)
+    vectors = np.asarray(vecs, dtype="float32").reshape(-1, engine.embedder.dim)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(cache, key=np.array(key), paths=np.array(paths), stamps=np.array(stamps), vectors=vectors)
+    print(f"eval vectors: {len(labels)} ({len(todo)} embedded now, {len(labels) - len(fresh)} from cache)")
+    return labels, vectors
+
+
+def report(title: str, scores, names, truth, label) -> None:
+    pred, top, gap = ev.predictions(scores)
+    correct = pred == truth
+    acc = ev.topk_accuracy(scores, truth)
+    print(f"\n=== {title} ===")
+    print(f"top-1 {acc[1] * 100:.1f}%  top-3 {acc[3] * 100:.1f}%  top-5 {acc[5] * 100:.1f}%  (n={len(truth)})")
+    ok, total = ev.per_sku_accuracy(pred, truth, len(names))
+    worst = [i for i in np.argsort(ok / np.maximum(total, 1), kind="stable") if total[i]][:10]
+    print("worst SKUs:  acc    n  name")
+    for i in worst:
+        print(f"           {ok[i] / total[i] * 100:4.0f}% {total[i]:4d}  {label(names[i])}")
+    conf = ev.confusions(pred, truth)
+    if conf:
+        print("top confusions (true -> predicted):")
+        for t, p, c in conf:
+            print(f"  {c:3d}x  {label(names[t])[:34]:34s} -> {label(names[p])[:34]}")
+    for what, values, grid in (("top score", top, np.arange(0.3, 0.95, 0.05)),
+                               ("margin", gap, np.arange(0.0, 0.21, 0.02))):
+        print(f"accept only when {what} >= t:   t  coverage  accuracy")
+        for row in ev.threshold_sweep(values, correct, grid):
+            acc_s = f"{row['accuracy'] * 100:6.1f}%" if row["accuracy"] is not None else "     -"
+            print(f"{'':30s}{row['threshold']:5.2f}  {row['coverage'] * 100:6.1f}%   {acc_s}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m vision.scripts.eval_sweep", description=__doc__.splitlines()[0])
+    ap.add_argument("eval_dir", nargs="?", type=Path, default=settings.reference_path.parent / "eval")
+    ap.add_argument("--condense", default="", help="also try K photos per SKU, e.g. 4,8,16")
+    ap.add_argument("--loo", action="store_true", help="leave-one-out over the reference index")
+    ap.add_argument("--refresh", action="store_true", help="ignore the embedding cache")
+    args = ap.parse_args()
+    eval_root = args.eval_dir
+    condense = [int(k) for k in args.condense.split(",") if k.strip()]
+    if not eval_root.exists() and not args.loo:
+        raise SystemExit(f"eval dir not found: {eval_root}")
+
+    engine = get_engine()
+    index = engine.index
+    print(f"index: {index.size} vectors / {index.sku_count} SKUs  device={engine.embedder.device}")
+    names_map = load_names(settings.data_path)
+
+    def label(sku: str) -> str:
+        return names_map.get(sku, sku)[:48]
+
+    variants = [("full", index)] + [(f"condensed K={k}", index.subset(index.representatives(k))) for k in condense]
+
+    if eval_root.exists():
+        labels, queries = cached_vectors(
+            engine, eval_root, settings.data_path / "cache" / "eval_vectors.npz", refresh=args.refresh
+        )
+        print(f"\n{'variant':18s} {'vectors':>8s}  " + "  ".join(f"{a + ' top-1':>10s} {a + ' top-3':>10s}" for a in _AGGS))
+        for vname, idx in variants:
+            cells = []
+            for agg in _AGGS:
+                scores, names = ev.sku_scores(idx, queries, agg)
+                acc = ev.topk_accuracy(scores, ev.truth_columns(names, labels))
+                cells.append(f"{acc[1] * 100:9.1f}% {acc[3] * 100:9.1f}%")
+            print(f"{vname:18s} {idx.size:8d}  " + "  ".join(cells))
+        scores, names = ev.sku_scores(index, queries, settings.score_agg)
+        report(f"eval, full index, agg={settings.score_agg}", scores, names, ev.truth_columns(names, labels), label)
+
+    if args.loo:
+        for agg in _AGGS:
+            scores, names, truth = ev.leave_one_out(index, agg)
+            report(f"leave-one-out over the index, agg={agg}", scores, names, truth, label)
+
+
+if __name__ == "__main__":
+    main()
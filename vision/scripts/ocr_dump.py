@@ -14,21 +14,22 @@ _IMG = {".jpg", ".jpeg", ".png", ".webp"}
 
 
 def main() -> None:
-    import easyocr
+    from vision.app.label_ocr import LabelIdentifier
+    from vision.app.ocr_pipeline import OcrPipeline
+
     per = int(sys.argv[1]) if len(sys.argv) > 1 else 3
-    reader = easyocr.Reader(["en"], gpu=True, verbose=False)
+    li = LabelIdentifier(gpu=True)
     eval_root = DATA / "eval"
+    groups: dict[str, list[Path]] = {}
     for d in sorted(eval_root.iterdir()):
-        if not d.is_dir():
-            continue
-        imgs = [p for p in sorted(d.iterdir()) if p.suffix.lower() in _IMG][:per]
-        print(f"\n### {d.name}")
+        if d.is_dir():
+            groups[d.name] = [p for p in sorted(d.iterdir()) if p.suffix.lower() in _IMG][:per]
+    # prefetching, batched OCR over the whole sample; print grouped afterwards
+    texts = dict(OcrPipeline(li).run([p for imgs in groups.values() for p in imgs]))
+    for name, imgs in groups.items():
+        print(f"\n### {name}")
         for img in imgs:
-            try:
-                txt = " ".join(reader.readtext(str(img), detail=0, paragraph=True))
-            except Exception as exc:  # noqa: BLE001
-                txt = f"<err {exc}>"
-            txt = txt.replace("\n", " ")
+            txt = texts.get(img, "").replace("\n", " ")
             print(f"  {img.name[:24]}: {txt[:160]}")
 
 
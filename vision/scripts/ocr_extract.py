@@ -2,7 +2,17 @@
 and group photos by the product their OWN label names (ground truth = the label,
 not the timestamp). Outputs per-model counts + the clearest example per product.
 
+Orientation is estimated per photo before recognition (LabelIdentifier auto_orient),
+so upside-down / sideways labels read at single-pass cost. OCR_ORIENT=0 disables it.
+
     python -m vision.scripts.ocr_extract [root]   # default: data/train + data/eval
+    python -m vision.scripts.ocr_extract --import-json   # migrate old ocr_cache.json first
+
+OCR text goes to the shared OCR store (OCR_STORE_PATH, SQLite, keyed by file content
+hash + OCR settings), so re-running with a different classify() filter is instant and
+the service reuses these reads too. Each result is written as it's produced, so an
+interrupted scan resumes where it stopped. Decode/resize runs OCR_WORKERS threads
+ahead of batched GPU OCR (OCR_BATCH); progress lines report img/s.
 
 Writes vision/data/ocr_labels.json:
   { model -> { count, examples:[{path, text, score}] } }
@@ -10,57 +20,38 @@ Writes vision/data/ocr_labels.json:
 from __future__ import annotations
 
 import json
-import re
 import sys
 from collections import defaultdict
 from pathlib import Path
 
-import numpy as np
-from PIL import Image, ImageOps
-
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "data"
 _IMG = {".jpg", ".jpeg", ".png", ".webp"}
 import os
-ROTATE = os.environ.get("OCR_ROTATE", "0") == "1"  # OCR_ROTATE=1 adds 180° pass (2x slower)
+ORIENT = os.environ.get("OCR_ORIENT", "1") == "1"  # auto 0/90/180/270 before recognition
+WORKERS = int(os.environ.get("OCR_WORKERS", "4"))   # decode/resize threads ahead of the GPU
+BATCH = int(os.environ.get("OCR_BATCH", "8"))       # same-shape images per detection batch
 
 # Lexicon + matcher live in the shared module so the FastAPI service and these
 # scripts agree on one rule. (Re-exported here for back-compat with reclassify.py.)
 from vision.app.label_ocr import LEXICON, normalize, classify  # noqa: E402,F401
+from vision.app.ocr_pipeline import OcrPipeline, dataset_images  # noqa: E402
 
 
 def main() -> None:
-    import easyocr
-    roots = [Path(sys.argv[1])] if len(sys.argv) > 1 else [DATA / "train", DATA / "eval"]
-    reader = easyocr.Reader(["en"], gpu=True, verbose=False)
-
-    # OCR cache: path -> text. OCR is the expensive step; cache it so re-running with
-    # a different classify() filter is instant. Bust the cache by deleting the file
-    # or bumping the key suffix when ROTATE changes.
-    cache_path = DATA / "ocr_cache.json"
-    suffix = "+r180" if ROTATE else ""
-    cache: dict[str, str] = json.loads(cache_path.read_text()) if cache_path.exists() else {}
-    dirty = 0
-
-    def ocr(path: Path) -> str:
-        nonlocal dirty
-        key = str(path) + suffix
-        if key in cache:
-            return cache[key]
-        try:
-            im = ImageOps.exif_transpose(Image.open(path)).convert("RGB")
-            if max(im.size) > 2000:
-                im.thumbnail((2000, 2000))  # label text legible; faster detection
-            arr = np.array(im)
-            rot = [180] if ROTATE else []
-            text = " ".join(reader.readtext(arr, detail=0, paragraph=True, rotation_info=rot))
-        except Exception:
-            text = ""
-        cache[key] = text
-        dirty += 1
-        if dirty % 100 == 0:
-            cache_path.write_text(json.dumps(cache))
-        return text
+    from vision.app.config import settings
+    from vision.app.label_ocr import LabelIdentifier
+    from vision.app.ocr_store import OcrStore
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    roots = [Path(args[0])] if args else [DATA / "train", DATA / "eval"]
+    store = OcrStore(settings.ocr_store_file)
+    li = LabelIdentifier(gpu=True, auto_orient=ORIENT, store=store)
+    legacy = DATA / "ocr_cache.json"
+    if "--import-json" in sys.argv and legacy.exists():
+        n = store.import_json_cache(legacy, li.settings_key)
+        print(f"  imported {n} legacy cache entries", file=sys.stderr)
+    pipeline = OcrPipeline(li, workers=WORKERS, batch=BATCH)
 
     groups: dict[str, list[dict]] = defaultdict(list)
     total = 0
@@ -68,23 +59,14 @@ def main() -> None:
     for root in roots:
         if not root.exists():
             continue
-        for sku_dir in sorted(root.iterdir()):
-            if not sku_dir.is_dir():
-                continue
-            for img in sorted(sku_dir.iterdir()):
-                if img.suffix.lower() not in _IMG:
-                    continue
-                total += 1
-                if total % 100 == 0:
-                    print(f"  ...{total} scanned, {matched} matched", file=sys.stderr, flush=True)
-                text = ocr(img)
-                model, score = classify(text)
-                if model:
-                    matched += 1
-                    groups[model].append({"path": str(img), "text": text[:200], "score": score, "len": len(text)})
+        for img, text in pipeline.run(dataset_images(root, _IMG)):
+            total += 1
+            model, score = classify(text)
+            if model:
+                matched += 1
+                groups[model].append({"path": str(img), "text": text[:200], "score": score, "len": len(text)})
         # progress to stderr
         print(f"  scanned {root.name}: total={total} matched={matched}", file=sys.stderr)
-    cache_path.write_text(json.dumps(cache))
 
     # rank models by count; pick clearest example (longest confident text) each
     out = {}
@@ -15,95 +15,30 @@ confident match), since no-label photos are an embedding job, not an OCR one.
 """
 from __future__ import annotations
 
-import json
-import re
 import sys
 from collections import defaultdict
 from pathlib import Path
 
+# Matcher + signature rules live in the shared module so the service scores OCR text
+# the same way. (Re-exported here for back-compat.)
+from vision.app.ocr_match import OcrMatcher, normalize, signature  # noqa: F401
+from vision.app.ocr_match import load_names as _load_names
+
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "data"
 _IMG_EXT = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
 
-# Map IV/III/II <-> digits both ways so "Wave III" matches "Wave 3".
-_ROMAN = {"III": "3", "IV": "4", "II": "2", "VI": "6", "V": "5"}
-
-
-def normalize(text: str) -> tuple[str, str]:
-    """Return (spaced-uppercase-tokens, concatenated-alnum) forms of OCR text."""
-    up = text.upper()
-    for r, d in _ROMAN.items():
-        up = re.sub(rf"\b{r}\b", d, up)
-    spaced = re.sub(r"[^A-Z0-9]+", " ", up).strip()
-    concat = re.sub(r"[^A-Z0-9]+", "", up)
-    return spaced, concat
-
-
-def signature(name: str) -> dict[str, int]:
-    """Weighted signature tokens for a product name. Model codes dominate."""
-    spaced, _ = normalize(name)
-    sig: dict[str, int] = {}
-    for tok in spaced.split():
-        if len(tok) < 2:
-            continue
-        has_digit = any(c.isdigit() for c in tok)
-        if has_digit and len(tok) >= 3:
-            sig[tok] = 10          # strong model code: AWRCC1, AWRC1G, VCS10, AV35, 251
-        elif has_digit:
-            sig[tok] = 5           # short code/generation digit: 2, 5, 10, 3, 4
-        elif tok in {"SOUNDDOCK", "SOUNDTOUCH", "COMPANION", "LIFESTYLE", "ACOUSTIMASS",
-                      "SOUNDLINK", "CINEMATE", "SOLO", "VCS"}:
-            sig[tok] = 4           # product-line words
-        elif tok in {"WAVE", "RADIO", "MUSIC", "SYSTEM", "SPEAKER", "ENVIRONMENTAL",
-                      "OUTDOOR", "CENTER", "CHANNEL", "TV", "CONSOLE", "CD"}:
-            sig[tok] = 1
-    return sig
-
 
 def load_names() -> dict[str, str]:
-    for f in ["dataset_manifest.json", "nas_pairing.json"]:
-        p = DATA / f
-        if p.exists():
-            doc = json.loads(p.read_text())
-            return {x["zoho_item_id"]: (x.get("name") or x["zoho_item_id"])
-                    for x in doc.get("products", [])}
-    return {}
-
-
-class OcrMatcher:
-    def __init__(self, product_ids: list[str], names: dict[str, str]):
-        self.names = names
-        self.sigs = {pid: signature(names.get(pid, pid)) for pid in product_ids}
-
-    def score(self, ocr_text: str) -> list[tuple[str, int]]:
-        spaced, concat = normalize(ocr_text)
-        spaced_set = set(spaced.split())
-        out = []
-        for pid, sig in self.sigs.items():
-            s = 0
-            for tok, w in sig.items():
-                # strong codes: substring match in the concatenated form (OCR may
-                # split "AWRCC1" as "AWR CC1"); weak words: whole-token match.
-                if w >= 10:
-                    if tok in concat:
-                        s += w
-                elif tok in spaced_set:
-                    s += w
-            out.append((pid, s))
-        out.sort(key=lambda x: x[1], reverse=True)
-        return out
-
-    def predict(self, ocr_text: str, min_score: int = 10) -> tuple[str | None, int, int]:
-        ranked = self.score(ocr_text)
-        top_id, top = ranked[0]
-        second = ranked[1][1] if len(ranked) > 1 else 0
-        if top < min_score or top == second:   # need a confident, unambiguous winner
-            return None, top, second
-        return top_id, top, second
+    return _load_names(DATA)
 
 
 def main() -> None:
-    import easyocr  # heavy import; lazy
+    from vision.app.config import settings
+    from vision.app.label_ocr import LabelIdentifier  # EasyOCR is heavy; lazy
+    from vision.app.ocr_pipeline import OcrPipeline, dataset_images
+    from vision.app.ocr_store import OcrStore
+
     names = load_names()
 
     eval_root = DATA / "eval"
@@ -114,11 +49,12 @@ def main() -> None:
     matcher = OcrMatcher(product_ids, names)
 
     print("Loading EasyOCR (GPU)...")
-    reader = easyocr.Reader(["en"], gpu=True, verbose=False)
+    # orientation-corrected, same read as the service; reuses ocr_extract's stored reads
+    li = LabelIdentifier(gpu=True, store=OcrStore(settings.ocr_store_file))
 
     def ocr(path: Path) -> str:
         try:
-            return " ".join(reader.readtext(str(path), detail=0, paragraph=True))
+            return li.read_file(path)
         except Exception as exc:  # noqa: BLE001
             return ""
 
@@ -134,25 +70,20 @@ def main() -> None:
     labeled = labeled_correct = 0
     per_total: dict[str, int] = defaultdict(int)
     per_correct: dict[str, int] = defaultdict(int)
-    for sku_dir in sorted(eval_root.iterdir()):
-        if not sku_dir.is_dir():
-            continue
-        true_id = sku_dir.name
-        for img in sorted(sku_dir.iterdir()):
-            if img.suffix.lower() not in _IMG_EXT:
-                continue
-            text = ocr(img)
-            pid, top, second = matcher.predict(text)
-            total += 1
-            per_total[true_id] += 1
-            hit = pid == true_id
+    # decode/resize runs ahead of batched GPU OCR; stored reads skip both
+    for img, text in OcrPipeline(li).run(dataset_images(eval_root, _IMG_EXT)):
+        true_id = img.parent.name
+        pid, top, second = matcher.predict(text)
+        total += 1
+        per_total[true_id] += 1
+        hit = pid == true_id
+        if hit:
+            correct += 1
+            per_correct[true_id] += 1
+        if pid is not None:          # a confident OCR match = "label legible"
+            labeled += 1
             if hit:
-                correct += 1
-                per_correct[true_id] += 1
-            if pid is not None:          # a confident OCR match = "label legible"
-                labeled += 1
-                if hit:
-                    labeled_correct += 1
+                labeled_correct += 1
 
     print("\n=== PER-PRODUCT OCR ACCURACY ===")
     print("acc     n   name")
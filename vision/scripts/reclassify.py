@@ -1,28 +1,34 @@
-"""Re-classify cached OCR text with the current lexicon — instant, no OCR/GPU.
+"""Re-classify stored OCR text with the current lexicon — instant, no OCR/GPU.
 Lets us iterate the Bose lexicon without re-running EasyOCR.
 
     python -m vision.scripts.reclassify [strict|loose]
+
+Streams the reads ocr_extract wrote to the OCR store under the current OCR settings
+(OCR_ORIENT, EasyOCR version); nothing is loaded into memory wholesale.
 """
 from __future__ import annotations
 
 import json
 import sys
 from collections import defaultdict
-from pathlib import Path
 
-from vision.app.config import settings  # noqa: F401  (keeps path resolution consistent)
-from vision.scripts.ocr_extract import classify, DATA
+from vision.app.config import settings
+from vision.app.ocr_store import MAX_SIDE, OcrStore, settings_key
+from vision.scripts.ocr_extract import ORIENT, classify, DATA
 
 strict = (sys.argv[1] if len(sys.argv) > 1 else "strict") != "loose"
-cache = json.loads((DATA / "ocr_cache.json").read_text())
+if not settings.ocr_store_file.exists():
+    raise SystemExit(f"no OCR store at {settings.ocr_store_file} — run ocr_extract first")
+store = OcrStore(settings.ocr_store_file)
 
 groups: dict[str, list[dict]] = defaultdict(list)
-matched = 0
-for path, text in cache.items():
+matched = total = 0
+for path, text in store.iter_texts(settings_key(ORIENT, MAX_SIDE)):
+    total += 1
     model, _ = classify(text, strict=strict)
     if model:
         matched += 1
-        groups[model].append({"path": path.replace("+r180", ""), "text": text[:160], "len": len(text)})
+        groups[model].append({"path": path, "text": text[:160], "len": len(text)})
 
 out = {}
 for model, items in groups.items():
@@ -31,7 +37,7 @@ for model, items in groups.items():
 ranked = sorted(out.items(), key=lambda kv: kv[1]["count"], reverse=True)
 (DATA / "ocr_labels.json").write_text(json.dumps(dict(ranked), indent=2))
 
-print(f"strict={strict}  photos={len(cache)}  matched={matched} ({matched/len(cache)*100:.0f}%)  distinct products={len(out)}")
+print(f"strict={strict}  photos={total}  matched={matched} ({matched/max(1, total)*100:.0f}%)  distinct products={len(out)}")
 print("\ncount  product                              best-example")
 for model, info in ranked:
     ex = info["examples"][0]["path"].split("scan")[-1].split("data")[-1] if info["examples"] else ""
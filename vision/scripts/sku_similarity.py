@@ -0,0 +1,86 @@
+"""Which SKUs look alike? Closest SKU pairs straight from the enrolled vectors.
+
+No eval run and no model load: reads the index (global, or a tenant shard), brings
+the SKU x SKU similarity matrix next to it up to date — only SKUs whose photos
+changed since the last run are recomputed — and prints the closest pairs, or one
+SKU's nearest neighbors. Scores are the best cosine between any two reference
+photos; pairs near 1.0 are the AWRCC1 / AWRCC2 kind that only the label tells apart.
+
+    python -m vision.scripts.sku_similarity                    # 30 closest pairs
+    python -m vision.scripts.sku_similarity --top 100 --min 0.9
+    python -m vision.scripts.sku_similarity --sku 1234567000000123
+    python -m vision.scripts.sku_similarity --tenant acme --brand bose
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Make `vision.*` importable no matter the CWD (repo root or inside vision/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np  # noqa: E402
+
+from vision.app.config import settings  # noqa: E402
+from vision.app.index import EmbeddingIndex  # noqa: E402
+from vision.app.ocr_match import load_names  # noqa: E402
+from vision.app.shards import shard_key  # noqa: E402
+from vision.app.similarity import SkuSimilarity  # noqa: E402
+
+
+def _load(tenant: str | None, brand: str | None) -> tuple[EmbeddingIndex, Path]:
+    """-> (index, similarity file) for the global index or a tenant shard, reading
+    the vector dim from the stored matrix instead of loading the embedder."""
+    key = shard_key(tenant, brand)
+    if key is None:
+        f = settings.index_file
+        if not f.exists():
+            raise SystemExit(f"no index at {f}")
+        dim = np.load(f, allow_pickle=True)["vectors"].shape[1]
+        return EmbeddingIndex.load(f, dim), settings.similarity_file
+    index_dir = settings.tenants_path / key / "index"
+    if not (index_dir / "vectors.npy").exists():
+        raise SystemExit(f"no index at {index_dir}")
+    dim = np.load(index_dir / "vectors.npy", mmap_mode="r").shape[1]
+    return EmbeddingIndex.load_dir(index_dir, dim), index_dir / "similarity.npz"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m vision.scripts.sku_similarity", description=__doc__.splitlines()[0])
+    ap.add_argument("--sku", help="list this SKU's nearest neighbors instead of the closest pairs")
+    ap.add_argument("--top", type=int, default=30, help="pairs (or neighbors) to list")
+    ap.add_argument("--min", type=float, dest="min_score", help="only scores at or above this")
+    ap.add_argument("--tenant")
+    ap.add_argument("--brand")
+    args = ap.parse_args()
+
+    index, path = _load(args.tenant, args.brand)
+    print(f"index: {index.size} vectors / {index.sku_count} SKUs")
+    sim = SkuSimilarity.load(path)
+    t0 = time.perf_counter()
+    changed = sim.update(index)
+    if changed:
+        sim.save(path)
+    print(f"similarity: {len(changed)} SKU(s) recomputed in {time.perf_counter() - t0:.2f}s -> {path}")
+    names = load_names(settings.data_path)
+
+    def label(sku: str) -> str:
+        return names.get(sku, sku)[:40]
+
+    if args.sku:
+        rows = sim.neighbors(args.sku, args.top, args.min_score)
+        if not rows and args.sku not in sim.names:
+            raise SystemExit(f"sku not enrolled: {args.sku}")
+        print(f"\nnearest to {label(args.sku)}:")
+        for r in rows:
+            print(f"  {r['score']:.4f}  {label(r['sku'])}")
+        return
+    print("\nclosest SKU pairs:")
+    for r in sim.pairs(args.top, args.min_score):
+        print(f"  {r['score']:.4f}  {label(r['a']):40s} ~ {label(r['b'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -75,8 +75,12 @@ def run_golden() -> tuple[int, int]:
         print("  (no ocr_labels.json — run ocr_extract first; skipping)")
         return 0, 0
     labels = json.loads(labels_path.read_text())
+    from vision.app.config import settings
     from vision.app.label_ocr import LabelIdentifier
-    li = LabelIdentifier(gpu=True)
+    from vision.app.ocr_store import OcrStore, file_hash
+    # Store-backed: a golden image re-read under unchanged OCR settings is instant;
+    # an EasyOCR upgrade changes the settings key and forces a fresh read.
+    li = LabelIdentifier(gpu=True, store=OcrStore(settings.ocr_store_file))
 
     passed = failed = 0
     for model, info in sorted(labels.items(), key=lambda kv: -kv[1]["count"]):
@@ -88,7 +92,8 @@ def run_golden() -> tuple[int, int]:
             print(f"  skip {model} (example missing)")
             continue
         from PIL import Image
-        got = li.identify(Image.open(img))["model"]
+        with Image.open(img) as im:
+            got = li.identify(im, content_hash=file_hash(img))["model"]
         ok = got == model
         passed += ok
         failed += not ok
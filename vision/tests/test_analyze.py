@@ -6,8 +6,12 @@ Run:  python vision/tests/test_analyze.py      (or: cd vision && python -m unitt
 """
 import os
 import sys
+import threading
+import time
 import unittest
 
+from PIL import Image
+
 # Make `app` importable regardless of CWD (vision/ is the package root).
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -57,18 +61,26 @@ class BuildAnalysisTests(unittest.TestCase):
 
 
 class FakeEngine:
-    def __init__(self, ranked):
+    def __init__(self, ranked, box=None):
         self._ranked = ranked
+        self._box = box
+        self.boxes = []
+
+    def locate(self, _image):
+        return self._box
 
-    def identify(self, _image):
+    def identify(self, _image, box=None, shard=None):
+        self.boxes.append(box)
         return self._ranked
 
 
 class FakeLabeler:
     def __init__(self, text):
         self._text = text
+        self.boxes = []
 
-    def read_text(self, _image):
+    def read_text(self, _image, box=None):
+        self.boxes.append(box)
         return self._text
 
 
@@ -85,7 +97,10 @@ class PhotoAnalyzerTests(unittest.TestCase):
 
     def test_empty_index_degrades_to_ocr_only(self):
         class Boom:
-            def identify(self, _image):
+            def locate(self, _image):
+                raise RuntimeError("detector not loaded")
+
+            def identify(self, _image, box=None, shard=None):
                 raise RuntimeError("index not built")
 
         analyzer = PhotoAnalyzer(Boom(), FakeLabeler("MODEL AWRCC2"))
@@ -95,7 +110,7 @@ class PhotoAnalyzerTests(unittest.TestCase):
 
     def test_ocr_failure_degrades_to_label_only(self):
         class BadOcr:
-            def read_text(self, _image):
+            def read_text(self, _image, box=None):
                 raise RuntimeError("easyocr exploded")
 
         engine = FakeEngine([{"sku": "BOSE-901", "score": 0.99}])
@@ -104,6 +119,81 @@ class PhotoAnalyzerTests(unittest.TestCase):
         self.assertEqual(meta["ocr_text"], [])
         self.assertEqual(meta["labels"], ["BOSE-901"])
 
+    def test_one_detection_feeds_both_models(self):
+        engine = FakeEngine([{"sku": "BOSE-901", "score": 0.99}], box=(10, 20, 110, 220))
+        labeler = FakeLabeler("SER NO 42")
+        PhotoAnalyzer(engine, labeler).analyze(object())
+        self.assertEqual(engine.boxes, [(10, 20, 110, 220)])
+        self.assertEqual(labeler.boxes, [(10, 20, 110, 220)])
+
+
+class SlowFake:
+    """identify() / read_text() that each take `delay` seconds and record what they saw.
+    With a `barrier`, each call also waits there for its counterpart."""
+
+    def __init__(self, delay, text="", ranked=(), barrier=None):
+        self.delay = delay
+        self.text = text
+        self.ranked = list(ranked)
+        self.barrier = barrier
+        self.seen = []
+
+    def _wait(self, image):
+        self.seen.append((image, threading.current_thread().name))
+        if self.barrier is not None:
+            self.barrier.wait()  # BrokenBarrierError unless the other call is running too
+        time.sleep(self.delay)
+
+    def locate(self, _image):
+        return None
+
+    def identify(self, image, box=None, shard=None):
+        self._wait(image)
+        return self.ranked
+
+    def read_text(self, image, box=None):
+        self._wait(image)
+        return self.text
+
+
+class ConcurrentAnalyzeTests(unittest.TestCase):
+    def test_ocr_and_identify_overlap(self):
+        both = threading.Barrier(2, timeout=5)  # passes only if OCR and identify run at once
+        engine = SlowFake(0.05, ranked=[{"sku": "BOSE-QC35", "score": 0.9}], barrier=both)
+        labeler = SlowFake(0.05, text="SER NO 42", barrier=both)
+        analyzer = PhotoAnalyzer(engine, labeler)
+        meta, timing = analyzer.analyze_timed(object())
+        self.assertEqual(meta, build_analysis("SER NO 42", ["BOSE-QC35"]))
+        self.assertEqual(
+            set(timing), {"decode_ms", "detect_ms", "ocr_ms", "embed_ms", "total_ms", "overlap_ms"}
+        )
+        self.assertGreater(timing["overlap_ms"], 0)
+        self.assertNotEqual(engine.seen[0][1], labeler.seen[0][1])
+
+    def test_image_decoded_once_and_shared(self):
+        engine = SlowFake(0, ranked=[])
+        labeler = SlowFake(0, text="")
+        big = Image.new("L", (4000, 1000))
+        exif = big.getexif()
+        exif[0x0112] = 6   # EXIF orientation: rotate 90 CW to display
+        img = Image.open(_roundtrip(big, exif))
+        PhotoAnalyzer(engine, labeler).analyze(img)
+        shared = engine.seen[0][0]
+        self.assertIs(labeler.seen[0][0], shared)
+        self.assertEqual(shared.mode, "RGB")
+        # identify sees the frame enrollment embeds: not transposed, not downscaled
+        self.assertEqual(shared.size, (4000, 1000))
+        self.assertEqual(shared.getexif().get(0x0112), 6)  # OCR still uprights its copy
+
+
+def _roundtrip(image, exif):
+    import io
+
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", exif=exif)
+    buf.seek(0)
+    return buf
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+"""Unit tests for the bench suite's timing summaries, baseline comparison, the index
+scale harness and the stage runners' skip handling (tiny sizes; NumPy only).
+
+Run:  python vision/tests/test_bench.py      (or: cd vision && python -m unittest tests.test_bench)
+"""
+import os
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# Make `bench` importable regardless of CWD (vision/ is the package root); the scale
+# harness imports `vision.app`, so the repo root goes on the path too.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bench.stats import compare, measure, summarize, table  # noqa: E402
+from vision.bench import stages  # noqa: E402
+from vision.bench.scale import run_size, sku_counts  # noqa: E402
+
+
+class SummarizeTests(unittest.TestCase):
+    def test_percentiles_and_throughput(self):
+        s = summarize([10.0] * 19 + [100.0], items=4)
+        self.assertEqual(s["calls"], 20)
+        self.assertEqual(s["p50_ms"], 10.0)
+        self.assertGreater(s["p95_ms"], 10.0)
+        # 20 calls x 4 items in 0.29 s
+        self.assertAlmostEqual(s["per_s"], 80 / 0.29, delta=0.1)
+        self.assertEqual(summarize([]), {"calls": 0})
+
+    def test_measure_runs_warmup_then_repeat(self):
+        seen = []
+        s = measure(seen.append, repeat=5, warmup=2)
+        self.assertEqual(seen, [0, 1, 0, 1, 2, 3, 4])
+        self.assertEqual(s["calls"], 5)
+
+
+class CompareTests(unittest.TestCase):
+    def test_verdicts_and_skips(self):
+        base = {"stages": {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}, "c": {"p50_ms": 10.0},
+                           "gone": {"p50_ms": 1.0}, "ocr": {"skipped": "no easyocr"}}}
+        now = {"stages": {"a": {"p50_ms": 12.0}, "b": {"p50_ms": 8.0}, "c": {"p50_ms": 10.5},
+                          "new": {"p50_ms": 3.0}, "ocr": {"p50_ms": 50.0}}}
+        rows = {r["stage"]: r for r in compare(now, base, tolerance=0.1)}
+        self.assertEqual(set(rows), {"a", "b", "c"})
+        self.assertEqual(rows["a"]["verdict"], "slower")
+        self.assertAlmostEqual(rows["a"]["change"], 0.2)
+        self.assertEqual(rows["b"]["verdict"], "faster")
+        self.assertEqual(rows["c"]["verdict"], "same")
+
+    def test_table_shows_skipped(self):
+        text = table({"decode": summarize([1.0, 2.0]), "ocr": {"skipped": "no easyocr"}})
+        self.assertIn("decode", text)
+        self.assertIn("skipped: no easyocr", text)
+
+
+class ScaleHarnessTests(unittest.TestCase):
+    def test_sku_counts_sum_and_shape(self):
+        counts = sku_counts(5000, np.random.default_rng(0))
+        self.assertEqual(sum(counts), 5000)
+        self.assertTrue(all(c >= 1 for c in counts))
+        self.assertGreater(max(counts), 3 * np.median(counts))   # a long tail
+
+    def test_run_size_reports_every_operation(self):
+        with tempfile.TemporaryDirectory() as d:
+            row = run_size(500, 16, queries=64, workdir=Path(d))
+            self.assertEqual(list(Path(d).iterdir()), [])
+        for key in ("build_ms", "add_ms", "save_npz_ms", "load_npz_ms", "save_dir_ms", "load_dir_ms"):
+            self.assertIsNotNone(row[key], key)
+        self.assertEqual(row["search_ram"]["calls"], 64)
+        self.assertEqual(row["search_b64_mmap"]["items"], 64)
+        self.assertGreater(row["peak_traced_mb"], 0)
+
+
+
+class StageTests(unittest.TestCase):
+    def test_search_stage_builds_through_the_public_api(self):
+        out = stages.search([400], 16, repeat=3)
+        self.assertEqual(out["search/n400"]["calls"], 3)
+        self.assertIn("search/n400/allow5", out)
+
+    def test_model_that_fails_to_load_is_skipped(self):
+        fake = types.ModuleType("vision.app.embedder")
+
+        class Embedder:
+            def __init__(self):
+                raise OSError("couldn't download facebook/dinov2-base")
+
+        fake.Embedder = Embedder
+        real = sys.modules.get("vision.app.embedder")
+        sys.modules["vision.app.embedder"] = fake
+        try:
+            out = stages.embed([], repeat=1, batches=[1])
+        finally:
+            if real is None:
+                del sys.modules["vision.app.embedder"]
+            else:
+                sys.modules["vision.app.embedder"] = real
+        self.assertIn("OSError: couldn't download", out["embed"]["skipped"])
+
+if __name__ == "__main__":
+    unittest.main()
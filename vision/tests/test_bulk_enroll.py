@@ -0,0 +1,177 @@
+"""Unit tests for the bulk enroll pipeline (batching, checkpoint + resume after a
+crash, error report) and Engine.enroll_batch's near-duplicate handling.
+
+Fake embedder — no torch needed.
+
+Run:  python vision/tests/test_bulk_enroll.py      (or: cd vision && python -m unittest tests.test_bulk_enroll)
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import bulk_enroll as bulk_mod  # noqa: E402
+from app import engine as engine_mod  # noqa: E402
+from app.bulk_enroll import BulkEnroll, list_photos  # noqa: E402
+from app.index import EmbeddingIndex  # noqa: E402
+from app.shards import Shard  # noqa: E402
+
+DIM = 4
+
+
+class _FakeEmbedder:
+    dim = DIM
+
+    def embed_batch(self, images, size=None):
+        # colour -> direction: photos of the same colour are duplicates
+        v = np.array([[*im.getpixel((0, 0)), 1] for im in images], dtype="float32")
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _engine(shard, fail_after=None):
+    eng = engine_mod.Engine.__new__(engine_mod.Engine)
+    eng.embedder = _FakeEmbedder()
+    eng.detector = None
+    eng.default = shard
+    eng.saves = 0
+    eng.calls = 0
+    eng.saved = None
+
+    def save(s):
+        eng.saves += 1
+        eng.saved = s.index.subset(range(s.index.size))  # what a restart would load
+
+    real = eng.enroll_batch
+
+    def enroll_batch(items, s=None):
+        eng.calls += 1
+        if fail_after is not None and eng.calls > fail_after:
+            raise KeyboardInterrupt  # a crash mid-run
+        return real(items, s)
+
+    eng.save = save
+    eng.enroll_batch = enroll_batch
+    return eng
+
+
+def _tree(root: Path) -> int:
+    n = 0
+    for s, sku in enumerate(["A", "B", "C"]):
+        (root / sku).mkdir(parents=True)
+        for i in range(5):
+            Image.new("RGB", (8, 8), (40 * s + 10 * i, 200 - 30 * i, 17 * i)).save(root / sku / f"{i}.jpg")
+            n += 1
+    (root / "B" / "broken.jpg").write_bytes(b"not a jpeg")
+    return n
+
+
+class BulkEnrollTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "ref"
+        self.photos = _tree(self.root)
+        self.state = Path(self.tmp.name) / "state"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_lists_sku_folders_or_a_single_folder(self):
+        self.assertEqual(len(list_photos(self.root)), self.photos + 1)
+        self.assertEqual({s for s, _ in list_photos(self.root / "A")}, {"A"})
+
+    def test_enrolls_everything_and_reports_errors(self):
+        shard = Shard("default", EmbeddingIndex(DIM))
+        eng = _engine(shard)
+        with redirect_stdout(io.StringIO()):
+            bulk = BulkEnroll(eng, shard, batch=4, checkpoint=3, state_dir=self.state, log=sys.stdout)
+            added = bulk.run(self.root)
+        self.assertEqual(added, {"A": 5, "B": 5, "C": 5})
+        self.assertEqual(shard.index.size, self.photos)
+        self.assertFalse((self.state / "manifest.json").exists())  # finished: next run starts over
+        errors = json.loads((self.state / "errors.json").read_text())["errors"]
+        self.assertEqual([(e["sku"], Path(e["path"]).name, e["stage"]) for e in errors], [("B", "broken.jpg", "decode")])
+        self.assertGreater(eng.saves, 1)  # checkpoints + the final save
+
+    def test_resumes_after_crash_without_duplicates(self):
+        shard = Shard("default", EmbeddingIndex(DIM))
+        crashed = _engine(shard, fail_after=2)
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(KeyboardInterrupt):
+                BulkEnroll(crashed, shard, batch=2, checkpoint=2, state_dir=self.state, log=sys.stdout).run(self.root)
+        manifest = json.loads((self.state / "manifest.json").read_text())
+        self.assertEqual(len(manifest["done"]), 4)
+        saved = crashed.saved
+        self.assertEqual(saved.size, manifest["vectors"])
+
+        shard = Shard("default", saved)
+        with redirect_stdout(io.StringIO()):
+            bulk = BulkEnroll(_engine(shard), shard, batch=2, checkpoint=2, state_dir=self.state, log=sys.stdout)
+            added = bulk.run(self.root)
+        self.assertEqual(bulk.stats["resumed"], 4)
+        self.assertEqual(added, {"A": 5, "B": 5, "C": 5})
+        self.assertEqual(shard.index.size, self.photos)
+
+    def test_enroll_batch_dedups_within_the_batch_and_against_the_index(self):
+        shard = Shard("default", EmbeddingIndex(DIM))
+        eng = _engine(shard)
+        red, blue = Image.new("RGB", (4, 4), (255, 0, 0)), Image.new("RGB", (4, 4), (0, 0, 255))
+        old = engine_mod.settings.enroll_dedup
+        engine_mod.settings.enroll_dedup = 0.99
+        try:
+            self.assertEqual(eng.enroll_batch([("A", red), ("A", red), ("A", blue), ("B", red)], shard), [1, 0, 1, 1])
+            self.assertEqual(eng.enroll_batch([("A", blue)], shard), [0])
+        finally:
+            engine_mod.settings.enroll_dedup = old
+        self.assertEqual((shard.index.size, shard.index.sku_count), (3, 2))
+
+    def test_prefetch_is_bounded_by_decoded_bytes(self):
+        shard = Shard("default", EmbeddingIndex(DIM))
+        eng = _engine(shard)
+        queued, consumed, ahead = [], [0], []
+        real_bytes, real_batch = bulk_mod._rgb_bytes, eng.enroll_batch
+
+        def rgb_bytes(path):
+            queued.append(path)
+            return real_bytes(path)  # 8 x 8 x 3 = 192 bytes per photo
+
+        def enroll_batch(items, s=None):
+            ahead.append(len(queued) - consumed[0])
+            consumed[0] += len(items)
+            return real_batch(items, s)
+
+        eng.enroll_batch = enroll_batch
+        bulk_mod._rgb_bytes = rgb_bytes
+        try:
+            with redirect_stdout(io.StringIO()):
+                bulk = BulkEnroll(eng, shard, batch=2, prefetch_mb=400 / 2**20, log=sys.stdout)
+                added = bulk.run(self.root)
+        finally:
+            bulk_mod._rgb_bytes = real_bytes
+        self.assertEqual(sum(added.values()), self.photos)
+        self.assertLessEqual(max(ahead), 4)  # not all 16 at once (prefetch=64)
+
+    def test_failed_batch_adds_nothing_before_the_retry(self):
+        # the low-res add would fail after the full-res add of the first SKU had
+        # already run; the one-by-one retry must not find those rows in the index
+        shard = Shard("default", EmbeddingIndex(DIM), lowres=EmbeddingIndex(DIM + 1), lowres_size=32)
+        eng = _engine(shard)
+        with redirect_stdout(io.StringIO()):
+            bulk = BulkEnroll(eng, shard, batch=4, state_dir=self.state, log=sys.stdout)
+            added = bulk.run(self.root)
+        self.assertEqual(shard.index.size, 0)
+        self.assertEqual(added, {})
+        self.assertEqual(bulk.stats["errors"], self.photos + 1)  # every photo + broken.jpg
+
+
+if __name__ == "__main__":
+    unittest.main()
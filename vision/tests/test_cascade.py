@@ -0,0 +1,138 @@
+"""Unit tests for the embed-first / OCR-when-ambiguous identify cascade.
+
+Fakes only — no torch / EasyOCR / GPU needed.
+
+Run:  python vision/tests/test_cascade.py      (or: cd vision && python -m unittest tests.test_cascade)
+"""
+import os
+import sys
+import unittest
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.cascade import CascadeStats, IdentifyCascade, fuse, margin  # noqa: E402
+
+NAMES = {
+    "P1": "Bose Wave Music System AWRCC1",
+    "P2": "Bose Wave Music System AWRCC2",
+    "P3": "Bose SoundTouch 10",
+}
+
+
+class FakeIndex:
+    skus = sorted(NAMES)
+    version = 0
+
+
+class FakeEngine:
+    index = FakeIndex()
+
+    def __init__(self, ranked):
+        self.ranked = ranked
+
+    def locate(self, _image):
+        return None
+
+    def identify(self, _image, box=None, skus=None, shard=None):
+        return self.ranked
+
+
+class FakeLabeler:
+    def __init__(self, text):
+        self.text = text
+        self.reads = 0
+
+    def lookup(self, _digest):
+        return None
+
+    def read_text(self, _image, content_hash=None, box=None):
+        self.reads += 1
+        return self.text
+
+
+class PureTests(unittest.TestCase):
+    def test_margin(self):
+        self.assertEqual(margin([]), 0.0)
+        self.assertEqual(margin([{"sku": "A", "score": 0.8}]), 0.8)
+        self.assertEqual(margin([{"sku": "A", "score": 0.8}, {"sku": "B", "score": 0.75}]), 0.05)
+
+    def test_fuse_ocr_code_overturns_near_tie(self):
+        cands = [{"sku": "P1", "score": 0.81}, {"sku": "P2", "score": 0.80}]
+        ranked = fuse(cands, {"P2": 19, "P1": 9}, top_k=5)
+        self.assertEqual([r["sku"] for r in ranked], ["P2", "P1"])
+        self.assertEqual(ranked[0]["ocr_score"], 19)
+
+    def test_fuse_admits_ocr_only_sku(self):
+        ranked = fuse([{"sku": "P1", "score": 0.3}], {"P3": 14}, top_k=5)
+        self.assertEqual(ranked[0]["sku"], "P3")
+        self.assertEqual(ranked[0]["score"], 0.0)
+
+    def test_stats_snapshot(self):
+        s = CascadeStats()
+        for ms in (10, 20, 30):
+            s.record("embed", ms)
+        s.record("ocr", 400)
+        snap = s.snapshot()
+        self.assertEqual(snap["requests"], 4)
+        self.assertEqual(snap["ocr_skipped_rate"], 0.75)
+        self.assertEqual(snap["paths"]["embed"]["p50_ms"], 20.0)
+        self.assertEqual(snap["paths"]["ocr"]["requests"], 1)
+        self.assertIsNone(CascadeStats().snapshot()["ocr_skipped_rate"])
+
+
+class CascadeTests(unittest.TestCase):
+    def _cascade(self, ranked, text):
+        labeler = FakeLabeler(text)
+        return IdentifyCascade(FakeEngine(ranked), lambda: labeler, NAMES, threshold=0.05), labeler
+
+    def test_clear_winner_skips_ocr(self):
+        cascade, labeler = self._cascade(
+            [{"sku": "P3", "score": 0.9}, {"sku": "P1", "score": 0.6}], "MODEL AWRCC1"
+        )
+        out = cascade.identify(object())
+        self.assertEqual(out["path"], "embed")
+        self.assertIsNone(out["ocr"])
+        self.assertEqual(labeler.reads, 0)
+        self.assertEqual(cascade.stats.snapshot()["ocr_skipped_rate"], 1.0)
+
+    def test_near_tie_runs_ocr_and_fuses(self):
+        cascade, labeler = self._cascade(
+            [{"sku": "P1", "score": 0.82}, {"sku": "P2", "score": 0.81}],
+            "BOSE WAVE MUSIC SYSTEM MODEL AWRCC2 SER NO 123",
+        )
+        out = cascade.identify(object())
+        self.assertEqual(out["path"], "ocr")
+        self.assertEqual(labeler.reads, 1)
+        self.assertEqual(out["candidates"][0]["sku"], "P2")
+        self.assertEqual(out["ocr"]["matched_sku"], "P2")
+        self.assertIsNotNone(out["ocr_ms"])
+
+    def test_threshold_override_and_empty_index(self):
+        cascade, _ = self._cascade([{"sku": "P3", "score": 0.9}, {"sku": "P1", "score": 0.6}], "")
+        self.assertEqual(cascade.identify(object(), threshold=0.5)["path"], "ocr")
+        cascade, _ = self._cascade([], "SOUNDTOUCH 10")
+        out = cascade.identify(object())
+        self.assertEqual(out["path"], "ocr")
+        self.assertEqual(out["candidates"][0]["sku"], "P3")
+
+    def test_allow_list_also_limits_ocr(self):
+        # The label reads P3, but P3 isn't on the PO
+        cascade, _ = self._cascade([{"sku": "P1", "score": 0.42}, {"sku": "P2", "score": 0.41}], "SOUNDTOUCH 10")
+        self.assertEqual(cascade.identify(object())["candidates"][0]["sku"], "P3")  # without the list it wins
+        out = cascade.identify(object(), skus=["P1", "P2"])
+        self.assertEqual(out["path"], "ocr")
+        self.assertEqual([c["sku"] for c in out["candidates"]], ["P1", "P2"])
+        self.assertIsNone(out["ocr"]["matched_sku"])
+
+    def test_matcher_rebuilt_only_when_the_index_changes(self):
+        cascade, _ = self._cascade([], "")
+        index = cascade._engine.index = FakeIndex()
+        first = cascade._ocr_matcher()
+        self.assertIs(cascade._ocr_matcher(), first)
+        index.version += 1
+        self.assertIsNot(cascade._ocr_matcher(), first)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,35 @@
+"""Unit tests for the detector's pure box helpers (no ultralytics needed).
+
+Run:  python vision/tests/test_detector.py      (or: cd vision && python -m unittest tests.test_detector)
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+from PIL import Image
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.detector import crop, largest_box, padded  # noqa: E402
+
+
+class BoxTests(unittest.TestCase):
+    def test_largest_box_by_area(self):
+        xyxy = np.array([[0, 0, 10, 10, 0.9], [5, 5, 105, 55, 0.4], [0, 0, 30, 30, 0.99]])
+        self.assertEqual(largest_box(xyxy), (5, 5, 105, 55))
+        self.assertIsNone(largest_box(np.zeros((0, 4))))
+
+    def test_padded_grows_and_clamps(self):
+        self.assertEqual(padded((100, 100, 200, 300), (1000, 1000)), (94, 88, 206, 312))
+        self.assertEqual(padded((0, 0, 1000, 500), (1000, 500)), (0, 0, 1000, 500))
+
+    def test_crop_none_is_identity(self):
+        im = Image.new("RGB", (64, 32))
+        self.assertIs(crop(im, None), im)
+        self.assertEqual(crop(im, (10, 10, 20, 20)).size, (10, 10))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
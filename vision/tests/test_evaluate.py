@@ -0,0 +1,94 @@
+"""Unit tests for the vectorized eval helpers (scores match EmbeddingIndex.search,
+leave-one-out matches a brute-force rebuild).
+
+NumPy only — no torch needed.
+
+Run:  python vision/tests/test_evaluate.py      (or: cd vision && python -m unittest tests.test_evaluate)
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import evaluate as ev  # noqa: E402
+from app.index import EmbeddingIndex  # noqa: E402
+
+DIM = 8
+
+
+def _unit(rng, n):
+    v = rng.normal(size=(n, DIM)).astype("float32")
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+class EvaluateTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.idx = EmbeddingIndex(DIM)
+        for round_ in range(2):
+            for s in range(6):
+                self.idx.add(f"S{s}", _unit(rng, 1 + (s + round_) % 3))
+        self.idx.add("LONE", _unit(rng, 1))
+        self.q = _unit(rng, 20)
+
+    def test_sku_scores_match_search(self):
+        for agg in ("max", "mean"):
+            scores, names = ev.sku_scores(self.idx, self.q, agg, chunk=7)
+            for row, q in zip(scores, self.q):
+                want = self.idx.search(q, 3, agg)
+                got = np.argsort(-row, kind="stable")[:3]
+                self.assertEqual([names[i] for i in got], [c["sku"] for c in want])
+                for i, c in zip(got, want):
+                    self.assertAlmostEqual(float(row[i]), c["score"], places=4)
+
+    def test_leave_one_out_matches_rebuild(self):
+        vectors, names, seg = self.idx.segments()
+        for agg in ("max", "mean"):
+            scores, lnames, truth = ev.leave_one_out(self.idx, agg, chunk=5)
+            self.assertEqual(lnames, names)
+            for r in (0, 3, len(seg) - 1):
+                rest = EmbeddingIndex(DIM)
+                for i in range(len(seg)):
+                    if i != r:
+                        rest.add(names[seg[i]], vectors[i])
+                want = {c["sku"]: c["score"] for c in rest.search(vectors[r], 99, agg)}
+                for col, sku in enumerate(names):
+                    if sku in want:
+                        self.assertAlmostEqual(float(scores[r, col]), want[sku], places=4)
+                    else:
+                        self.assertEqual(scores[r, col], -np.inf)   # LONE's only photo
+
+    def test_accuracy_confusions_and_thresholds(self):
+        scores = np.array([[0.9, 0.1, 0.0], [0.2, 0.8, 0.1], [0.5, 0.4, 0.3], [0.1, 0.6, 0.7]], dtype="float32")
+        truth = np.array([0, 1, 1, 1])
+        acc = ev.topk_accuracy(scores, truth, ks=(1, 2))
+        self.assertEqual(acc, {1: 0.5, 2: 1.0})
+        pred, top, gap = ev.predictions(scores)
+        self.assertEqual(pred.tolist(), [0, 1, 0, 2])
+        np.testing.assert_allclose(gap, [0.8, 0.6, 0.1, 0.1], atol=1e-6)
+        self.assertEqual(ev.confusions(pred, truth), [(1, 0, 1), (1, 2, 1)])
+        ok, total = ev.per_sku_accuracy(pred, truth, 3)
+        self.assertEqual((ok.tolist(), total.tolist()), ([1, 1, 0], [1, 3, 0]))
+        rows = ev.threshold_sweep(gap, pred == truth, [0.0, 0.5, 0.9])
+        self.assertEqual([r["coverage"] for r in rows], [1.0, 0.5, 0.0])
+        self.assertEqual([r["accuracy"] for r in rows], [0.5, 1.0, None])
+        self.assertEqual(ev.truth_columns(["A", "B"], ["B", "Z"]).tolist(), [1, -1])
+
+    def test_cascade_predictions_fuse_only_close_rows(self):
+        scores = np.array([[0.9, 0.1, 0.0], [0.5, 0.48, 0.3], [0.5, 0.48, 0.3]], dtype="float32")
+        ocr = [{"B": 10}, {"B": 10}, {}]
+        preds, to_ocr = ev.cascade_predictions(scores, ["A", "B", "C"], ocr, threshold=0.05)
+        # row 0 is clear (OCR ignored), row 1 is close and the label read flips it,
+        # row 2 is close but OCR read nothing -> embedding order stands
+        self.assertEqual(preds, ["A", "B", "A"])
+        self.assertEqual(to_ocr.tolist(), [False, True, True])
+        preds, _ = ev.cascade_predictions(scores[1:2], ["A", "B", "C"], [{"Z": 12}], threshold=0.05, top_k=2)
+        self.assertEqual(preds, ["Z"])  # an OCR-only SKU the embedding missed
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""Device-resident index mirror vs the NumPy EmbeddingIndex search.
+
+Needs torch (runs on CPU when there's no GPU); skipped where torch isn't installed.
+
+Run:  python vision/tests/test_gpu_index.py      (or: cd vision && python -m unittest tests.test_gpu_index)
+"""
+import importlib.util
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.index import EmbeddingIndex  # noqa: E402
+
+HAS_TORCH = importlib.util.find_spec("torch") is not None
+DIM = 32
+
+
+@unittest.skipUnless(HAS_TORCH, "torch not installed")
+class DeviceIndexTests(unittest.TestCase):
+    def setUp(self):
+        import torch
+
+        from app.gpu_index import DeviceIndex
+
+        rng = np.random.default_rng(1)
+        self.idx = EmbeddingIndex(DIM)
+        for round_ in range(2):
+            for s in range(20):
+                v = rng.normal(size=(1 + s % 3, DIM)).astype("float32")
+                self.idx.add(f"S{s:02d}", v / np.linalg.norm(v, axis=1, keepdims=True))
+        q = rng.normal(size=DIM).astype("float32")
+        self.q = q / np.linalg.norm(q)
+        self.mirror = DeviceIndex(self.idx, "cpu", dtype=torch.float32)
+        self.tq = torch.from_numpy(self.q)
+
+    def test_matches_numpy_search(self):
+        self.assertTrue(self.mirror.sync())
+        for agg in ("max", "mean"):
+            got = self.mirror.search(self.tq, 5, agg)
+            want = self.idx.search(self.q, 5, agg)
+            self.assertEqual([c["sku"] for c in got], [c["sku"] for c in want])
+            for g, w in zip(got, want):
+                self.assertAlmostEqual(g["score"], w["score"], places=3)
+
+    def test_allow_list_mask(self):
+        self.mirror.sync()
+        allowed = ["S04", "S09", "S13", "NOPE"]
+        got = self.mirror.search(self.tq, 5, skus=allowed)
+        self.assertEqual(got, self.idx.search(self.q, 5, skus=allowed))
+        self.assertEqual(self.mirror.search(self.tq, 5, skus=["NOPE"]), [])
+
+    def test_resyncs_after_enroll(self):
+        self.mirror.sync()
+        self.idx.add("NEW", self.q[None, :])
+        self.assertTrue(self.mirror.sync())
+        self.assertEqual(self.mirror.search(self.tq, 1)[0]["sku"], "NEW")
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,185 @@
+"""Unit tests for EmbeddingIndex search (whole catalog and SKU allow-lists) and
+reference-set pruning (near-duplicate check, farthest-point condense).
+
+NumPy only — no torch needed.
+
+Run:  python vision/tests/test_index.py      (or: cd vision && python -m unittest tests.test_index)
+"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.index import EmbeddingIndex, farthest_point  # noqa: E402
+
+DIM = 16
+
+
+def _unit(rng, n):
+    v = rng.normal(size=(n, DIM)).astype("float32")
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _brute(vectors, skus, q, agg, allowed=None):
+    per: dict[str, list[float]] = {}
+    for sku, v in zip(skus, vectors):
+        if allowed is None or sku in allowed:
+            per.setdefault(sku, []).append(float(v @ q))
+    f = np.mean if agg == "mean" else max
+    return sorted(((s, float(f(v))) for s, v in per.items()), key=lambda x: -x[1])
+
+
+class IndexSearchTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.idx = EmbeddingIndex(DIM)
+        self.vectors, self.skus = [], []
+        # interleaved enrollment: SKU rows are NOT contiguous on insert
+        for round_ in range(3):
+            for s in range(12):
+                v = _unit(rng, 1 + (s + round_) % 3)
+                self.idx.add(f"S{s:02d}", v)
+                self.vectors.extend(v)
+                self.skus.extend([f"S{s:02d}"] * len(v))
+        self.q = _unit(rng, 1)[0]
+
+    def _check(self, got, want, k):
+        self.assertEqual([c["sku"] for c in got], [s for s, _ in want[:k]])
+        for c, (_, score) in zip(got, want):
+            self.assertAlmostEqual(c["score"], score, places=4)
+
+    def test_matches_brute_force(self):
+        for agg in ("max", "mean"):
+            self._check(self.idx.search(self.q, 5, agg), _brute(self.vectors, self.skus, self.q, agg), 5)
+
+    def test_allow_list_scans_only_those_skus(self):
+        allowed = {"S03", "S07", "S11", "NOT-ENROLLED"}
+        got = self.idx.search(self.q, 5, "max", skus=list(allowed))
+        self._check(got, _brute(self.vectors, self.skus, self.q, "max", allowed), 5)
+        self.assertEqual(len(got), 3)
+        self.assertEqual(self.idx.search(self.q, 5, skus=["NOPE"]), [])
+
+    def test_search_batch_matches_search(self):
+        qs = _unit(np.random.default_rng(5), 7)
+        for agg in ("max", "mean"):
+            want = [self.idx.search(q, 4, agg) for q in qs]
+            self.assertEqual(self.idx.search_batch(qs, 4, agg), want)
+            self.assertEqual(self.idx.search_batch(qs, 4, agg, chunk_cells=1), want)
+        self.assertEqual(self.idx.search_batch(qs, 2, skus=["S01"]), [self.idx.search(q, 2, skus=["S01"]) for q in qs])
+        self.assertEqual(EmbeddingIndex(DIM).search_batch(qs, 3), [[]] * 7)
+
+    def test_add_after_search_regroups(self):
+        self.idx.search(self.q, 3)
+        self.idx.add("S00", self.q[None, :])
+        self.assertEqual(self.idx.search(self.q, 1)[0], {"sku": "S00", "score": 1.0})
+        self.assertEqual(self.idx.search(self.q, 1, skus=["S00"])[0]["sku"], "S00")
+
+    def test_add_many_matches_add_per_sku(self):
+        bulk = EmbeddingIndex(DIM)
+        bulk.add_many(self.skus, np.stack(self.vectors))
+        self.assertEqual(bulk.search(self.q, 5), self.idx.search(self.q, 5))
+        with self.assertRaises(ValueError):
+            bulk.add_many(["S00"], np.stack(self.vectors[:2]))
+
+    def test_save_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "index.npz"
+            self.idx.save(path)
+            loaded = EmbeddingIndex.load(path, DIM)
+        self.assertEqual(loaded.size, self.idx.size)
+        self.assertEqual(loaded.search(self.q, 5), self.idx.search(self.q, 5))
+
+    def test_concurrent_first_searches_keep_rows_and_labels_aligned(self):
+        want = _brute(self.vectors, self.skus, self.q, "max")
+        pairs = sorted((s, v.tobytes()) for s, v in zip(self.skus, self.vectors))
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "index.npz"
+            self.idx.save(path)  # never searched: saved in insertion (unsorted) order
+            for _ in range(20):
+                loaded = EmbeddingIndex.load(path, DIM)
+                start = threading.Barrier(8)
+                results = []
+
+                def search():
+                    start.wait()
+                    results.append(loaded.search(self.q, 5))
+
+                threads = [threading.Thread(target=search) for _ in range(8)]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                for got in results:
+                    self._check(got, want, 5)
+                vectors, skus, _ = loaded._snapshot()
+                self.assertEqual(sorted((s, v.tobytes()) for s, v in zip(skus, vectors)), pairs)
+
+
+
+class PruneTests(unittest.TestCase):
+    def test_near_duplicate_is_per_sku(self):
+        rng = np.random.default_rng(1)
+        idx = EmbeddingIndex(DIM)
+        v = _unit(rng, 1)[0]
+        idx.add("A", v[None, :])
+        jitter = v + 0.01 * rng.normal(size=DIM).astype("float32")
+        jitter /= np.linalg.norm(jitter)
+        self.assertTrue(idx.near_duplicate("A", jitter, 0.98))
+        self.assertFalse(idx.near_duplicate("B", jitter, 0.98))
+        self.assertFalse(idx.near_duplicate("A", _unit(rng, 1)[0], 0.98))
+        idx.search(v, 1)  # grouped path
+        self.assertTrue(idx.near_duplicate("A", jitter, 0.98))
+
+    def test_near_duplicate_row_map_follows_adds_and_regroups(self):
+        rng = np.random.default_rng(2)
+        idx = EmbeddingIndex(DIM)
+        vs = _unit(rng, 6)
+        idx.add("B", vs[0])
+        idx.add("A", vs[1])
+        self.assertTrue(idx.near_duplicate("A", vs[1], 0.99))  # builds the row map
+        idx.add_many(["B", "C"], vs[2:4])
+        idx.add("A", vs[4])  # extends it: no rescan
+        for sku, v in (("A", vs[4]), ("B", vs[2]), ("C", vs[3])):
+            self.assertTrue(idx.near_duplicate(sku, v, 0.99), sku)
+        self.assertFalse(idx.near_duplicate("A", vs[3], 0.99))
+        idx.search(vs[0], 1)  # regroup moves rows
+        idx.add("C", vs[5])
+        for sku, v in (("A", vs[1]), ("B", vs[0]), ("C", vs[5])):
+            self.assertTrue(idx.near_duplicate(sku, v, 0.99), sku)
+        self.assertFalse(idx.near_duplicate("B", vs[5], 0.99))
+
+    def test_farthest_point_picks_the_spread(self):
+        rng = np.random.default_rng(2)
+        base = _unit(rng, 3)
+        # ten near-copies of base[0], one each of base[1], base[2]
+        burst = base[0] + 0.01 * rng.normal(size=(10, DIM)).astype("float32")
+        vecs = np.vstack([burst / np.linalg.norm(burst, axis=1, keepdims=True), base[1:]])
+        picked = farthest_point(vecs, 3)
+        self.assertEqual(len(picked), 3)
+        self.assertIn(10, picked)
+        self.assertIn(11, picked)
+        self.assertEqual(list(farthest_point(vecs[:2], 5)), [0, 1])
+
+    def test_condense_caps_each_sku(self):
+        rng = np.random.default_rng(3)
+        idx = EmbeddingIndex(DIM)
+        idx.add("A", _unit(rng, 9))
+        idx.add("B", _unit(rng, 2))
+        idx.add("A", _unit(rng, 3))
+        v0 = idx.version
+        idx.keep(idx.representatives(4))
+        self.assertEqual(idx.size, 6)
+        self.assertEqual(idx.skus, ["A", "B"])
+        self.assertGreater(idx.version, v0)
+        self.assertEqual(len(idx.search(_unit(rng, 1)[0], 5)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
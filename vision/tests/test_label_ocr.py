@@ -0,0 +1,150 @@
+"""Unit tests for the label-OCR matching helpers (no EasyOCR / GPU needed).
+
+Run:  python vision/tests/test_label_ocr.py      (or: cd vision && python -m unittest tests.test_label_ocr)
+"""
+import inspect
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.label_ocr import LabelIdentifier, progressive_classify, region_priority  # noqa: E402
+
+try:
+    import easyocr
+except ImportError:  # optional here; the fake below follows its contract
+    easyocr = None
+
+
+class ContractReader:
+    """easyocr.Reader.detect's input contract: with reformat=True the image goes
+    through reformat_input, which only handles one 2-D or 3-D image; a 4-D batch
+    must come with reformat=False (as readtext_batched passes it)."""
+
+    def __init__(self):
+        self.calls = []
+
+    def detect(self, img, min_size=20, text_threshold=0.7, low_text=0.4, link_threshold=0.4,
+               canvas_size=2560, mag_ratio=1.0, slope_ths=0.1, ycenter_ths=0.5, height_ths=0.5,
+               width_ths=0.5, add_margin=0.1, reformat=True, optimal_num_chars=None,
+               threshold=0.2, bbox_min_score=0.2, bbox_min_size=3, max_candidates=0):
+        if reformat and img.ndim not in (2, 3):
+            raise ValueError("Invalid input type")
+        self.calls.append(img.shape)
+        n = img.shape[0] if img.ndim == 4 else 1
+        return [[[i, i + 5, 0, 5]] for i in range(n)], [[] for _ in range(n)]
+
+    def recognize(self, img, horizontal_list=None, free_list=None, detail=1, **kwargs):
+        """What EasyOCR's get_image_list + get_text return: each box clamped to the
+        frame, echoed as the clamped box's corners, sorted by clamped top edge."""
+        h, w = img.shape[:2]
+        out = []
+        for x1, x2, y1, y2 in horizontal_list:
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(x2, w), min(y2, h)
+            out.append(([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], f"text@{x1},{y1}", 0.9))
+        return sorted(out, key=lambda r: r[0][0][1])
+
+
+class RegionPriorityTests(unittest.TestCase):
+    def test_largest_first_then_most_central(self):
+        regions = [
+            (0, 0, 10, 10),      # small, corner
+            (40, 40, 60, 60),    # small, centre
+            (10, 10, 90, 30),    # big
+        ]
+        self.assertEqual(region_priority(regions, (100, 100)), [2, 1, 0])
+
+
+class ProgressiveClassifyTests(unittest.TestCase):
+    def _fake_ocr(self, texts):
+        calls = []
+
+        def recognize(idx):
+            calls.append(list(idx))
+            return [texts[i] for i in idx]
+
+        return recognize, calls
+
+    def test_stops_at_first_strict_match(self):
+        # big model plate first, then lots of small fine print
+        regions = [(0, 0, 100, 40)] + [(0, 50 + i, 5, 51 + i) for i in range(12)]
+        texts = ["BOSE MODEL AWRCC1 SER NO 033"] + [f"tiny {i}" for i in range(12)]
+        recognize, calls = self._fake_ocr(texts)
+        out = progressive_classify(regions, recognize, (100, 100), step=4)
+        self.assertEqual(out["model"], "Bose Wave Music System AWRCC1")
+        self.assertEqual(out["regions_processed"], 4)
+        self.assertEqual(out["regions_total"], 13)
+        self.assertEqual(len(calls), 1)
+
+    def test_reads_everything_when_nothing_matches(self):
+        regions = [(0, i * 10, 50, i * 10 + 8) for i in range(6)]
+        recognize, calls = self._fake_ocr([f"line {i}" for i in range(6)])
+        out = progressive_classify(regions, recognize, (100, 100), step=4)
+        self.assertIsNone(out["model"])
+        self.assertEqual(out["regions_processed"], 6)
+        self.assertEqual(out["text"], "line 0 line 1 line 2 line 3 line 4 line 5")
+
+    def test_match_spanning_regions_uses_reading_order(self):
+        # anchor (top) is smaller than the model code (bottom), so it's read second;
+        # the classifier still sees them top-to-bottom.
+        regions = [(0, 0, 20, 10), (0, 50, 100, 90)]
+        recognize, _ = self._fake_ocr(["MODEL", "SOUNDTOUCH 300"])
+        out = progressive_classify(regions, recognize, (100, 100), step=1)
+        self.assertEqual(out["model"], "Bose SoundTouch 300 Soundbar")
+        self.assertEqual(out["text"], "MODEL SOUNDTOUCH 300")
+        self.assertEqual(out["regions_processed"], 2)
+
+    def test_no_regions(self):
+        recognize, calls = self._fake_ocr([])
+        out = progressive_classify([], recognize, (100, 100))
+        self.assertEqual(out["regions_processed"], 0)
+        self.assertEqual(calls, [])
+
+
+class ReaderCallTests(unittest.TestCase):
+    def _identifier(self):
+        li = LabelIdentifier.__new__(LabelIdentifier)
+        li._reader = ContractReader()
+        return li
+
+    def test_same_shape_arrays_detect_in_one_call(self):
+        li = self._identifier()
+        arrs = [np.zeros((32, 48, 3), dtype="uint8") for _ in range(3)]
+        out = li._detect(arrs)
+        self.assertEqual(li._reader.calls, [(3, 32, 48, 3)])
+        self.assertEqual([h for h, _ in out], [[[0, 5, 0, 5]], [[1, 6, 0, 5]], [[2, 7, 0, 5]]])
+
+    def test_mixed_shapes_detect_one_by_one(self):
+        li = self._identifier()
+        li._detect([np.zeros((32, 48, 3), dtype="uint8"), np.zeros((40, 48, 3), dtype="uint8")])
+        self.assertEqual(li._reader.calls, [(32, 48, 3), (40, 48, 3)])
+
+    def test_edge_boxes_map_back_in_order(self):
+        li = self._identifier()
+        arr = np.zeros((100, 100, 3), dtype="uint8")
+        regions = [
+            (30, 50, 60, 58),     # inside
+            (-5, 10, 20, 18),     # left edge: EasyOCR clamps x1 to 0
+            (40, -3, 120, 8),     # top-right corner: clamped on two sides
+            (30, 50, 60, 58),     # duplicate of the first
+            (10, 120, 20, 130),   # entirely below the frame: nothing to read
+        ]
+        self.assertEqual(
+            li._recognize_regions(arr, regions),
+            ["text@30,50", "text@0,10", "text@40,0", "text@30,50", ""],
+        )
+
+    @unittest.skipUnless(easyocr is not None, "easyocr not installed")
+    def test_fake_matches_easyocr_detect_signature(self):
+        real = inspect.signature(easyocr.Reader.detect).parameters
+        fake = inspect.signature(ContractReader.detect).parameters
+        self.assertEqual(list(real), list(fake))
+        self.assertTrue(real["reformat"].default)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
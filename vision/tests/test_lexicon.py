@@ -0,0 +1,89 @@
+"""Unit tests for the compiled lexicon matcher: it must pick exactly what the plain
+"first regex in order wins" loop picks.
+
+Run:  python vision/tests/test_lexicon.py      (or: cd vision && python -m unittest tests.test_lexicon)
+"""
+import os
+import random
+import re
+import sys
+import unittest
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.label_ocr import LEXICON, normalize  # noqa: E402
+from app.lexicon import LexiconMatcher, anchor_literals  # noqa: E402
+
+
+def naive(entries, text):
+    norm = normalize(text)
+    nospace = re.sub(r"[^A-Z0-9]", "", norm)
+    for name, pat in entries:
+        pat = re.compile(pat) if isinstance(pat, str) else pat
+        if pat.search(norm) or pat.search(nospace):
+            return name
+    return None
+
+
+def compiled(matcher, text):
+    norm = normalize(text)
+    return matcher.match(norm, re.sub(r"[^A-Z0-9]", "", norm))
+
+
+class AnchorLiteralTests(unittest.TestCase):
+    def test_one_literal_per_alternative(self):
+        self.assertEqual(
+            anchor_literals(r"SOUND\s?TOUCH\s?300|\b421650\b"),
+            [["300", "SOUND", "TOUCH"], ["421650"]],
+        )
+
+    def test_optional_parts_are_not_required(self):
+        self.assertEqual(anchor_literals(r"(SERIES\s?)?III"), [["III"]])
+
+    def test_alternative_without_literal_means_always_check(self):
+        self.assertIsNone(anchor_literals(r"AWRCC[12]|[0-9]{6}"))
+
+
+class LexiconMatcherTests(unittest.TestCase):
+    def test_matches_naive_on_lexicon_vocabulary(self):
+        matcher = LexiconMatcher(LEXICON)
+        vocab = ["BOSE", "MODEL", "SER NO", "AWRCC1", "AWRCC2", "AWRC-1P", "AWRC1G", "AWR1-1W",
+                 "SOUNDTOUCH", "SOUND TOUCH", "300", "10", "20", "SOUNDDOCK", "SERIES", "II",
+                 "III", "IV", "MUSIC SYSTEM", "417788", "418775", "SOLO", "5", "TV", "SPEAKER",
+                 "COMPANION", "AV35", "AV-20", "321", "151 SE", "251", "VCS-10", "FREE SPACE",
+                 "PEDESTAL", "LIFESTYLE", "ACOUSTIMASS", "AM-10", "CINEMATE", "noise", "x"]
+        rng = random.Random(7)
+        for _ in range(3000):
+            text = " ".join(rng.choice(vocab) for _ in range(rng.randint(1, 8)))
+            self.assertEqual(compiled(matcher, text), naive(LEXICON, text), text)
+
+    def test_priority_order_is_preserved(self):
+        entries = [("specific", r"SOUND\s?TOUCH\s?300"), ("generic", r"SOUND\s?TOUCH")]
+        matcher = LexiconMatcher(entries)
+        self.assertEqual(compiled(matcher, "SoundTouch 300"), "specific")
+        self.assertEqual(compiled(matcher, "SoundTouch 10"), "generic")
+        # reversed lexicon: the generic entry shadows the specific one, like the loop
+        self.assertEqual(compiled(LexiconMatcher(entries[::-1]), "SoundTouch 300"), "generic")
+
+    def test_nested_literals_both_trigger(self):
+        # "SOUNDTOUCH" is the longest literal at its position; "SOUND" is implied.
+        entries = [("touch", r"SOUNDTOUCH9"), ("sound", r"SOUND")]
+        self.assertEqual(compiled(LexiconMatcher(entries), "soundtouch 10"), "sound")
+
+    def test_thousands_of_entries(self):
+        rng = random.Random(3)
+        entries = []
+        for i in range(3000):
+            code = "".join(rng.choice("ABCDEFGHJKLMNPRSTUVWXYZ") for _ in range(3)) + str(rng.randint(10, 999))
+            entries.append((f"P{i}", rf"\b{code[:3]}[\-\s]?{code[3:]}\b"))
+        matcher = LexiconMatcher(entries)
+        precompiled = [(name, re.compile(pat)) for name, pat in entries]
+        for name, pat in rng.sample(entries, 20):
+            text = "MODEL " + pat.replace(r"\b", "").replace(r"[\-\s]?", "-") + " MADE IN"
+            self.assertEqual(compiled(matcher, text), naive(precompiled, text))
+        self.assertIsNone(compiled(matcher, "nothing to see here"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
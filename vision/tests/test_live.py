@@ -0,0 +1,155 @@
+"""Unit tests for the live WebSocket identify session (no socket / torch needed).
+
+Run:  python vision/tests/test_live.py      (or: cd vision && python -m unittest tests.test_live)
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.live import CandidateSmoother, LiveSession, dhash, hamming  # noqa: E402
+
+
+def _frame(shift: int, noise: int = 0) -> bytes:
+    im = Image.new("RGB", (160, 120), (noise, noise, noise))
+    ImageDraw.Draw(im).rectangle((20 + shift, 30, 80 + shift, 90), fill=(255, 255, 255))
+    buf = io.BytesIO()
+    im.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+class SlowEngine:
+    """identify() sleeps `delay`; records peak concurrency across sessions."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def locate(self, _image):
+        return None
+
+    def identify(self, _image, box=None, shard=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return [{"sku": "A", "score": 0.9}, {"sku": "B", "score": 0.7}]
+
+
+class Disconnect(Exception):
+    pass
+
+
+def _client(frames, gap=0.0):
+    """receive() that yields `frames` (optionally spaced), then disconnects."""
+    it = iter(frames)
+
+    async def receive():
+        if gap:
+            await asyncio.sleep(gap)
+        try:
+            return next(it)
+        except StopIteration:
+            await asyncio.sleep(0.3)   # let the last frame finish before hanging up
+            raise Disconnect
+    return receive
+
+
+class HashTests(unittest.TestCase):
+    def test_dhash_near_identical_vs_moved(self):
+        a = dhash(Image.open(io.BytesIO(_frame(0))))
+        same = dhash(Image.open(io.BytesIO(_frame(0, noise=3))))
+        moved = dhash(Image.open(io.BytesIO(_frame(60))))
+        self.assertLessEqual(hamming(a, same), 4)
+        self.assertGreater(hamming(a, moved), 4)
+
+    def test_dhash_bits_and_no_deprecation_warning(self):
+        # left half bright, right half dark: one falling edge per row
+        im = Image.new("L", (9, 8), 0)
+        im.paste(255, (0, 0, 5, 8))
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # Image.getdata() warned on every frame
+            h = dhash(im)
+        self.assertEqual(h, int("00001000" * 8, 2))
+        self.assertLessEqual(dhash(im, size=3).bit_length(), 9)
+
+
+class SmootherTests(unittest.TestCase):
+    def test_ema_damps_a_one_frame_flip(self):
+        s = CandidateSmoother(alpha=0.3)
+        for _ in range(3):
+            s.update([{"sku": "A", "score": 0.9}, {"sku": "B", "score": 0.8}])
+        out = s.update([{"sku": "B", "score": 0.9}, {"sku": "A", "score": 0.8}])
+        self.assertEqual(out[0]["sku"], "A")
+
+    def test_absent_sku_decays_out(self):
+        s = CandidateSmoother(alpha=0.5, floor=0.05)
+        s.update([{"sku": "A", "score": 0.4}])
+        for _ in range(5):
+            out = s.update([{"sku": "B", "score": 0.9}])
+        self.assertEqual([c["sku"] for c in out], ["B"])
+
+
+class SessionTests(unittest.TestCase):
+    def test_burst_drops_stale_frames(self):
+        engine = SlowEngine(delay=0.1)
+        session = LiveSession(engine, ThreadPoolExecutor(max_workers=1), diff_bits=0)
+        sent = []
+
+        async def send(msg):
+            sent.append(msg)
+
+        frames = [_frame(i * 10) for i in range(10)]
+        asyncio.run(session.run(_client(frames), send))
+        self.assertEqual(session.stats["received"], 10)
+        self.assertGreater(session.stats["dropped"], 0)
+        self.assertLess(engine.calls, 10)
+        self.assertEqual(len(sent), engine.calls)
+        self.assertEqual(sent[-1]["candidates"][0]["sku"], "A")
+
+    def test_unchanged_frames_skipped(self):
+        engine = SlowEngine(delay=0)
+        session = LiveSession(engine, ThreadPoolExecutor(max_workers=1), diff_bits=4)
+
+        async def send(_msg):
+            pass
+
+        asyncio.run(session.run(_client([_frame(0)] * 5, gap=0.02), send))
+        self.assertEqual(engine.calls, 1)
+        self.assertEqual(session.stats["skipped"], 4)
+
+    def test_shared_pool_bounds_concurrency_across_sessions(self):
+        engine = SlowEngine(delay=0.05)
+        pool = ThreadPoolExecutor(max_workers=1)
+
+        async def send(_msg):
+            pass
+
+        async def main():
+            sessions = [LiveSession(engine, pool, diff_bits=0) for _ in range(4)]
+            await asyncio.gather(*(
+                s.run(_client([_frame(i * 10) for i in range(4)], gap=0.01), send) for s in sessions
+            ))
+
+        asyncio.run(main())
+        self.assertEqual(engine.peak, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
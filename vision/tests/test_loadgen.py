@@ -0,0 +1,69 @@
+"""Unit tests for the HTTP load generator: mix parsing, summaries, and a short
+closed + open loop run against the real app with stub models (in-process ASGI, no
+socket, no torch).
+
+Run:  python vision/tests/test_loadgen.py      (or: cd vision && python -m unittest tests.test_loadgen)
+"""
+import asyncio
+import os
+import sys
+import unittest
+
+# Make `vision.*` importable regardless of CWD (the load generator lives in vision/bench).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from vision.bench.loadgen import LoadGen, Record, parse_mix, summarize, sweep  # noqa: E402
+
+try:
+    import fastapi  # noqa: F401
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+
+class MixAndSummaryTests(unittest.TestCase):
+    def test_parse_mix_normalizes(self):
+        self.assertEqual(parse_mix("identify=3,analyze=1"), {"identify": 0.75, "analyze": 0.25})
+        self.assertEqual(parse_mix("identify-label"), {"identify-label": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("nope=1")
+        with self.assertRaises(ValueError):
+            parse_mix("identify=0")
+
+    def test_summary_counts_errors_and_excludes_them_from_latency(self):
+        recs = [Record("identify", 10.0, 200)] * 8 + [Record("analyze", 500.0, 503), Record("analyze", 20.0, 0)]
+        s = summarize(recs, wall_s=2.0)
+        self.assertEqual(s["requests"], 10)
+        self.assertEqual(s["rps"], 4.0)
+        self.assertEqual(s["error_rate"], 0.2)
+        self.assertEqual(s["p95_ms"], 10.0)
+        self.assertEqual(s["per_endpoint"]["analyze"]["error_rate"], 1.0)
+        self.assertIsNone(s["per_endpoint"]["analyze"]["p50_ms"])
+
+
+@unittest.skipUnless(httpx is not None, "needs fastapi + httpx")
+class StubServerTests(unittest.TestCase):
+    def test_closed_and_open_loop_against_stub_app(self):
+        os.environ.setdefault("STUB_EMBED_MS", "1")
+        os.environ.setdefault("STUB_OCR_MS", "2")
+        from vision.bench.stages import synthetic_images
+        from vision.bench.stub_app import app
+
+        frames = synthetic_images(3, (320, 240))
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://stub") as client:
+                gen = LoadGen(client, frames, parse_mix("identify=2,identify-label=1,analyze=1,identify-cascade=1"))
+                return await sweep(gen, concurrency=[2], rates=[200.0], duration_s=None, requests=12)
+
+        closed, open_ = asyncio.run(run())
+        for row in (closed, open_):
+            self.assertEqual(row["requests"], 12)
+            self.assertEqual(row["error_rate"], 0.0, row)
+            self.assertGreater(row["rps"], 0)
+        self.assertEqual((closed["mode"], open_["mode"]), ("closed", "open"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Unit tests for the indexed product OCR matcher (pure text, no EasyOCR).
+
+Run:  python vision/tests/test_ocr_match.py      (or: cd vision && python -m unittest tests.test_ocr_match)
+"""
+import os
+import random
+import sys
+import unittest
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ocr_match import OcrMatcher, normalize, signature  # noqa: E402
+
+NAMES = {
+    "p1": "Bose Wave Music System AWRCC1",
+    "p2": "Bose Wave Music System AWRCC2",
+    "p3": "Bose SoundTouch 10",
+    "p4": "Bose VCS-10 Center Channel",
+    "p5": "Bose 251 Environmental Speakers",
+    "p6": "Bose Wave Music System III",
+}
+
+
+def brute_force(sigs, text):
+    """The original O(products x tokens) scorer, kept as the exact-match oracle."""
+    spaced, concat = normalize(text)
+    spaced_set = set(spaced.split())
+    out = {}
+    for pid, sig in sigs.items():
+        s = 0
+        for tok, w in sig.items():
+            if w >= 10:
+                if tok in concat:
+                    s += w
+            elif tok in spaced_set:
+                s += w
+        if s:
+            out[pid] = s
+    return out
+
+
+class OcrMatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.m = OcrMatcher(sorted(NAMES), NAMES)
+
+    def test_model_code_disambiguates(self):
+        self.assertEqual(self.m.predict("BOSE MODEL AWRCC2 SER NO")[0], "p2")
+        self.assertEqual(self.m.predict("BOSE MODEL AWR CC1")[0], "p1")
+
+    def test_ocr_confusion_is_tolerated(self):
+        # Z read for 2: only AWRCC2 matches after folding
+        pid, top, second = self.m.predict("WAVE MUSIC SYSTEM MODEL AWRCCZ")
+        self.assertEqual(pid, "p2")
+        clean = dict(self.m.score("WAVE MUSIC SYSTEM MODEL AWRCC2"))["p2"]
+        self.assertLess(top, clean)  # folded read scores below a clean one
+
+    def test_clean_read_not_double_counted(self):
+        self.assertEqual(dict(self.m.score("AWRCC1"))["p1"], 10)
+
+    def test_no_tokens_no_candidates(self):
+        self.assertEqual(self.m.score("nothing useful here"), [])
+        self.assertEqual(self.m.predict("nothing useful here"), (None, 0, 0))
+
+    def test_ambiguous_is_rejected(self):
+        self.assertIsNone(self.m.predict("WAVE MUSIC SYSTEM")[0])
+
+    def test_matches_brute_force_without_confusions(self):
+        # Texts built from confusion-free tokens must score exactly like the old loop.
+        vocab = ["AWRCC1", "AWRCC2", "SOUNDTOUCH", "10", "VCS", "251", "WAVE", "MUSIC", "3",
+                 "CENTER", "CHANNEL", "SPEAKER", "NOISE", "TEXT"]
+        sigs = {pid: signature(n) for pid, n in NAMES.items()}
+        rng = random.Random(1)
+        for _ in range(500):
+            text = " ".join(rng.choice(vocab) for _ in range(rng.randint(1, 6)))
+            self.assertEqual(dict(self.m.score(text)), brute_force(sigs, text), text)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
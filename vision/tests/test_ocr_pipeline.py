@@ -0,0 +1,105 @@
+"""Unit tests for the prefetching OCR pipeline, with a fake identifier (no EasyOCR).
+
+Run:  python vision/tests/test_ocr_pipeline.py      (or: cd vision && python -m unittest tests.test_ocr_pipeline)
+"""
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ocr_pipeline import OcrPipeline, dataset_images  # noqa: E402
+from app.ocr_store import content_hash  # noqa: E402
+
+
+class FakeIdentifier:
+    """Mimics LabelIdentifier's lookup / prepare / read_arrays contract."""
+
+    def __init__(self, stored=None):
+        self.stored = dict(stored or {})
+        self.batches = []
+
+    def lookup(self, digest):
+        return (self.stored[digest], 0) if digest in self.stored else None
+
+    @staticmethod
+    def prepare(image):
+        return np.array(image.convert("RGB"))
+
+    def read_arrays(self, arrs, digests=None, paths=None):
+        self.batches.append([a.shape for a in arrs])
+        texts = [f"read {Path(p).name}" for p in paths]
+        for d, t in zip(digests, texts):
+            self.stored[d] = t
+        return texts
+
+
+def _jpeg(path, size, color):
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="JPEG")
+    path.write_bytes(buf.getvalue())
+    return buf.getvalue()
+
+
+class OcrPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        (self.root / "SKU-A").mkdir()
+        (self.root / "SKU-B").mkdir()
+        self.paths = []
+        for i in range(5):
+            p = self.root / "SKU-A" / f"a{i}.jpg"
+            _jpeg(p, (64, 48), (i * 40, 0, 0))
+            self.paths.append(p)
+        for i in range(3):
+            p = self.root / "SKU-B" / f"b{i}.jpg"
+            _jpeg(p, (32, 32), (0, i * 40, 0))
+            self.paths.append(p)
+        (self.root / "SKU-B" / "notes.txt").write_text("skip me")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_every_image_once_batched_by_shape(self):
+        li = FakeIdentifier()
+        out = dict(OcrPipeline(li, workers=3, batch=4, every=0, log=io.StringIO()).run(self.paths))
+        self.assertEqual(set(out), set(self.paths))
+        self.assertEqual(out[self.paths[0]], "read a0.jpg")
+        for batch in li.batches:
+            self.assertEqual(len(set(batch)), 1)      # one shape per detection batch
+            self.assertLessEqual(len(batch), 4)
+
+    def test_stored_reads_skip_ocr_so_reruns_resume(self):
+        li = FakeIdentifier({content_hash(self.paths[0].read_bytes()): "stored text"})
+        pipe = OcrPipeline(li, batch=2, every=0, log=io.StringIO())
+        out = dict(pipe.run(self.paths))
+        self.assertEqual(out[self.paths[0]], "stored text")
+        self.assertEqual(pipe.stats["cached"], 1)
+        self.assertEqual(pipe.stats["ocr"], len(self.paths) - 1)
+        # second run: everything was written as produced -> nothing re-OCR'd
+        dict(pipe.run(self.paths))
+        self.assertEqual(pipe.stats["ocr"], 0)
+        self.assertEqual(pipe.stats["cached"], len(self.paths))
+
+    def test_unreadable_image_yields_empty_text(self):
+        bad = self.root / "SKU-A" / "broken.jpg"
+        bad.write_bytes(b"not a jpeg")
+        pipe = OcrPipeline(FakeIdentifier(), every=0, log=io.StringIO())
+        out = dict(pipe.run([bad, self.paths[0]]))
+        self.assertEqual(out[bad], "")
+        self.assertEqual(pipe.stats["errors"], 1)
+
+    def test_dataset_images_walks_sku_folders(self):
+        self.assertEqual(list(dataset_images(self.root)), self.paths)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,84 @@
+"""Unit tests for the SQLite OCR result store (stdlib only).
+
+Run:  python vision/tests/test_ocr_store.py      (or: cd vision && python -m unittest tests.test_ocr_store)
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ocr_store import OcrStore, content_hash, file_hash, settings_key  # noqa: E402
+
+
+class OcrStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+        self.store = OcrStore(self.dir / "ocr.sqlite")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_round_trip_keyed_by_content_and_settings(self):
+        digest = content_hash(b"jpeg bytes")
+        self.store.put(digest, "k1", "MODEL AWRCC1", rotation=180, path="a.jpg")
+        self.assertEqual(self.store.get(digest, "k1"), ("MODEL AWRCC1", 180))
+        self.assertIsNone(self.store.get(digest, "k2"))  # other OCR settings miss
+        self.assertIsNone(self.store.get(content_hash(b"other"), "k1"))
+
+    def test_put_overwrites_and_persists(self):
+        self.store.put("h", "k", "old")
+        self.store.put("h", "k", "new")
+        reopened = OcrStore(self.dir / "ocr.sqlite")
+        self.assertEqual(reopened.get("h", "k"), ("new", 0))
+        self.assertEqual(reopened.count(), 1)
+
+    def test_iter_streams_one_settings_key(self):
+        for i in range(5):
+            self.store.put(f"h{i}", "k1", f"text {i}", path=f"p{i}.jpg")
+        self.store.put("hx", "k2", "other")
+        rows = sorted(self.store.iter_texts("k1"))
+        self.assertEqual(rows[0], ("p0.jpg", "text 0"))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(len(list(self.store.iter_texts())), 6)
+
+    def test_concurrent_threads(self):
+        def work(n):
+            for i in range(20):
+                self.store.put(f"{n}-{i}", "k", "t")
+                self.store.get(f"{n}-{i}", "k")
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.store.count("k"), 80)
+
+    def test_import_legacy_json_cache(self):
+        img = self.dir / "a.jpg"
+        img.write_bytes(b"fake jpeg")
+        cache = self.dir / "ocr_cache.json"
+        plus = self.dir / "a+b.jpg"
+        plus.write_bytes(b"another fake jpeg")
+        cache.write_text(json.dumps({str(img): "MODEL 1", str(img) + "+r180": "MODEL 2", str(plus): "MODEL 3",
+                                     str(self.dir / "gone.jpg"): "lost"}))
+        key = settings_key(True)
+        self.assertEqual(self.store.import_json_cache(cache, key), 2)
+        # stored under the key readers look up; the 180°-pass read wins; "+" in names survives
+        self.assertEqual(self.store.get(file_hash(img), key), ("MODEL 2", 0))
+        self.assertEqual(self.store.get(file_hash(plus), key), ("MODEL 3", 0))
+        self.assertEqual(self.store.import_json_cache(cache, key), 0)  # existing rows are kept
+
+    def test_settings_key_tracks_orientation(self):
+        self.assertNotEqual(settings_key(True), settings_key(False))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
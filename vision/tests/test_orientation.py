@@ -0,0 +1,75 @@
+"""Unit tests for label orientation estimation (pure geometry + a fake OCR probe).
+
+Run:  python vision/tests/test_orientation.py      (or: cd vision && python -m unittest tests.test_orientation)
+"""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.orientation import estimate_orientation, rotate_regions, text_axis  # noqa: E402
+
+
+class TextAxisTests(unittest.TestCase):
+    def test_wide_lines_are_horizontal(self):
+        self.assertEqual(text_axis([(0, 0, 100, 10), (0, 20, 80, 30)]), 0)
+
+    def test_tall_lines_are_vertical(self):
+        self.assertEqual(text_axis([(0, 0, 10, 100), (20, 0, 30, 80)]), 90)
+
+    def test_square_blobs_do_not_vote(self):
+        self.assertEqual(text_axis([(0, 0, 50, 50), (0, 0, 100, 10)]), 0)
+
+
+class RotateRegionsTests(unittest.TestCase):
+    def test_matches_numpy_rot90(self):
+        # mark a box in a w=6 x h=4 image, rotate the pixels, compare to mapped box
+        w, h = 6, 4
+        box = (1, 0, 3, 2)  # x1, y1, x2, y2 (exclusive)
+        arr = np.zeros((h, w), dtype=int)
+        arr[box[1]:box[3], box[0]:box[2]] = 1
+        for angle in (0, 90, 180, 270):
+            turned = np.rot90(arr, k=angle // 90)
+            ys, xs = np.nonzero(turned)
+            expected = (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1)
+            got = rotate_regions([box], (w, h), angle)[0]
+            self.assertEqual(tuple(int(v) for v in got), tuple(int(v) for v in expected), angle)
+
+
+class EstimateOrientationTests(unittest.TestCase):
+    def test_probe_decides_flip_within_axis(self):
+        calls = []
+
+        def probe(angle, idx):
+            calls.append(angle)
+            return 0.9 if angle == 180 else 0.2
+
+        self.assertEqual(estimate_orientation([(0, 0, 100, 10)], probe), 180)
+        self.assertEqual(sorted(calls), [0, 180])
+
+    def test_sideways_probes_quarter_turns(self):
+        calls = []
+
+        def probe(angle, idx):
+            calls.append(angle)
+            return 0.8 if angle == 270 else 0.1
+
+        self.assertEqual(estimate_orientation([(0, 0, 10, 100)], probe), 270)
+        self.assertEqual(sorted(calls), [90, 270])
+
+    def test_only_largest_boxes_are_probed(self):
+        regions = [(0, i * 20, 10 + i, i * 20 + 5) for i in range(8)]
+        seen = []
+        estimate_orientation(regions, lambda a, idx: seen.append(idx) or 0.5, probe_boxes=3)
+        self.assertEqual(seen[0], [7, 6, 5])
+
+    def test_no_regions_is_upright(self):
+        self.assertEqual(estimate_orientation([], lambda a, idx: 1 / 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
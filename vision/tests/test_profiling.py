@@ -0,0 +1,116 @@
+"""Unit tests for slow-request profiling (sampler, model spans, keep / rotate).
+
+No torch needed: the torch trace is simply absent without it.
+
+Run:  python vision/tests/test_profiling.py      (or: cd vision && python -m unittest tests.test_profiling)
+"""
+import contextvars
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import profiling  # noqa: E402
+from app.profiling import Profiler, StackSampler, model_span, recording  # noqa: E402
+
+
+def _busy_wait_here(s):
+    end = time.perf_counter() + s
+    while time.perf_counter() < end:
+        pass
+
+
+class SamplerTests(unittest.TestCase):
+    def test_samples_other_threads(self):
+        sampler = StackSampler(interval_s=0.002)
+        worker = threading.Thread(target=_busy_wait_here, args=(0.15,), name="busy-worker")
+        sampler.start()
+        worker.start()
+        worker.join()
+        sampler.stop()
+        self.assertGreater(sampler.samples, 5)
+        folded = sampler.folded()
+        self.assertIn("busy-worker;", folded)
+        self.assertIn("_busy_wait_here (test_profiling.py:", folded)
+        self.assertNotIn("profile-sampler", folded)
+
+
+class ProfilerTests(unittest.TestCase):
+    def test_off_by_default_and_span_is_noop(self):
+        with tempfile.TemporaryDirectory() as d:
+            prof = Profiler(Path(d), slow_ms=0, sample_rate=1.0)
+            self.assertIsNone(prof.begin("POST /analyze"))
+            with model_span("embed"):
+                pass
+            self.assertIsNone(profiling._current.get())
+
+    def test_only_slow_or_forced_requests_are_written(self):
+        with tempfile.TemporaryDirectory() as d:
+            prof = Profiler(Path(d), slow_ms=50, sample_rate=1.0, interval_ms=2)
+            fast = prof.begin("POST /identify")
+            self.assertIsNone(prof.end(fast, 10.0))
+
+            slow = prof.begin("POST /analyze")
+            with recording(slow), model_span("ocr.recognize"):
+                _busy_wait_here(0.03)
+            name = prof.end(slow, 80.0)
+            self.assertIn("POST-analyze-80ms", name)
+            spans = json.loads((Path(d) / name / "spans.json").read_text())
+            self.assertEqual(spans["elapsed_ms"], 80.0)
+            self.assertEqual([s["name"] for s in spans["spans"]], ["ocr.recognize"])
+            self.assertGreaterEqual(spans["spans"][0]["ms"], 25)
+            self.assertTrue((Path(d) / name / "stacks.folded").exists())
+
+            forced = Profiler(Path(d), slow_ms=0, sample_rate=0.0).begin("GET /health", forced=True)
+            self.assertIsNotNone(prof.end(forced, 1.0, forced=True))
+
+    def test_spans_go_to_their_own_request(self):
+        with tempfile.TemporaryDirectory() as d:
+            prof = Profiler(Path(d), slow_ms=1, sample_rate=1.0, interval_ms=2)
+            a, b = prof.begin("POST /a"), prof.begin("POST /b")
+
+            def request(profile, name):
+                with recording(profile):
+                    with model_span(name):
+                        pass
+                    # a bare executor thread, as analyze's OCR pool
+                    with ThreadPoolExecutor(1) as pool:
+                        pool.submit(contextvars.copy_context().run, self._span, f"{name}.ocr").result()
+
+            threads = [threading.Thread(target=request, args=(p, n)) for p, n in ((a, "embed"), (b, "detect"))]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            with model_span("stray"):  # outside any request
+                pass
+            self.assertEqual(sorted(s["name"] for s in a.spans), ["embed", "embed.ocr"])
+            self.assertEqual(sorted(s["name"] for s in b.spans), ["detect", "detect.ocr"])
+            prof.end(a, 5.0)
+            prof.end(b, 5.0)
+
+    @staticmethod
+    def _span(name):
+        with model_span(name):
+            pass
+
+    def test_rotation_keeps_newest(self):
+        with tempfile.TemporaryDirectory() as d:
+            prof = Profiler(Path(d), slow_ms=1, sample_rate=1.0, keep=2, interval_ms=2)
+            names = []
+            for i in range(4):
+                names.append(prof.end(prof.begin(f"POST /r{i}"), 5.0))
+                time.sleep(0.02)  # distinct mtimes
+            self.assertEqual(sorted(p.name for p in Path(d).iterdir()), sorted(names[-2:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
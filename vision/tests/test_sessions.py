@@ -0,0 +1,37 @@
+"""Unit tests for the receiving-session allow-list registry.
+
+Run:  python vision/tests/test_sessions.py      (or: cd vision && python -m unittest tests.test_sessions)
+"""
+import os
+import sys
+import time
+import unittest
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.sessions import SessionRegistry  # noqa: E402
+
+
+class SessionRegistryTests(unittest.TestCase):
+    def test_create_get_delete(self):
+        reg = SessionRegistry()
+        sid = reg.create([" B ", "A", "A", ""])
+        self.assertEqual(reg.get(sid), ["A", "B"])
+        self.assertEqual(reg.create(["C"], session_id=sid), sid)   # replace in place
+        self.assertEqual(reg.get(sid), ["C"])
+        self.assertTrue(reg.delete(sid))
+        self.assertIsNone(reg.get(sid))
+
+    def test_ttl_and_capacity(self):
+        reg = SessionRegistry(ttl_s=0.05, max_sessions=2)
+        a = reg.create(["A"])
+        time.sleep(0.1)
+        self.assertIsNone(reg.get(a))
+        ids = [reg.create([str(i)]) for i in range(3)]
+        self.assertIsNone(reg.get(ids[0]))   # oldest evicted
+        self.assertEqual(reg.get(ids[2]), ["2"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
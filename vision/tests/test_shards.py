@@ -0,0 +1,132 @@
+"""Unit tests for per-tenant index shards (naming, LRU residency, mmap persistence).
+
+Run:  python vision/tests/test_shards.py      (or: cd vision && python -m unittest tests.test_shards)
+"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.index import EmbeddingIndex  # noqa: E402
+from app.shards import Shard, ShardManager, shard_key  # noqa: E402
+
+
+def _unit(v):
+    v = np.asarray(v, dtype="float32")
+    return v / np.linalg.norm(v)
+
+
+class ShardKeyTests(unittest.TestCase):
+    def test_keys(self):
+        self.assertIsNone(shard_key(None))
+        self.assertIsNone(shard_key("", "bose"))
+        self.assertEqual(shard_key("acme"), "acme")
+        self.assertEqual(shard_key("acme", "bose"), "acme/bose")
+
+    def test_rejects_unsafe_names(self):
+        for bad in ("../etc", "a/b", ".hidden", "a..b", "x" * 65, "sp ace"):
+            with self.assertRaises(ValueError, msg=bad):
+                shard_key(bad)
+        with self.assertRaises(ValueError):
+            shard_key("acme", "../other")
+
+
+class ShardManagerTests(unittest.TestCase):
+    def _manager(self, max_resident):
+        loads = []
+
+        def load(key):
+            loads.append(key)
+            return Shard(key, EmbeddingIndex(2))
+
+        return ShardManager(load, max_resident=max_resident), loads
+
+    def test_lazy_load_once_and_lru_eviction(self):
+        mgr, loads = self._manager(2)
+        a = mgr.get("a")
+        self.assertIs(mgr.get("a"), a)
+        mgr.get("b")
+        mgr.get("a")          # a is now most recent
+        mgr.get("c")          # evicts b
+        self.assertEqual(mgr.resident(), ["a", "c"])
+        self.assertEqual(loads, ["a", "b", "c"])
+        self.assertEqual(mgr.evictions, 1)
+        mgr.get("b")          # reloads b, evicts a
+        self.assertEqual(loads, ["a", "b", "c", "b"])
+        self.assertEqual(mgr.resident(), ["c", "b"])
+
+    def test_stats_survive_eviction(self):
+        mgr, _ = self._manager(1)
+        mgr.get("a").stats.record(10.0)
+        mgr.get("b")          # evicts a
+        mgr.get("a").stats.record(30.0)
+        snap = mgr.snapshot()
+        self.assertEqual(snap["shards"]["a"]["requests"], 2)
+        self.assertEqual(snap["shards"]["a"]["loads"], 2)
+        self.assertTrue(snap["shards"]["a"]["resident"])
+        self.assertFalse(snap["shards"]["b"]["resident"])
+        self.assertIsNone(snap["shards"]["b"]["vectors"])
+
+    def test_cold_load_blocks_only_its_own_key(self):
+        started, release = threading.Event(), threading.Event()
+        loads = []
+
+        def load(key):
+            loads.append(key)
+            if key == "slow":
+                started.set()
+                release.wait(5)
+            return Shard(key, EmbeddingIndex(2))
+
+        mgr = ShardManager(load, max_resident=4)
+        got = []
+        slow = [threading.Thread(target=lambda: got.append(mgr.get("slow"))) for _ in range(3)]
+        slow[0].start()
+        started.wait(5)
+        for t in slow[1:]:
+            t.start()
+        self.assertEqual(mgr.get("fast").key, "fast")  # not stuck behind "slow"
+        release.set()
+        for t in slow:
+            t.join()
+        self.assertEqual(loads.count("slow"), 1)
+        self.assertTrue(all(s is got[0] for s in got))
+
+    def test_shards_in_use_are_not_evicted(self):
+        mgr, loads = self._manager(1)
+        with mgr.use("a") as a:
+            mgr.get("b")                     # over the cap, but a is leased
+            self.assertEqual(mgr.resident(), ["a", "b"])
+            self.assertTrue(mgr.snapshot()["shards"]["a"]["in_use"])
+            self.assertIs(mgr.get("a"), a)   # no second copy of a
+        self.assertEqual(mgr.resident(), ["a"])  # released: back under the cap (b was LRU)
+        self.assertEqual(loads, ["a", "b"])
+
+
+class IndexDirTests(unittest.TestCase):
+    def test_roundtrip_is_grouped_and_mapped(self):
+        idx = EmbeddingIndex(2)
+        idx.add("B", _unit([0, 1]))
+        idx.add("A", _unit([1, 0]))
+        idx.add("B", _unit([1, 1]))
+        with tempfile.TemporaryDirectory() as d:
+            idx.save_dir(Path(d) / "index")
+            back = EmbeddingIndex.load_dir(Path(d) / "index", 2)
+            self.assertIsInstance(back._vectors, np.memmap)
+            self.assertEqual(back._skus, ["A", "B", "B"])
+            self.assertEqual(back.search(_unit([1, 0]), 1)[0]["sku"], "A")
+            back.add("C", _unit([-1, 0]))          # copies out of the map
+            self.assertEqual(back.size, 4)
+            self.assertEqual(EmbeddingIndex.load_dir(Path(d) / "missing", 2).size, 0)
+            self.assertEqual(EmbeddingIndex.load_dir(Path(d) / "index", 3).size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
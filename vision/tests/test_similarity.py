@@ -0,0 +1,126 @@
+"""Unit tests for the SKU x SKU similarity matrix (matches brute force, incremental
+updates match a rebuild, persistence, neighbor / pair listing).
+
+NumPy only — no torch needed.
+
+Run:  python vision/tests/test_similarity.py      (or: cd vision && python -m unittest tests.test_similarity)
+"""
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+# Make `app` importable regardless of CWD (vision/ is the package root).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.index import EmbeddingIndex  # noqa: E402
+from app.similarity import SkuSimilarity  # noqa: E402
+
+DIM = 8
+
+
+def _unit(rng, n):
+    v = rng.normal(size=(n, DIM)).astype("float32")
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _brute(index):
+    vectors, names, seg = index.segments()
+    want = np.full((len(names), len(names)), -np.inf)
+    sims = vectors @ vectors.T
+    for i in range(len(names)):
+        for j in range(len(names)):
+            if i != j:
+                want[i, j] = sims[np.ix_(seg == i, seg == j)].max()
+    return names, want
+
+
+def _by_name(sim, names):
+    """sim.matrix re-ordered to `names` (the matrix keeps SKUs in first-seen order)."""
+    p = [sim.names.index(n) for n in names]
+    return sim.matrix[np.ix_(p, p)]
+
+
+class SkuSimilarityTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.idx = EmbeddingIndex(DIM)
+        for s in range(7):
+            self.idx.add(f"S{s}", _unit(self.rng, 1 + s % 3))
+
+    def test_matches_brute_force_in_small_blocks(self):
+        sim = SkuSimilarity()
+        self.assertEqual(len(sim.update(self.idx, chunk_cells=8)), 7)
+        names, want = _brute(self.idx)
+        self.assertEqual(sorted(sim.names), names)
+        np.testing.assert_allclose(_by_name(sim, names), want, atol=1e-5)
+
+    def test_incremental_update_recomputes_only_changed(self):
+        sim = SkuSimilarity()
+        sim.update(self.idx)
+        self.assertEqual(sim.update(self.idx), [])  # unchanged index: no work
+        self.idx.add("S2", _unit(self.rng, 2))
+        self.idx.add("NEW", _unit(self.rng, 1))
+        self.assertEqual(sorted(sim.update(self.idx)), ["NEW", "S2"])
+        names, want = _brute(self.idx)
+        self.assertEqual(sorted(sim.names), names)
+        np.testing.assert_allclose(_by_name(sim, names), want, atol=1e-5)
+        _, names, seg = self.idx.segments()
+        self.idx.keep(np.flatnonzero(seg != names.index("S0")))  # drop S0
+        sim.update(self.idx)
+        self.assertNotIn("S0", sim.names)
+        names, want = _brute(self.idx)
+        np.testing.assert_allclose(_by_name(sim, names), want, atol=1e-5)
+
+    def test_enroll_updates_in_place(self):
+        sim = SkuSimilarity()
+        sim.update(self.idx)
+        for i in range(3):  # new SKUs fill the headroom: the buffer is not reallocated
+            buf = sim._buf
+            self.idx.add(f"N{i}", _unit(self.rng, 2))
+            self.assertEqual(sim.update(self.idx), [f"N{i}"])
+            self.assertIs(sim._buf, buf)
+        self.idx.add("S3", _unit(self.rng, 1))
+        self.assertEqual(sim.update(self.idx), ["S3"])
+        self.assertIs(sim._buf, buf)
+        self.assertTrue(sim.dirty)
+        names, want = _brute(self.idx)
+        np.testing.assert_allclose(_by_name(sim, names), want, atol=1e-5)
+
+    def test_persisted_matrix_resumes(self):
+        sim = SkuSimilarity()
+        sim.update(self.idx)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "similarity.npz"
+            sim.save(path)
+            self.assertFalse(sim.dirty)
+            again = SkuSimilarity.load(path)
+        self.assertEqual(again.update(self.idx), [])  # fingerprints match: nothing to do
+        np.testing.assert_allclose(again.matrix, sim.matrix)
+        self.idx.add("NEW", _unit(self.rng, 1))  # the loaded matrix grows like any other
+        self.assertEqual(again.update(self.idx), ["NEW"])
+        names, want = _brute(self.idx)
+        np.testing.assert_allclose(_by_name(again, names), want, atol=1e-5)
+
+    def test_neighbors_and_pairs(self):
+        twin = _unit(self.rng, 1)
+        self.idx.add("A", twin)
+        self.idx.add("B", twin * 0.999 + _unit(self.rng, 1) * 0.001)
+        sim = SkuSimilarity()
+        sim.update(self.idx)
+        self.assertEqual(sim.neighbors("A", 1)[0]["sku"], "B")
+        self.assertEqual(sim.neighbors("nope"), [])
+        self.assertTrue(all(r["score"] >= 0.99 for r in sim.neighbors("A", 5, min_score=0.99)))
+        pairs = sim.pairs(top=5)
+        self.assertEqual((pairs[0]["a"], pairs[0]["b"]), ("A", "B"))
+        self.assertEqual(len({(p["a"], p["b"]) for p in pairs}), len(pairs))
+        scores = [p["score"] for p in pairs]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertEqual(len(sim.pairs(top=5, min_score=0.99)), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()